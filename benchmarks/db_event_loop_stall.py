@@ -0,0 +1,72 @@
+# benchmarks/db_event_loop_stall.py
+"""
+Mesure le blocage de la boucle d'événements pendant des écritures SQLite.
+
+Une tâche "heartbeat" se réveille toutes les millisecondes et note son retard;
+pendant ce temps on enchaîne des avertissements (add_warning + add_mod_action +
+get_warning_count, comme Moderation.warn), d'abord avec DatabaseHandler appelé
+directement sur la boucle, puis avec AsyncDatabaseHandler.
+
+Utilisation: python -m benchmarks.db_event_loop_stall [nombre_de_warns]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from utils.db_handler import DatabaseHandler
+from utils.async_db import AsyncDatabaseHandler
+
+TICK = 0.001
+
+async def heartbeat(lags, stop):
+    """Enregistre le retard de chaque réveil par rapport à l'échéance prévue"""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+async def run_sync(db_path, count):
+    db = DatabaseHandler(db_path)
+    for i in range(count):
+        db.add_warning(i % 50, 1, 2, "benchmark")
+        db.add_mod_action("warn", i % 50, 1, 2, "benchmark")
+        db.get_warning_count(i % 50, 1)
+        # Laisser la main comme le ferait un `await ctx.send(...)`
+        await asyncio.sleep(0)
+    db.close()
+
+async def run_async(db_path, count):
+    db = AsyncDatabaseHandler(db_path)
+    for i in range(count):
+        db.add_warning(i % 50, 1, 2, "benchmark")
+        db.add_mod_action("warn", i % 50, 1, 2, "benchmark")
+        await db.get_warning_count(i % 50, 1)
+    await db.close()
+
+async def measure(name, workload, db_path, count):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await workload(db_path, count)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if len(lags_ms) > 1 else lags_ms[0]
+    print(f"{name:<22} {count / elapsed:>9.0f} warns/s   "
+          f"retard boucle: moyen {statistics.mean(lags_ms):6.2f} ms  "
+          f"p99 {p99:6.2f} ms  max {lags_ms[-1]:6.2f} ms  ({len(lags)} réveils)")
+
+async def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{count} avertissements par scénario (base temporaire dans {tmp})")
+        await measure("DatabaseHandler", run_sync, os.path.join(tmp, "sync.db"), count)
+        await measure("AsyncDatabaseHandler", run_async, os.path.join(tmp, "async.db"), count)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,88 @@
+# benchmarks/fake_invites.py
+"""
+Recalcul des invitations fausses sur un gros historique.
+
+Une base temporaire reçoit N suivis d'arrivées (graine fixe) sur quelques
+serveurs: comptes de tous âges, départs plus ou moins rapides, membres qui
+reviennent. Les statistiques sont d'abord celles d'avant la détection (aucune
+arrivée fausse), puis recompute_fake_invites les corrige en une passe.
+
+On affiche le plan de la requête (la fonction de fenêtre doit suivre l'index
+sans tri temporaire), la durée du recalcul et celle d'un second recalcul, qui
+ne change plus rien.
+
+Utilisation: python -m benchmarks.fake_invites [nombre_de_suivis]
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.db_handler import DatabaseHandler
+from utils.fake_invites import DISCORD_EPOCH
+
+SERVERS = 5
+INVITERS = 2000
+
+def fill(db, count):
+    rng = random.Random(42)
+    start = datetime.datetime(2024, 1, 1)
+    members = []
+    rows = []
+    for i in range(count):
+        server_id = rng.randrange(1, SERVERS + 1)
+        join_time = start + datetime.timedelta(seconds=i * 30)
+        if members and rng.random() < 0.1:
+            # Retour d'un membre déjà venu
+            invited_id = rng.choice(members)
+        else:
+            created = join_time - datetime.timedelta(days=rng.choice([0.5, 3, 30, 400, 2000]))
+            invited_id = (int(created.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000) - DISCORD_EPOCH) << 22 | i % 4096
+            members.append(invited_id)
+        left_time = None
+        if rng.random() < 0.3:
+            left_time = join_time + datetime.timedelta(seconds=rng.choice([60, 1800, 86400, 864000]))
+        rows.append((server_id, rng.randrange(INVITERS), invited_id, "code",
+                     join_time.strftime("%Y-%m-%d %H:%M:%S"),
+                     left_time.strftime("%Y-%m-%d %H:%M:%S") if left_time else None))
+    db.conn.executemany('''
+    INSERT INTO invite_tracking (server_id, inviter_id, invited_id, invite_code, join_time, left_time)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    db.conn.execute('''
+    INSERT INTO invite_stats (user_id, server_id, invites_regular, invites_left)
+    SELECT inviter_id, server_id, COUNT(*), COUNT(left_time)
+    FROM invite_tracking GROUP BY inviter_id, server_id
+    ''')
+    db.conn.commit()
+
+def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHandler(os.path.join(tmp, "fake_invites.db"))
+        began = time.perf_counter()
+        fill(db, count)
+        print(f"{count} suivis d'arrivées créés en {time.perf_counter() - began:.1f} s")
+
+        plan = db.conn.execute('''
+        EXPLAIN QUERY PLAN
+        SELECT id, inviter_id, fake, left_time,
+               ROW_NUMBER() OVER (PARTITION BY server_id, invited_id ORDER BY join_time, id)
+        FROM invite_tracking
+        ''').fetchall()
+        print("  plan: " + " | ".join(row[3] for row in plan))
+
+        for label in ("recalcul", "second recalcul"):
+            began = time.perf_counter()
+            result = db.recompute_fake_invites(7, 3600)
+            duration = time.perf_counter() - began
+            print(f"  {label}: {duration:.1f} s ({count / duration:,.0f} suivis/s), "
+                  f"{result['changed']} arrivées reclassées, {result['inviters']} inviteurs corrigés")
+
+        fake, left = db.conn.execute("SELECT SUM(invites_fake), SUM(invites_left) FROM invite_stats").fetchone()
+        print(f"  total: {fake} invitations fausses, {left} départs")
+        db.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
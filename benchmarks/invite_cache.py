@@ -0,0 +1,128 @@
+# benchmarks/invite_cache.py
+"""
+Mémoire du cache des invitations et coût de la comparaison à chaque lot d'arrivées.
+
+Pour un serveur de N invitations (graine fixe), on mesure avec tracemalloc:
+- l'ancien cache {code: discord.Invite}. discord.py n'étant pas requis ici, les
+  invitations sont reproduites par des objets aux mêmes __slots__ que
+  discord.Invite et discord.User (un User créé par invitation, deux datetime),
+  ce qui sous-estime plutôt le coût réel (pas de canal partiel, pas de dict d'avatar);
+- InviteSnapshot: tableaux parallèles dans l'ordre de la réponse.
+Puis le temps de comparaison avec une nouvelle réponse dont 1 % des compteurs ont
+changé, mise à jour du cache comprise.
+
+Utilisation: python -m benchmarks.invite_cache [nombre_d_invitations]
+"""
+import datetime
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+from utils.invite_snapshot import InviteSnapshot, invite_entry
+
+class User:
+    __slots__ = ("name", "id", "discriminator", "global_name", "_avatar", "_banner", "_accent_colour",
+                 "bot", "system", "_public_flags", "_state", "_avatar_decoration_data")
+
+    def __init__(self, user_id, rng):
+        self.name = f"membre{user_id}"
+        self.id = user_id
+        self.discriminator = "0"
+        self.global_name = f"Membre {user_id}"
+        self._avatar = "".join(rng.choices("0123456789abcdef", k=32))
+        self._banner = None
+        self._accent_colour = None
+        self.bot = False
+        self.system = False
+        self._public_flags = 0
+        self._state = None
+        self._avatar_decoration_data = None
+
+class Invite:
+    __slots__ = ("max_age", "code", "guild", "created_at", "uses", "temporary", "max_uses", "inviter",
+                 "channel", "target_user", "target_type", "_state", "approximate_member_count",
+                 "approximate_presence_count", "target_application", "expires_at", "scheduled_event",
+                 "scheduled_event_id", "type")
+
+    def __init__(self, code, rng, now):
+        self.max_age = rng.choice([0, 86400, 604800])
+        self.code = code
+        self.guild = None
+        self.created_at = now - datetime.timedelta(seconds=rng.randrange(10_000_000))
+        self.uses = rng.randrange(500)
+        self.temporary = False
+        self.max_uses = rng.choice([0, 0, 0, 10, 100])
+        self.inviter = User(10**17 + rng.randrange(5000), rng)
+        self.channel = None
+        self.target_user = None
+        self.target_type = 0
+        self._state = None
+        self.approximate_member_count = None
+        self.approximate_presence_count = None
+        self.target_application = None
+        self.expires_at = self.created_at + datetime.timedelta(seconds=self.max_age) if self.max_age else None
+        self.scheduled_event = None
+        self.scheduled_event_id = None
+        self.type = 0
+
+def make_invites(count, seed):
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    codes = {"".join(rng.choices(string.ascii_letters + string.digits, k=10)) for _ in range(count)}
+    return [Invite(code, rng, now) for code in codes]
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def main(count):
+    invites = make_invites(count, seed=42)
+    codes = [invite.code for invite in invites]
+    # Les codes viennent de la même réponse que les invitations dans les deux cas
+    _, objects = measure(lambda: {invite.code: Invite(invite.code, random.Random(i), invite.created_at)
+                                  for i, invite in enumerate(invites)})
+    entries = [invite_entry(invite) for invite in invites]
+    snapshot, compact = measure(lambda: InviteSnapshot(entries))
+    # Les deux caches gardent les mêmes chaînes de codes
+    code_bytes = sum(sys.getsizeof(code) for code in codes)
+    objects += code_bytes
+    compact += code_bytes
+
+    print(f"{count} invitations")
+    print(f"  {{code: discord.Invite}}: {objects / 1024:9.1f} Kio ({objects / count:6.0f} o/invitation)")
+    print(f"  InviteSnapshot:          {compact / 1024:9.1f} Kio ({compact / count:6.0f} o/invitation)")
+    print(f"  pour 1000 serveurs de cette taille: {objects * 1000 / 1024**3:.2f} Gio -> {compact * 1000 / 1024**3:.2f} Gio")
+
+    rng = random.Random(7)
+    for invite in rng.sample(invites, max(1, count // 100)):
+        invite.uses += 1
+    old_dict = {entry.code: entry for entry in entries}
+
+    # Construction du dict de la réponse comprise dans les deux cas
+    rounds = 20
+    began = time.perf_counter()
+    for _ in range(rounds):
+        new_dict = {invite.code: invite for invite in invites}
+        deltas = {code: invite.uses - old_dict[code].uses for code, invite in new_dict.items()
+                  if code in old_dict and invite.uses > old_dict[code].uses}
+    dict_time = (time.perf_counter() - began) / rounds
+    diff_time = 0.0
+    for _ in range(rounds):
+        # Compteurs remis à l'état précédent à chaque tour (hors mesure)
+        snapshot = InviteSnapshot(entries)
+        began = time.perf_counter()
+        fresh = {invite.code: invite for invite in invites}
+        snapshot_deltas = snapshot.diff(fresh)
+        snapshot = snapshot.update(fresh)
+        diff_time += (time.perf_counter() - began) / rounds
+    assert snapshot_deltas == deltas
+    print(f"comparaison ({len(deltas)} compteurs modifiés): dict {dict_time * 1000:.2f} ms, "
+          f"InviteSnapshot {diff_time * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
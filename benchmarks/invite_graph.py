@@ -0,0 +1,105 @@
+# benchmarks/invite_graph.py
+"""
+Arbre d'invitations d'un gros serveur.
+
+Une base temporaire reçoit N arrivées suivies (graine fixe): les nouveaux
+membres sont surtout invités par des membres déjà actifs (attachement
+préférentiel), avec des départs et des retours. On mesure:
+- le chargement de l'arbre (get_invite_edges + construction);
+- le coût d'une arrivée et d'un départ sur l'arbre chargé;
+- la consultation de !invitetree pour les plus gros inviteurs, contre une
+  CTE récursive exécutée à chaque commande sur invite_tracking. Les retours
+  peuvent former des cycles (A invite B, B réinvite A): l'arbre les coupe, la
+  CTE peut alors compter le membre lui-même dans son réseau.
+
+Utilisation: python -m benchmarks.invite_graph [nombre_d_arrivées]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.async_db import AsyncDatabaseHandler
+from utils.db_handler import DatabaseHandler
+from utils.invite_graph import InviteGraph
+
+SERVER_ID = 1
+
+RECURSIVE_NETWORK = '''
+WITH RECURSIVE latest AS (
+    SELECT invited_id, inviter_id, fake, left_time FROM (
+        SELECT invited_id, inviter_id, fake, left_time,
+               ROW_NUMBER() OVER (PARTITION BY invited_id ORDER BY join_time DESC, id DESC) AS rn
+        FROM invite_tracking WHERE server_id = ?
+    ) WHERE rn = 1
+),
+network(user_id) AS (
+    SELECT invited_id FROM latest WHERE inviter_id = ?
+    UNION
+    SELECT latest.invited_id FROM latest JOIN network ON latest.inviter_id = network.user_id
+)
+SELECT COUNT(*) FROM network JOIN latest ON latest.invited_id = network.user_id
+WHERE latest.left_time IS NULL AND latest.fake = 0
+'''
+
+def fill(conn, count):
+    rng = random.Random(42)
+    members = [1]
+    rows = []
+    for i in range(count):
+        if len(members) > 10 and rng.random() < 0.05:
+            invited_id = rng.choice(members)
+        else:
+            invited_id = 1000 + i
+            members.append(invited_id)
+        # Attachement préférentiel: choisir l'inviteur d'une arrivée existante
+        inviter_id = rng.choice(rows)[1] if rows and rng.random() < 0.5 else rng.choice(members)
+        left = rng.random() < 0.2
+        rows.append((SERVER_ID, inviter_id, invited_id, "code", f"2024-01-01 00:00:{i % 60:02d}",
+                     "2024-02-01 00:00:00" if left else None))
+    conn.executemany('''
+    INSERT INTO invite_tracking (server_id, inviter_id, invited_id, invite_code, join_time, left_time)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+async def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "graph.db")
+        handler = DatabaseHandler(path)
+        fill(handler.conn, count)
+        db = AsyncDatabaseHandler(path)
+        await db.connect()
+
+        graph = InviteGraph(db)
+        began = time.perf_counter()
+        tree = await graph.get(SERVER_ID)
+        print(f"{count} arrivées suivies, arbre de {len(tree)} membres chargé en {time.perf_counter() - began:.2f} s")
+
+        top = sorted(tree.size, key=tree.size.get, reverse=True)[:5]
+        began = time.perf_counter()
+        rounds = 10_000
+        rng = random.Random(7)
+        for i in range(rounds):
+            graph.join(SERVER_ID, 10**9 + i, rng.choice(top), True)
+            graph.leave(SERVER_ID, 10**9 + i)
+        print(f"  arrivée + départ: {(time.perf_counter() - began) / rounds * 1e6:.1f} µs")
+
+        for user_id in top[:3]:
+            began = time.perf_counter()
+            network = tree.network(user_id)
+            direct = tree.direct(user_id)
+            tree.top_invited(user_id)
+            cached = time.perf_counter() - began
+            began = time.perf_counter()
+            recursive = handler.conn.execute(RECURSIVE_NETWORK, (SERVER_ID, user_id)).fetchone()[0]
+            cte = time.perf_counter() - began
+            print(f"  membre {user_id}: {direct} directs, réseau {network} (CTE: {recursive}); "
+                  f"cache {cached * 1000:.2f} ms, CTE récursive {cte * 1000:.0f} ms")
+        await db.close()
+        handler.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000))
@@ -0,0 +1,152 @@
+# benchmarks/invite_joins.py
+"""
+Attribution des invitations pendant une vague d'arrivées.
+
+Un serveur simulé (graine fixe) reçoit N arrivées sur quelques secondes, chacune
+via une invitation tirée au hasard (quelques codes très utilisés). Discord
+incrémente le compteur de l'invitation puis envoie l'événement d'arrivée avec un
+léger décalage; guild.invites() répond avec une latence réseau.
+
+- par arrivée: l'ancien on_member_join, un guild.invites() par membre, les
+  gestionnaires concurrents comparant chacun leur propre ancien état;
+- JoinCoalescer: les arrivées d'une fenêtre sont attribuées ensemble à partir
+  d'un seul guild.invites() et des différences de compteurs.
+
+On compte les appels REST par arrivée, la part de membres attribués à la bonne
+invitation, la part de membres attribués à tort (lien membre/inviteur faux enregistré)
+et la part des crédits d'inviteurs justes. Un lot partagé entre plusieurs inviteurs
+n'attribue aucun membre: seuls les nombres d'arrivées par inviteur sont crédités.
+
+Utilisation: python -m benchmarks.invite_joins [nombre_d_arrivées]
+"""
+import asyncio
+import datetime
+import random
+import sys
+from collections import Counter
+from types import SimpleNamespace
+
+from utils.invite_coalescer import JoinCoalescer, match_joins
+from utils.invite_snapshot import InviteSnapshot, invite_entry
+
+LATENCY = 0.08  # secondes par appel à guild.invites()
+EVENT_DELAY = 0.05  # décalage maximal entre l'utilisation et l'événement
+
+class FakeGuild:
+    def __init__(self, codes):
+        created = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)
+        self.live = {
+            code: SimpleNamespace(code=code, uses=0, max_uses=0, created_at=created, expires_at=None,
+                                  inviter=SimpleNamespace(id=inviter_id))
+            for code, inviter_id in codes.items()
+        }
+        self.calls = 0
+
+    async def invites(self):
+        self.calls += 1
+        await asyncio.sleep(LATENCY / 2)
+        snapshot = [SimpleNamespace(**vars(invite)) for invite in self.live.values()]
+        await asyncio.sleep(LATENCY / 2)
+        return snapshot
+
+    def snapshot(self):
+        return {code: SimpleNamespace(**vars(invite)) for code, invite in self.live.items()}
+
+def join_plan(count, duration, codes, seed):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** 1.5 for rank in range(len(codes))]
+    moments = sorted(rng.uniform(0, duration) for _ in range(count))
+    return [(moment, rng.choices(codes, weights)[0], rng.uniform(0, EVENT_DELAY)) for moment in moments]
+
+async def simulate(plan, guild, on_join):
+    """Rejoue les arrivées: utilisation de l'invitation, puis événement décalé"""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    members = []
+    tasks = []
+
+    async def dispatch(member, delay):
+        await asyncio.sleep(delay)
+        on_join(member)
+
+    for member_id, (moment, code, delay) in enumerate(plan):
+        await asyncio.sleep(max(0.0, start + moment - loop.time()))
+        guild.live[code].uses += 1
+        member = SimpleNamespace(id=member_id, guild=guild, truth=code)
+        members.append(member)
+        tasks.append(asyncio.create_task(dispatch(member, delay)))
+    await asyncio.gather(*tasks)
+    return members
+
+async def per_join(plan, guild):
+    cache = {guild: guild.snapshot()}
+    result = {}
+    handlers = []
+
+    async def on_member_join(member):
+        old_invites = cache.get(guild, {})
+        new_invites = {invite.code: invite for invite in await guild.invites()}
+        cache[guild] = new_invites
+        result[member.id] = None
+        for code, invite in new_invites.items():
+            if code in old_invites and invite.uses > old_invites[code].uses:
+                result[member.id] = invite_entry(invite)
+                break
+
+    members = await simulate(plan, guild, lambda member: handlers.append(asyncio.create_task(on_member_join(member))))
+    await asyncio.gather(*handlers)
+    return members, result
+
+async def coalesced(plan, guild, window):
+    state = {"invites": InviteSnapshot.from_invites(guild.snapshot().values()), "unclaimed": None}
+    result = {}
+    credits = Counter()
+
+    async def resolve(guild_id, members):
+        new_invites = {invite.code: invite for invite in await guild.invites()}
+        joins, batch_credits, leftover = match_joins(members, state["invites"], new_invites, state["unclaimed"])
+        state["invites"], state["unclaimed"] = state["invites"].update(new_invites), leftover
+        credits.update(batch_credits)
+        for member, invite in joins:
+            result[member.id] = invite
+
+    coalescer = JoinCoalescer(resolve, window=window)
+    members = await simulate(plan, guild, lambda member: coalescer.add(1, member))
+    while coalescer._tasks:
+        await asyncio.sleep(0.05)
+    return members, result, credits, coalescer.batches
+
+def score(members, result, guild, credits=()):
+    exact = sum(1 for member in members if result.get(member.id) and result[member.id].code == member.truth)
+    wrong = sum(1 for member in members
+                if result.get(member.id) and result[member.id].inviter_id != guild.live[member.truth].inviter.id)
+    expected = Counter(guild.live[member.truth].inviter.id for member in members)
+    credited = Counter(invite.inviter_id for invite in result.values() if invite) + Counter(credits)
+    credits = sum(min(count, credited[inviter_id]) for inviter_id, count in expected.items())
+    return exact / len(members), wrong / len(members), credits / len(members)
+
+async def main(count):
+    codes = {f"code{i}": 1000 + i % 12 for i in range(20)}
+    scenarios = [
+        ("raid (un seul code)", {"code0": 1000}, count, 10.0),
+        ("promotion (20 codes)", codes, count, 10.0),
+    ]
+    for name, scenario_codes, joins, duration in scenarios:
+        plan = join_plan(joins, duration, list(scenario_codes), seed=42)
+        print(f"{name}: {joins} arrivées en {duration:.0f} s")
+
+        guild = FakeGuild(scenario_codes)
+        members, result = await per_join(plan, guild)
+        exact, wrong, credits = score(members, result, guild)
+        print(f"  par arrivée:          {guild.calls:5d} appels REST ({guild.calls / joins:.2f}/arrivée), "
+              f"membres {exact:6.1%}, erronés {wrong:6.1%}, crédits {credits:6.1%}")
+
+        for window in (0.25, 1.0):
+            guild = FakeGuild(scenario_codes)
+            members, result, batch_credits, batches = await coalesced(plan, guild, window)
+            exact, wrong, credits = score(members, result, guild, batch_credits)
+            print(f"  JoinCoalescer {window:4.2f} s: {guild.calls:5d} appels REST ({guild.calls / joins:.2f}/arrivée), "
+                  f"membres {exact:6.1%}, erronés {wrong:6.1%}, crédits {credits:6.1%}, {batches} lots")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,72 @@
+# benchmarks/invite_warmup.py
+"""
+Temps de chargement des invitations au démarrage pour un bot présent sur N serveurs.
+
+Discord est simulé (graine fixe): chaque guild.invites() prend 100 à 250 ms et la
+limite globale est de 50 requêtes par seconde. Au-delà, la requête reçoit un 429
+et le client attend retry_after avant de réessayer, comme discord.py.
+
+- séquentiel: l'ancien fetch_invites, un serveur après l'autre;
+- warm_up: requêtes en parallèle (sémaphore) sous un seau à jetons.
+
+Utilisation: python -m benchmarks.invite_warmup [nombre_de_serveurs]
+"""
+import asyncio
+import collections
+import random
+import sys
+import time
+
+from utils.invite_warmup import warm_up
+
+GLOBAL_LIMIT = 50  # requêtes par seconde
+
+class FakeDiscord:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.recent = collections.deque()
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def invites(self, guild_id):
+        while True:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            self.requests += 1
+            if len(self.recent) < GLOBAL_LIMIT:
+                self.recent.append(now)
+                break
+            self.rate_limited += 1
+            await asyncio.sleep(1.0 - (now - self.recent[0]))
+        await asyncio.sleep(self.rng.uniform(0.1, 0.25))
+        return []
+
+async def sequential(discord, guilds):
+    started = time.perf_counter()
+    for guild_id in guilds:
+        await discord.invites(guild_id)
+    return time.perf_counter() - started
+
+async def concurrent(discord, guilds, concurrency, rate):
+    async def fetch(guild_id):
+        await discord.invites(guild_id)
+        return True
+    stats = await warm_up(guilds, fetch, concurrency=concurrency, rate=rate)
+    return stats["duration"]
+
+async def main(count):
+    guilds = list(range(count))
+    print(f"{count} serveurs")
+
+    discord = FakeDiscord(42)
+    duration = await sequential(discord, guilds)
+    print(f"  séquentiel:                 {duration:6.1f} s, {discord.rate_limited} réponses 429")
+
+    for concurrency, rate in ((8, 40), (16, 40), (64, 1000)):
+        discord = FakeDiscord(42)
+        duration = await concurrent(discord, guilds, concurrency, rate)
+        print(f"  warm_up {concurrency:2d} en vol, {rate:4d}/s:  {duration:6.1f} s, {discord.rate_limited} réponses 429")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
@@ -0,0 +1,136 @@
+# benchmarks/log_sink.py
+"""
+Envoi des logs du serveur de modération pendant une rafale d'événements.
+
+Un serveur actif produit N logs sur une minute, à intervalles aléatoires (graine
+fixe): 50 % info (vocal, arrivées), 30 % change, 19 % deletion, 1 % moderation.
+Le canal est simulé avec la limite de Discord pour l'envoi de messages: 5 messages
+par tranche de 5 secondes; au-delà, l'envoi attend la fin de la tranche (429 puis
+retry_after, comme discord.py).
+
+- un message par log: l'ancien log_to_mod_server, attendu par chaque listener;
+- LogSink: file bornée (500) et prioritaire, lots de 10 embeds / 6000 caractères
+  au plus, envoyés toutes les 2 s; put() n'attend pas l'envoi.
+
+On mesure les appels à l'API, le nombre de listeners bloqués en même temps, la
+taille maximale de la file et les logs ignorés par type.
+
+Le temps est accéléré (`SPEED` fois) pour que le benchmark tienne en quelques secondes.
+
+Utilisation: python -m benchmarks.log_sink [nombre_de_logs] (essayer 3000 pour une rafale)
+"""
+import asyncio
+import random
+import sys
+import time
+
+from utils.log_sink import LogSink
+
+LOG_TYPES = ["info"] * 50 + ["change"] * 30 + ["deletion"] * 19 + ["moderation"]
+
+SPEED = 50
+BUCKET_SIZE = 5  # messages
+BUCKET_PERIOD = 5.0 / SPEED  # secondes
+
+class Embed:
+    """Embed réduit à sa taille en caractères"""
+
+    def __init__(self, size):
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+class FakeChannel:
+    def __init__(self):
+        self.calls = 0
+        self.rate_limited = 0
+        self.embeds = 0
+        self.max_chars = 0
+        self._window = 0.0
+        self._sent = 0
+        self._lock = asyncio.Lock()
+
+    async def send(self, embed=None, embeds=None):
+        embeds = embeds or [embed]
+        assert len(embeds) <= 10
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now - self._window >= BUCKET_PERIOD:
+                    self._window, self._sent = now, 0
+                if self._sent < BUCKET_SIZE:
+                    break
+                self.rate_limited += 1
+                await asyncio.sleep(self._window + BUCKET_PERIOD - now)
+            self._sent += 1
+        await asyncio.sleep(0.08 / SPEED)
+        self.calls += 1
+        self.embeds += len(embeds)
+        self.max_chars = max(self.max_chars, sum(len(embed) for embed in embeds))
+
+def make_events(count, seed):
+    rng = random.Random(seed)
+    events = []
+    moment = 0.0
+    for _ in range(count):
+        moment += rng.expovariate(count / 60.0) / SPEED
+        events.append((moment, Embed(rng.randint(150, 1200)), rng.choice(LOG_TYPES)))
+    return events
+
+async def run(events, send):
+    """Rejoue les événements; retourne le nombre maximal de listeners bloqués dans send()"""
+    blocked = max_blocked = 0
+    started = time.monotonic()
+
+    async def emit(moment, embed, log_type):
+        nonlocal blocked, max_blocked
+        await asyncio.sleep(max(0.0, started + moment - time.monotonic()))
+        blocked += 1
+        max_blocked = max(max_blocked, blocked)
+        await send(embed, log_type)
+        blocked -= 1
+
+    await asyncio.gather(*(emit(*event) for event in events))
+    return max_blocked
+
+async def main(count):
+    events = make_events(count, seed=42)
+
+    direct = FakeChannel()
+
+    async def send_direct(embed, log_type):
+        await direct.send(embed=embed)
+
+    began = time.monotonic()
+    direct_blocked = await run(events, send_direct)
+    direct_time = (time.monotonic() - began) * SPEED
+
+    batched = FakeChannel()
+    sink = LogSink(lambda embeds: batched.send(embeds=embeds), interval=2.0 / SPEED,
+                   summarize=lambda counts: Embed(200), report_interval=60.0 / SPEED)
+    sink.start()
+
+    async def send_sink(embed, log_type):
+        sink.put(embed, log_type)
+
+    began = time.monotonic()
+    sink_blocked = await run(events, send_sink)
+    await sink.close()
+    batched_time = (time.monotonic() - began) * SPEED
+    stats = sink.stats()
+    ignored = sum(stats["dropped"].values()) + sum(stats["sampled"].values())
+    reports = batched.embeds - (count - ignored)
+    assert reports >= 0 and batched.max_chars <= 6000
+
+    print(f"{count} logs sur une minute ({stats['urgent']} de modération)")
+    print(f"  un message par log: {direct.calls:5d} appels, {direct.rate_limited:5d} attentes de limite, "
+          f"{direct_blocked:5d} listeners bloqués au plus, dernier log envoyé après {direct_time:6.1f} s")
+    print(f"  LogSink:            {stats['api_calls']:5d} appels, {batched.rate_limited:5d} attentes de limite, "
+          f"{sink_blocked:5d} listeners bloqués au plus, dernier log envoyé après {batched_time:6.1f} s")
+    print(f"  {stats['ratio']:.1f} logs par appel, file max {stats['max_depth']}, "
+          f"{reports} signalement(s) de logs ignorés")
+    print(f"  ignorés: {ignored} (file pleine {stats['dropped']}, échantillonnés {stats['sampled']})")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 600))
@@ -0,0 +1,88 @@
+# benchmarks/query_plans.py
+"""
+Vérifie que chaque requête chaude utilise un index.
+
+Les méthodes de lecture de DatabaseHandler sont appelées sur une base migrée
+et peuplée; les SELECT réellement exécutés sont capturés puis passés à
+EXPLAIN QUERY PLAN. Une requête qui parcourt une table entière (SCAN, sauf
+parcours d'index borné par LIMIT) ou qui trie dans un B-tree temporaire fait
+échouer la vérification (code de sortie 1).
+
+Utilisation: python -m benchmarks.query_plans
+"""
+import os
+import sys
+import tempfile
+
+from utils.db_handler import DatabaseHandler
+
+SERVER_ID = 1
+
+# (méthode, arguments): les lectures faites par les commandes et les événements
+HOT_CALLS = [
+    ("get_warnings", (1, SERVER_ID)),
+    ("get_warnings", (1, SERVER_ID, 10, ("2100-01-01 00:00:00", 1_000_000))),
+    ("get_warning_count", (1, SERVER_ID)),
+    ("get_mod_actions", (1, SERVER_ID, 15)),
+    ("get_mod_actions", (1, SERVER_ID, 15, ("2100-01-01 00:00:00", 1_000_000))),
+    ("get_level_info", (1, SERVER_ID)),
+    ("get_leaderboard", (SERVER_ID, 10)),
+    ("get_guild_levels", (SERVER_ID,)),
+    ("get_due_reminders", ()),
+    ("get_next_reminders", (1000,)),
+    ("get_next_giveaways", (1000,)),
+    ("get_giveaway_by_message", (1,)),
+    ("get_invite_tracking", (SERVER_ID, 1)),
+    ("get_invite_stats", (1, SERVER_ID)),
+    ("get_invite_edges", (SERVER_ID,)),
+    ("get_server_invite_stats", (SERVER_ID,)),
+    ("get_invite_leaderboard", (SERVER_ID, 25)),
+    ("get_invite_rank", (1, SERVER_ID)),
+    ("get_server_config", (SERVER_ID,)),
+    ("get_server_config_value", (SERVER_ID, "welcome_channel_id")),
+]
+
+def populate(db):
+    """Quelques milliers de lignes pour que le planificateur ait de vraies statistiques"""
+    for i in range(2000):
+        db.add_warning(i % 100, SERVER_ID + i % 5, 2, "plan")
+        db.add_mod_action("warn", i % 100, SERVER_ID + i % 5, 2, "plan")
+        db.add_xp(i % 300, SERVER_ID + i % 5, 20)
+        db.add_invite_tracking(SERVER_ID + i % 5, i % 50, 10_000 + i, "plan")
+        db.add_reminder(i % 100, SERVER_ID, 3, "plan", "2000-01-01 00:00:00")
+        db.set_server_config_value(SERVER_ID + i % 50, f"cle_{i % 20}", str(i))
+    db.conn.execute("ANALYZE")
+    db.conn.commit()
+
+def capture_selects(db, method, args):
+    statements = []
+    db.conn.set_trace_callback(lambda sql: statements.append(sql) if sql.lstrip().upper().startswith("SELECT") else None)
+    try:
+        getattr(db, method)(*args)
+    finally:
+        db.conn.set_trace_callback(None)
+    return statements
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHandler(os.path.join(tmp, "plans.db"))
+        populate(db)
+        for method, args in HOT_CALLS:
+            for sql in capture_selects(db, method, args):
+                plan = [row[3] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+                # Parcourir un index dans l'ordre jusqu'à LIMIT est acceptable, pas une table entière
+                bounded = "LIMIT" in sql.upper()
+                slow = [step for step in plan
+                        if (step.startswith("SCAN") and not (bounded and "USING" in step)) or "TEMP B-TREE" in step]
+                status = "ÉCHEC" if slow else "ok"
+                failures += bool(slow)
+                print(f"[{status:>5}] {method}: {' | '.join(plan)}")
+        db.close()
+    if failures:
+        print(f"{failures} requête(s) sans index adapté")
+        sys.exit(1)
+    print("Toutes les requêtes chaudes utilisent un index")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/reminders.py
+"""
+Mémoire et livraison des rappels.
+
+1. Mémoire: N rappels en attente, d'abord comme l'ancienne commande (une
+   coroutine qui dort par rappel), puis avec ReminderScheduler (rappels en
+   base, seule une fenêtre d'échéances en mémoire). Mesure avec tracemalloc.
+2. Livraison: N rappels répartis sur les prochaines secondes, livrés par lots;
+   on compte les lots et le retard de livraison par rapport à l'échéance.
+
+Utilisation: python -m benchmarks.reminders [nombre_de_rappels]
+"""
+import asyncio
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from utils.async_db import AsyncDatabaseHandler
+from utils.reminder_scheduler import ReminderScheduler
+from utils.scheduler import TIME_FORMAT, to_db_time, utcnow
+
+async def sleeping_coroutines(count):
+    async def reminder(delay):
+        await asyncio.sleep(delay)
+    tracemalloc.start()
+    tasks = [asyncio.create_task(reminder(3600 + i)) for i in range(count)]
+    await asyncio.sleep(0)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return current
+
+async def fill(db, count, start, spread):
+    rng = random.Random(42)
+    for i in range(count):
+        remind_at = start + datetime.timedelta(seconds=rng.uniform(0, spread))
+        db.add_reminder(i, 1, 1, f"rappel {i}", to_db_time(remind_at))
+    await db.flush()
+
+async def scheduler_memory(db, count):
+    await fill(db, count, utcnow() + datetime.timedelta(hours=1), 86400)
+
+    async def never(reminders):
+        pass
+    scheduler = ReminderScheduler(db, never)
+    tracemalloc.start()
+    await scheduler._refill()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, len(scheduler)
+
+async def delivery(db, count, spread):
+    lateness = []
+
+    async def deliver(reminders):
+        now = utcnow()
+        for reminder in reminders:
+            due = datetime.datetime.strptime(reminder["remind_time"], TIME_FORMAT)
+            lateness.append((now - due).total_seconds())
+
+    start = utcnow() + datetime.timedelta(seconds=2)
+    await fill(db, count, start, spread)
+    scheduler = ReminderScheduler(db, deliver, batch_size=500)
+    began = time.perf_counter()
+    scheduler.start()
+    while scheduler.delivered < count and time.perf_counter() - began < spread + 30:
+        await asyncio.sleep(0.1)
+    await scheduler.stop()
+    return scheduler, lateness
+
+async def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        coroutines = await sleeping_coroutines(count)
+        print(f"{count} rappels en attente")
+        print(f"  une coroutine par rappel: {coroutines / 1024 / 1024:8.1f} Mo")
+
+        db = AsyncDatabaseHandler(os.path.join(tmp, "memory.db"))
+        await db.connect()
+        memory, loaded = await scheduler_memory(db, count)
+        await db.close()
+        print(f"  ReminderScheduler:        {memory / 1024 / 1024:8.1f} Mo ({loaded} échéances en mémoire)")
+
+        db = AsyncDatabaseHandler(os.path.join(tmp, "delivery.db"))
+        await db.connect()
+        delivered = count // 10
+        scheduler, lateness = await delivery(db, delivered, spread=5)
+        await db.close()
+        lateness.sort()
+        print(f"livraison de {scheduler.delivered}/{delivered} rappels en {scheduler.batches} lots, "
+              f"retard moyen {statistics.mean(lateness):.2f} s, p99 {lateness[int(len(lateness) * 0.99) - 1]:.2f} s "
+              f"(échéances à la seconde)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
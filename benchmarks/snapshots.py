@@ -0,0 +1,60 @@
+# benchmarks/snapshots.py
+"""
+Mesure les instantanés dédupliqués et le temps de restauration.
+
+Une base est peuplée, puis on alterne une vague d'écritures (avertissements
+et XP) et un instantané. On compare la taille du dépôt à celle qu'auraient
+des copies complètes, puis on restaure le premier instantané dans la base
+en cours d'utilisation: vérification (hors écritures) et copie finale
+(écritures suspendues) sont chronométrées séparément.
+
+Utilisation: python -m benchmarks.snapshots [nombre_d_instantanés]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+from utils.async_db import AsyncDatabaseHandler
+from utils.snapshots import SnapshotStore
+
+SERVER_ID = 1
+
+async def main(rounds):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AsyncDatabaseHandler(os.path.join(tmp, "bot.db"))
+        await db.connect()
+        store = SnapshotStore(os.path.join(tmp, "snapshots"))
+
+        for i in range(50_000):
+            db.add_xp(i % 5000, SERVER_ID, rng.randint(15, 25))
+            db.add_warning(i % 2000, SERVER_ID, 2, "x" * rng.randint(20, 200))
+        await db.flush()
+
+        full_copies = 0
+        print(f"{'instantané':<22}{'taille':>10}{'blocs neufs':>13}{'octets neufs':>14}{'durée':>10}")
+        snapshots = []
+        for _ in range(rounds):
+            snapshot = await db.snapshot(store)
+            snapshots.append(snapshot)
+            full_copies += snapshot["size"]
+            print(f"{snapshot['id']:<22}{snapshot['size'] // 1024:>8} Ko{snapshot['new_chunks']:>13}"
+                  f"{snapshot['new_bytes'] // 1024:>11} Ko{snapshot['duration'] * 1000:>8.0f} ms")
+            # Une vague d'activité entre deux instantanés
+            for i in range(500):
+                db.add_xp(rng.randrange(5000), SERVER_ID, rng.randint(15, 25))
+                db.add_warning(rng.randrange(2000), SERVER_ID, 2, "vague")
+
+        usage = store.disk_usage()
+        print(f"dépôt: {usage // 1024} Ko pour {rounds} instantanés, copies complètes: {full_copies // 1024} Ko "
+              f"(x{full_copies / usage:.1f})")
+
+        result = await db.restore(store, snapshots[0]["id"])
+        print(f"restauration de {result['id']}: vérification {result['duration'] * 1000:.0f} ms, "
+              f"écritures suspendues {result['swap_duration'] * 1000:.0f} ms")
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,100 @@
+# benchmarks/sqlite_profiles.py
+"""
+Compare des profils de stockage SQLite sur les écritures réelles du bot.
+
+Chaque profil est appliqué à une base neuve, puis on rejoue trois charges:
+- warn:   add_warning + add_mod_action + get_warning_count (Moderation.warn)
+- xp:     add_xp sur une population de membres (système de niveaux)
+- invite: add_invite_tracking + record_invite_left (InviteTracker)
+Pendant chaque charge, un thread lecteur interroge la base toutes les
+millisecondes (trafic de commandes) pour mesurer les lectures concurrentes et
+les erreurs "database is locked" côté lecteur comme côté écrivain.
+
+Les données sont générées avec une graine fixe: deux exécutions sur la même
+machine rejouent exactement la même séquence.
+
+Utilisation: python -m benchmarks.sqlite_profiles [opérations_par_charge]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from utils.db_handler import DatabaseHandler, DEFAULT_PRAGMAS
+
+PROFILES = {
+    "défaut sqlite (DELETE/FULL)": {},
+    "WAL + FULL": {"busy_timeout": 5000, "journal_mode": "WAL", "synchronous": "FULL"},
+    "WAL + NORMAL": {"busy_timeout": 5000, "journal_mode": "WAL", "synchronous": "NORMAL"},
+    "profil par défaut du bot": DEFAULT_PRAGMAS,
+}
+
+SERVER_ID = 1
+
+def warn_op(db, rng, i):
+    user_id = rng.randrange(1, 500)
+    db.add_warning(user_id, SERVER_ID, 2, "benchmark")
+    db.add_mod_action("warn", user_id, SERVER_ID, 2, "benchmark")
+    db.get_warning_count(user_id, SERVER_ID)
+
+def xp_op(db, rng, i):
+    db.add_xp(rng.randrange(1, 2000), SERVER_ID, rng.randint(15, 25))
+
+def invite_op(db, rng, i):
+    db.add_invite_tracking(SERVER_ID, rng.randrange(1, 100), 10_000 + i, "code")
+    if rng.random() < 0.2:
+        db.record_invite_left(SERVER_ID, 10_000 + i)
+
+WORKLOADS = {"warn": warn_op, "xp": xp_op, "invite": invite_op}
+
+def reader(db_path, pragmas, stop, stats):
+    """Lit en boucle comme le ferait le pool de lecture de bot.db"""
+    db = DatabaseHandler(db_path, setup=False, pragmas=pragmas)
+    while not stop.is_set():
+        try:
+            db.get_warnings(1, SERVER_ID)
+            db.get_leaderboard(SERVER_ID)
+            stats["reads"] += 1
+        except sqlite3.OperationalError:
+            stats["locked"] += 1
+        time.sleep(0.001)
+    db.close()
+
+def run(profile_name, pragmas, workload_name, count, tmp):
+    db_path = os.path.join(tmp, f"{abs(hash((profile_name, workload_name)))}.db")
+    db = DatabaseHandler(db_path, pragmas=pragmas)
+    stop = threading.Event()
+    stats = {"reads": 0, "locked": 0}
+    thread = threading.Thread(target=reader, args=(db_path, pragmas, stop, stats))
+    thread.start()
+
+    operation = WORKLOADS[workload_name]
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for i in range(count):
+        try:
+            operation(db, rng, i)
+        except sqlite3.OperationalError:
+            db.conn.rollback()
+            stats["locked"] += 1
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    thread.join()
+    db.close()
+    return count / elapsed, stats["reads"] / elapsed, stats["locked"]
+
+def main(count):
+    print(f"{count} opérations par charge, graine 42")
+    print(f"{'profil':<30}{'charge':<8}{'écritures/s':>12}{'lectures/s':>12}{'verrouillées':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile_name, pragmas in PROFILES.items():
+            for workload_name in WORKLOADS:
+                writes, reads, locked = run(profile_name, pragmas, workload_name, count, tmp)
+                print(f"{profile_name:<30}{workload_name:<8}{writes:>12.0f}{reads:>12.0f}{locked:>14}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,200 @@
+# benchmarks/webhook_pool.py
+"""
+Débit d'envoi des logs dans un canal: le bot seul ou WebhookPool.
+
+Un serveur HTTP local tient lieu de l'API Discord (création et liste des webhooks,
+envoi de messages par le bot et par webhook) avec ses limites de débit:
+- messages du bot dans un canal: 5 par tranche de 5 s;
+- exécution d'un webhook: 5 par tranche de 2 s, par webhook;
+- second scénario: un plafond commun de 30 messages par minute pour tous les
+  webhooks d'un canal (limite constatée mais non documentée par Discord).
+Au-delà, la réponse est un 429 avec retry_after, et le client attend puis réessaie
+comme discord.py. Trois émetteurs (file des logs, modération, invitations) envoient
+chacun N messages à la suite. À mi-parcours, un webhook est supprimé côté serveur:
+le groupe doit se replier sur le bot puis le remplacer.
+
+Le temps est accéléré (`SPEED` fois) pour que le benchmark tienne en quelques secondes.
+
+Utilisation: python -m benchmarks.webhook_pool [messages_par_émetteur] [taille_du_groupe]
+"""
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+from utils.webhook_pool import WebhookPool
+
+SPEED = 20
+LATENCY = 0.08 / SPEED  # temps de réponse de l'API
+CHANNEL_ID = 1000
+
+class Bucket:
+    """Limite par tranche de temps fixe"""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period / SPEED
+        self.window = 0.0
+        self.used = 0
+
+    def retry_after(self):
+        now = time.monotonic()
+        if now - self.window >= self.period:
+            self.window, self.used = now, 0
+        if self.used < self.limit:
+            self.used += 1
+            return 0.0
+        return self.window + self.period - now
+
+class FakeDiscord:
+    """API réduite servie en HTTP/1.1 (une connexion par requête)"""
+
+    def __init__(self, webhook_cap=None):
+        self.ids = itertools.count(2000)
+        self.webhooks = {}
+        self.buckets = {("bot", CHANNEL_ID): Bucket(5, 5.0)}
+        if webhook_cap:
+            self.buckets[("webhooks", CHANNEL_ID)] = Bucket(webhook_cap, 60.0)
+        self.messages = 0
+        self.rate_limited = 0
+
+    def delete_webhook(self):
+        self.webhooks.pop(min(self.webhooks), None)
+
+    def route(self, method, path, body):
+        parts = path.strip("/").split("/")
+        if parts[0] == "channels" and parts[2] == "webhooks":
+            if method == "GET":
+                return 200, list(self.webhooks.values())
+            webhook_id = next(self.ids)
+            webhook = {"id": webhook_id, "name": body["name"], "token": f"jeton{webhook_id}"}
+            self.webhooks[webhook_id] = webhook
+            self.buckets[("webhook", webhook_id)] = Bucket(5, 2.0)
+            return 200, webhook
+        if parts[0] == "channels":
+            return self.post_message([("bot", CHANNEL_ID)])
+        webhook = self.webhooks.get(int(parts[1]))
+        if webhook is None or webhook["token"] != parts[2]:
+            return 404, {"message": "Unknown Webhook"}
+        return self.post_message([("webhook", webhook["id"]), ("webhooks", CHANNEL_ID)])
+
+    def post_message(self, keys):
+        for key in keys:
+            bucket = self.buckets.get(key)
+            wait = bucket.retry_after() if bucket else 0.0
+            if wait:
+                self.rate_limited += 1
+                return 429, {"retry_after": wait}
+        self.messages += 1
+        return 204, None
+
+    async def handle(self, reader, writer):
+        request = (await reader.readline()).decode().split()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        body = json.loads(await reader.readexactly(length)) if length else None
+        await asyncio.sleep(LATENCY)
+        status, payload = self.route(request[0], request[1], body)
+        data = json.dumps(payload).encode() if payload is not None else b""
+        writer.write(f"HTTP/1.1 {status} X\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+        writer.close()
+
+class HTTPException(Exception):
+    def __init__(self, status, payload):
+        super().__init__(f"{status} {payload}")
+        self.status = status
+
+class Client:
+    def __init__(self, port):
+        self.port = port
+
+    async def request(self, method, path, body=None):
+        """Requête avec attente et nouvel essai sur 429"""
+        while True:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            data = json.dumps(body).encode() if body is not None else b""
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: local\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            response = await reader.read()
+            writer.close()
+            payload = json.loads(response.split(b"\r\n\r\n", 1)[1] or b"null")
+            if status == 429:
+                await asyncio.sleep(payload["retry_after"])
+                continue
+            if status >= 400:
+                raise HTTPException(status, payload)
+            return payload
+
+class Webhook:
+    def __init__(self, client, data):
+        self.client = client
+        self.id = data["id"]
+        self.name = data["name"]
+        self.token = data["token"]
+
+    async def send(self, **kwargs):
+        await self.client.request("POST", f"/webhooks/{self.id}/{self.token}", {"embeds": kwargs.get("embeds", [])})
+
+class Channel:
+    id = CHANNEL_ID
+
+    def __init__(self, client):
+        self.client = client
+
+    async def send(self, **kwargs):
+        await self.client.request("POST", f"/channels/{self.id}/messages", {"embeds": kwargs.get("embeds", [])})
+
+    async def webhooks(self):
+        return [Webhook(self.client, data) for data in await self.client.request("GET", f"/channels/{self.id}/webhooks")]
+
+    async def create_webhook(self, name, reason=None):
+        return Webhook(self.client, await self.client.request("POST", f"/channels/{self.id}/webhooks", {"name": name}))
+
+async def scenario(per_sender, size, webhook_cap=None):
+    api = FakeDiscord(webhook_cap)
+    server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+    channel = Channel(Client(server.sockets[0].getsockname()[1]))
+    pool = WebhookPool(size)
+    total = 3 * per_sender
+    sent = 0
+
+    async def sender():
+        nonlocal sent
+        for _ in range(per_sender):
+            await pool.send(channel, embeds=[{"title": "log"}])
+            sent += 1
+            if sent == total // 2 and size:
+                api.delete_webhook()
+
+    began = time.monotonic()
+    await asyncio.gather(*(sender() for _ in range(3)))
+    elapsed = (time.monotonic() - began) * SPEED
+    server.close()
+    await server.wait_closed()
+    assert api.messages == total
+    return elapsed, api, pool.stats()
+
+async def main(per_sender, size):
+    total = 3 * per_sender
+    print(f"{total} messages (3 émetteurs), groupe de {size} webhooks")
+    for cap in (None, 30):
+        label = "sans plafond commun aux webhooks" if cap is None else f"plafond de {cap} messages/min pour les webhooks du canal"
+        print(f"  {label}:")
+        bot_time, bot_api, _ = await scenario(per_sender, 0, cap)
+        print(f"    bot seul:    {bot_time:6.1f} s ({total / bot_time * 60:5.0f} messages/min, {bot_api.rate_limited} réponses 429)")
+        pool_time, pool_api, stats = await scenario(per_sender, size, cap)
+        print(f"    WebhookPool: {pool_time:6.1f} s ({total / pool_time * 60:5.0f} messages/min, {pool_api.rate_limited} réponses 429), "
+              f"{stats['sent_webhook']} par webhook, {stats['sent_bot']} par le bot, "
+              f"{stats['fallbacks']} repli(s), {stats['created']} webhook(s) créé(s)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 40, int(sys.argv[2]) if len(sys.argv) > 2 else 3))
@@ -0,0 +1,54 @@
+# benchmarks/write_behind.py
+"""
+Mesure le débit d'événements pendant un raid avec et sans group commit.
+
+On simule N arrivées concurrentes (un on_member_join par membre): chaque
+événement enregistre une invitation et une action de modération, comme le
+font InviteTracker et Moderation. Le scénario "un commit par événement"
+utilise batch_size=1, le scénario "group commit" les réglages par défaut.
+
+Utilisation: python -m benchmarks.write_behind [nombre_d_evenements]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from utils.async_db import AsyncDatabaseHandler
+from utils.db_handler import DEFAULT_PRAGMAS
+
+SERVER_ID = 1
+
+async def on_member_join(db, member_id):
+    await asyncio.gather(
+        db.add_invite_tracking(SERVER_ID, member_id % 25, member_id, "raid"),
+        db.add_mod_action("join", member_id, SERVER_ID, 0, "raid"),
+    )
+
+async def measure(name, db_path, events, pragmas, **options):
+    db = AsyncDatabaseHandler(db_path, pragmas=pragmas, **options)
+    await db.connect()
+    start = time.perf_counter()
+    await asyncio.gather(*(on_member_join(db, 1000 + i) for i in range(events)))
+    elapsed = time.perf_counter() - start
+
+    # Lecture après écriture: toutes les arrivées doivent être visibles
+    stats = await db.get_server_invite_stats(SERVER_ID)
+    recorded = sum(row["invites_regular"] for row in stats)
+    await db.close()
+    print(f"  {name:<28} {events / elapsed:>10.0f} événements/s  ({recorded}/{events} enregistrés)")
+
+async def main(events):
+    profiles = {
+        "synchronous=FULL": dict(DEFAULT_PRAGMAS, synchronous="FULL"),
+        "profil par défaut du bot": DEFAULT_PRAGMAS,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, pragmas in profiles.items():
+            print(f"{events} arrivées concurrentes, {label}")
+            await measure("un commit par événement", os.path.join(tmp, f"single-{label}.db"), events, pragmas, batch_size=1)
+            await measure("group commit", os.path.join(tmp, f"batch-{label}.db"), events, pragmas)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
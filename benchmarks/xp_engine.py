@@ -0,0 +1,75 @@
+# benchmarks/xp_engine.py
+"""
+Débit soutenu du système de niveaux, en messages par seconde.
+
+Un flux de messages (graine fixe) répartis sur une population de membres est
+traité de deux façons:
+- par message: un add_xp (SELECT + INSERT/UPDATE) par gain, mis en file
+  d'écriture de bot.db comme le ferait un cog qui écrirait directement en base;
+- XPEngine: cooldowns et XP en mémoire, flush périodique des membres modifiés.
+Le temps simulé avance de 10 ms par message, le cooldown est celui du bot.
+
+Utilisation: python -m benchmarks.xp_engine [nombre_de_messages]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.async_db import AsyncDatabaseHandler
+from utils.xp_engine import XPEngine
+
+SERVER_ID = 1
+MEMBERS = 2000
+COOLDOWN = 60
+MESSAGE_STEP = 0.01  # secondes simulées entre deux messages
+FLUSH_EVERY = 30  # secondes simulées
+
+def message_stream(count):
+    rng = random.Random(42)
+    # Quelques membres très bavards, beaucoup de membres occasionnels
+    return [int(MEMBERS * rng.random() ** 3) for _ in range(count)]
+
+async def per_message(db, stream):
+    last = {}
+    rng = random.Random(42)
+    for i, user_id in enumerate(stream):
+        now = i * MESSAGE_STEP
+        if now - last.get(user_id, -COOLDOWN) < COOLDOWN:
+            continue
+        last[user_id] = now
+        db.add_xp(user_id, SERVER_ID, rng.randint(15, 25))
+
+async def engine(db, stream):
+    xp = XPEngine(db, cooldown=COOLDOWN, rng=random.Random(42))
+    next_flush = FLUSH_EVERY
+    for i, user_id in enumerate(stream):
+        now = i * MESSAGE_STEP
+        await xp.process(SERVER_ID, user_id, now=now)
+        if now >= next_flush:
+            xp.flush(now=now)
+            next_flush += FLUSH_EVERY
+    xp.flush(now=len(stream) * MESSAGE_STEP)
+
+async def measure(name, workload, stream, tmp):
+    db = AsyncDatabaseHandler(os.path.join(tmp, f"{workload.__name__}.db"))
+    await db.connect()
+    start = time.perf_counter()
+    await workload(db, stream)
+    await db.flush()
+    elapsed = time.perf_counter() - start
+    top = await db.get_leaderboard(SERVER_ID, 1)
+    await db.close()
+    print(f"{name:<14}{len(stream) / elapsed:>12.0f} messages/s   ({elapsed:.2f} s, meilleur niveau {top[0]['level']})")
+
+async def main(count):
+    stream = message_stream(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{count} messages, {MEMBERS} membres, cooldown {COOLDOWN} s, graine 42")
+        await measure("par message", per_message, stream, tmp)
+        await measure("XPEngine", engine, stream, tmp)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
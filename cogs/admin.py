@@ -1,6 +1,6 @@
 # cogs/admin.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import os
 import sys
@@ -8,11 +8,36 @@ import asyncio
 import datetime
 from typing import Optional, List
 
-from config import ADMIN_ROLE_ID
+from config import ADMIN_ROLE_ID, BACKUP_DIR, BACKUP_INTERVAL_MINUTES, BACKUP_RETENTION
+from utils.snapshots import SnapshotStore
 
 class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.snapshots = SnapshotStore(os.path.join(BACKUP_DIR, 'snapshots'))
+        # Un seul instantané ou une seule restauration à la fois
+        self.snapshot_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        if BACKUP_INTERVAL_MINUTES > 0:
+            self.snapshot_loop.change_interval(minutes=BACKUP_INTERVAL_MINUTES)
+            self.snapshot_loop.start()
+
+    async def cog_unload(self):
+        self.snapshot_loop.cancel()
+
+    @tasks.loop(minutes=60)
+    async def snapshot_loop(self):
+        """Instantané périodique puis application de la politique de rétention"""
+        try:
+            async with self.snapshot_lock:
+                snapshot = await self.bot.db.snapshot(self.snapshots)
+                loop = asyncio.get_running_loop()
+                removed = await loop.run_in_executor(None, lambda: self.snapshots.apply_retention(**BACKUP_RETENTION))
+            print(f"Instantané {snapshot['id']} créé ({snapshot['new_chunks']} bloc(s) nouveau(x), "
+                  f"{snapshot['duration']:.2f} s), {len(removed)} instantané(s) expiré(s)")
+        except Exception as e:
+            print(f"Erreur lors de l'instantané automatique: {e}")
 
     @commands.hybrid_command(name="reload", description="Recharge une extension")
     @app_commands.describe(extension="Le nom de l'extension à recharger")
@@ -198,10 +223,7 @@ class Admin(commands.Cog):
             
             # Enregistrer l'action de modération
             try:
-                from utils.db_handler import DatabaseHandler
-                db = DatabaseHandler()
-                db.add_mod_action("purge", user.id, ctx.guild.id, ctx.author.id, reason)
-                db.close()
+                await self.bot.db.add_mod_action("purge", user.id, ctx.guild.id, ctx.author.id, reason)
             except Exception as e:
                 print(f"Erreur lors de l'enregistrement de l'action de purge: {e}")
             
@@ -318,25 +340,120 @@ class Admin(commands.Cog):
             await channel.send(embed=embed)
 
     @commands.hybrid_command(name="backup", description="Crée une sauvegarde de la base de données")
+    @app_commands.describe(compress="Compresser la sauvegarde avec gzip")
     @commands.has_permissions(administrator=True)
-    async def backup(self, ctx):
+    async def backup(self, ctx, compress: bool = False):
         try:
-            # Créer un dossier backups s'il n'existe pas
-            if not os.path.exists('backups'):
-                os.makedirs('backups')
-            
             # Générer un nom de fichier avec la date
             date_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            backup_path = f"backups/database_backup_{date_str}.db"
+            backup_path = os.path.join(BACKUP_DIR, f"database_backup_{date_str}.db")
+            
+            message = await ctx.send("⏳ Sauvegarde en cours... 0%")
+            
+            # La copie avance dans un thread, la progression est affichée au plus toutes les 2 secondes
+            progress = {"done": 0, "total": 0}
+            def on_progress(done, total):
+                progress["done"], progress["total"] = done, total
+            
+            task = asyncio.create_task(self.bot.db.backup(backup_path, compress=compress, progress=on_progress))
+            while not task.done():
+                await asyncio.wait({task}, timeout=2)
+                if not task.done() and progress["total"]:
+                    await message.edit(content=f"⏳ Sauvegarde en cours... {progress['done'] * 100 // progress['total']}%")
+            result = task.result()
+            
+            await message.edit(content=(
+                f"✅ Sauvegarde créée avec succès: `{result['path']}`\n"
+                f"{result['pages']} pages, {result['size'] / 1024:.0f} Ko en {result['duration']:.2f} s, "
+                f"intégrité: {result['integrity']}"
+            ))
             
-            # Copier la base de données
-            import shutil
-            shutil.copy2('data/database.db', backup_path)
+        except Exception as e:
+            await ctx.send(f"❌ Erreur lors de la création de la sauvegarde:\n```{e}```")
+
+    @commands.hybrid_command(name="snapshots", description="Liste les instantanés automatiques de la base de données")
+    @commands.has_permissions(administrator=True)
+    async def list_snapshots(self, ctx):
+        try:
+            loop = asyncio.get_running_loop()
+            snapshots = await loop.run_in_executor(None, self.snapshots.list_snapshots)
+            usage = await loop.run_in_executor(None, self.snapshots.disk_usage)
             
-            await ctx.send(f"✅ Sauvegarde créée avec succès: `{backup_path}`")
+            if not snapshots:
+                return await ctx.send("❌ Aucun instantané disponible.")
+            
+            embed = discord.Embed(
+                title="Instantanés de la base de données",
+                description=f"{len(snapshots)} instantané(s), {usage / (1024 * 1024):.1f} Mo sur le disque",
+                color=discord.Color.blue(),
+                timestamp=datetime.datetime.now()
+            )
+            for snapshot in snapshots[:20]:
+                created = datetime.datetime.fromisoformat(snapshot["created_at"])
+                embed.add_field(
+                    name=snapshot["id"],
+                    value=f"<t:{int(created.timestamp())}:f> • {snapshot['size'] / 1024:.0f} Ko",
+                    inline=False
+                )
+            if len(snapshots) > 20:
+                embed.set_footer(text=f"Affichage des 20 plus récents sur {len(snapshots)}")
+            
+            await ctx.send(embed=embed)
             
         except Exception as e:
-            await ctx.send(f"❌ Erreur lors de la création de la sauvegarde:\n```{e}```")
+            await ctx.send(f"❌ Erreur lors de la lecture des instantanés:\n```{e}```")
+
+    @commands.hybrid_command(name="restore", description="Restaure la base de données depuis un instantané")
+    @app_commands.describe(snapshot_id="L'ID de l'instantané (voir /snapshots)")
+    @commands.has_permissions(administrator=True)
+    async def restore(self, ctx, snapshot_id: str):
+        try:
+            if self.snapshots.get_snapshot(snapshot_id) is None:
+                return await ctx.send(f"❌ L'instantané `{snapshot_id}` n'existe pas.")
+            
+            async with self.snapshot_lock:
+                message = await ctx.send("⏳ Instantané de sécurité de l'état actuel...")
+                # L'état actuel est conservé: une restauration peut elle-même être annulée
+                safety = await self.bot.db.snapshot(self.snapshots)
+                
+                await message.edit(content=f"⏳ Vérification et restauration de `{snapshot_id}`...")
+                result = await self.bot.db.restore(self.snapshots, snapshot_id)
+            
+            await message.edit(content=(
+                f"✅ Base restaurée depuis `{snapshot_id}`\n"
+                f"Vérification: {result['duration']:.2f} s, écritures suspendues: {result['swap_duration'] * 1000:.0f} ms\n"
+                f"État précédent conservé dans l'instantané `{safety['id']}`"
+            ))
+            
+        except Exception as e:
+            await ctx.send(f"❌ Erreur lors de la restauration:\n```{e}```")
+
+    @commands.hybrid_command(name="db_check", description="Vérifie et reconstruit les compteurs dérivés de la base de données")
+    @commands.has_permissions(administrator=True)
+    async def db_check(self, ctx):
+        try:
+            message = await ctx.send("⏳ Vérification des compteurs en cours...")
+            
+            # Compteurs d'avertissements (table warning_counts)
+            warning_mismatches = await self.bot.db.rebuild_warning_counts()
+            cache_stats = self.bot.db.config_cache.stats()
+            
+            embed = discord.Embed(
+                title="Vérification de la base de données",
+                color=discord.Color.green() if not warning_mismatches else discord.Color.orange(),
+                timestamp=datetime.datetime.now()
+            )
+            embed.add_field(name="Compteurs d'avertissements", value=f"{warning_mismatches} corrigé(s)", inline=False)
+            embed.add_field(
+                name="Cache de configuration",
+                value=f"{cache_stats['servers']} serveur(s), {cache_stats['hits']} hit(s) / {cache_stats['misses']} miss ({cache_stats['hit_rate']:.0%})",
+                inline=False
+            )
+            
+            await message.edit(content=None, embed=embed)
+            
+        except Exception as e:
+            await ctx.send(f"❌ Erreur lors de la vérification de la base de données:\n```{e}```")
 
     @commands.hybrid_command(name="set_config", description="Définit une valeur de configuration pour le serveur")
     @app_commands.describe(
@@ -346,18 +463,8 @@ class Admin(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def set_config(self, ctx, key: str, *, value: str):
         try:
-            from utils.db_handler import DatabaseHandler
-            db = DatabaseHandler()
-            
-            # Récupérer la configuration actuelle
-            config = db.get_server_config(ctx.guild.id)
-            
-            # Mettre à jour la valeur
-            config[key] = value
-            
-            # Sauvegarder la configuration
-            db.update_server_config(ctx.guild.id, config)
-            db.close()
+            # Seule la clé modifiée est écrite
+            await self.bot.db.set_server_config_value(ctx.guild.id, key, value)
             
             await ctx.send(f"✅ Configuration mise à jour: `{key}` = `{value}`")
             
@@ -371,21 +478,16 @@ class Admin(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def get_config(self, ctx, key: Optional[str] = None):
         try:
-            from utils.db_handler import DatabaseHandler
-            db = DatabaseHandler()
-            
-            # Récupérer la configuration
-            config = db.get_server_config(ctx.guild.id)
-            db.close()
-            
             if key:
                 # Récupérer une valeur spécifique
-                if key in config:
-                    await ctx.send(f"📝 Configuration: `{key}` = `{config[key]}`")
+                value = await self.bot.db.get_server_config_value(ctx.guild.id, key)
+                if value is not None:
+                    await ctx.send(f"📝 Configuration: `{key}` = `{value}`")
                 else:
                     await ctx.send(f"❌ La clé `{key}` n'existe pas dans la configuration.")
             else:
                 # Récupérer toutes les valeurs
+                config = await self.bot.db.get_server_config(ctx.guild.id)
                 if not config:
                     return await ctx.send("❌ Aucune configuration n'a été définie pour ce serveur.")
                 
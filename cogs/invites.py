@@ -2,85 +2,109 @@
 import json
 import discord
 from discord.ext import commands
+import asyncio
 import datetime
-import sqlite3
 import json
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
-from config import MODERATION_SERVER_ID
+from config import (
+    MODERATION_SERVER_ID, INVITE_JOIN_WINDOW, INVITE_SNAPSHOT_TTL,
+    INVITE_WARMUP_CONCURRENCY, INVITE_WARMUP_RATE, INVITE_FAKE_ACCOUNT_DAYS, INVITE_FAKE_LEAVE_SECONDS
+)
+from utils.fake_invites import FakeInviteDetector, account_age, describe_fake
+from utils.invite_graph import InviteGraph
+from utils.invite_coalescer import JoinCoalescer, match_joins
+from utils.invite_snapshot import InviteSnapshot, invite_entry
+from utils.invite_warmup import warm_up
 
 class InviteTracker(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        from utils.db_handler import DatabaseHandler
-        self.db_handler = DatabaseHandler()  # Instance unique
-        self.invites: Dict[int, Dict[str, discord.Invite]] = {}
-        # Structure: {guild_id: {invite_code: invite_obj}}
-
-    def cog_unload(self):
-        """Ferme la connexion à la base de données lors du déchargement du cog"""
-        if hasattr(self, 'db_handler'):
-            self.db_handler.close()
-        
-    def setup_database(self):
-        """Configure la base de données pour les invitations"""
-        self.conn = sqlite3.connect('data/database.db')
-        self.cursor = self.conn.cursor()
+        self.db = bot.db  # Gestionnaire de connexions partagé par tout le bot
+        self.invites: Dict[int, InviteSnapshot] = {}
+        # Structure: {guild_id: état compact (code -> utilisations, inviteur, limite, expiration)}
+        # Dernière récupération complète des invitations: {guild_id: time.monotonic()}
+        self.invites_fetched: Dict[int, float] = {}
+        self.warmup_task: Optional[asyncio.Task] = None
+        # Utilisations vues au dernier lot mais pas encore attribuées, valables pour les
+        # arrivées de la fenêtre suivante: {guild_id: ({invite_code: nombre}, échéance time.monotonic())}
+        self.unclaimed: Dict[int, Tuple[Dict[str, int], float]] = {}
+        # Invitations fausses: compte récent, départ rapide, retour d'un membre déjà venu
+        self.fakes = FakeInviteDetector(bot.db, INVITE_FAKE_ACCOUNT_DAYS, INVITE_FAKE_LEAVE_SECONDS)
+        # Arbres d'invitations (qui a amené qui), avec la taille de chaque sous-arbre
+        self.graph = InviteGraph(bot.db)
+        # Les arrivées rapprochées sont traitées par lots (une seule récupération des invitations)
+        self.joins = JoinCoalescer(self.resolve_joins, window=INVITE_JOIN_WINDOW)
+    
+    async def cog_load(self):
+        self.bot.db.add_restore_hook(self.graph.clear)
+    
+    async def cog_unload(self):
+        self.bot.db.remove_restore_hook(self.graph.clear)
+        if self.warmup_task:
+            self.warmup_task.cancel()
+        await self.joins.close()
+    
+    def store_invites(self, guild_id, snapshot):
+        """Remplace l'état des invitations d'un serveur par une récupération complète"""
+        self.invites[guild_id] = snapshot
+        self.invites_fetched[guild_id] = time.monotonic()
+        # Les utilisations non attribuées se rapportaient à l'état remplacé
+        self.unclaimed.pop(guild_id, None)
+    
+    def is_fresh(self, guild_id):
+        """L'état est encore à jour (gardé par les événements depuis la dernière récupération)"""
+        fetched = self.invites_fetched.get(guild_id)
+        return fetched is not None and time.monotonic() - fetched < INVITE_SNAPSHOT_TTL
+    
+    async def fetch_guild_invites(self, guild):
+        """Récupère les invitations d'un serveur, retourne True si elles ont été chargées"""
+        try:
+            # Vérifier les permissions
+            if not guild.me.guild_permissions.manage_guild:
+                return False
+            # Récupérer les invitations
+            guild_invites = await guild.invites()
+            self.store_invites(guild.id, InviteSnapshot.from_invites(guild_invites))
+            return True
+        except discord.Forbidden:
+            print(f"Impossible de récupérer les invitations pour le serveur {guild.name} (ID: {guild.id})")
+        except Exception as e:
+            print(f"Erreur lors de la récupération des invitations pour {guild.name}: {e}")
+        return False
+    
+    async def fetch_invites(self):
+        """Récupère les invitations de tous les serveurs, en parallèle et sous les limites de Discord"""
+        guilds = [guild for guild in self.bot.guilds if not self.is_fresh(guild.id)]
+        skipped = len(self.bot.guilds) - len(guilds)
+        if not guilds:
+            print(f"Invitations à jour pour {skipped} serveurs")
+            return
         
-        # Table pour suivre qui a invité qui
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS invite_tracking (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            server_id INTEGER NOT NULL,
-            inviter_id INTEGER NOT NULL,
-            invited_id INTEGER NOT NULL,
-            invite_code TEXT NOT NULL,
-            join_time DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
+        def report(done, total):
+            print(f"Chargement des invitations: {done}/{total} serveurs")
         
-        # Table pour les statistiques d'invitation par utilisateur
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS invite_stats (
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            invites_regular INTEGER DEFAULT 0,
-            invites_left INTEGER DEFAULT 0,
-            invites_fake INTEGER DEFAULT 0,
-            invites_bonus INTEGER DEFAULT 0,
-            PRIMARY KEY (user_id, server_id)
+        stats = await warm_up(
+            guilds, self.fetch_guild_invites,
+            concurrency=INVITE_WARMUP_CONCURRENCY, rate=INVITE_WARMUP_RATE, progress=report
         )
-        ''')
-        
-        self.conn.commit()
-    
-    async def fetch_invites(self):
-        """Récupère toutes les invitations pour tous les serveurs"""
-        for guild in self.bot.guilds:
-            try:
-                # Vérifier les permissions
-                if guild.me.guild_permissions.manage_guild:
-                    # Récupérer les invitations
-                    guild_invites = await guild.invites()
-                    self.invites[guild.id] = {invite.code: invite for invite in guild_invites}
-            except discord.Forbidden:
-                print(f"Impossible de récupérer les invitations pour le serveur {guild.name} (ID: {guild.id})")
-            except Exception as e:
-                print(f"Erreur lors de la récupération des invitations pour {guild.name}: {e}")
+        print(f"Invitations chargées pour {stats['loaded']}/{stats['total']} serveurs en {stats['duration']:.1f} s"
+              f" ({skipped} déjà à jour, {stats['failed']} sans accès)")
     
     @commands.Cog.listener()
     async def on_ready(self):
-        """Charge les invitations au démarrage"""
-        await self.fetch_invites()
-        print(f"Invitations chargées pour {len(self.invites)} serveurs")
+        """Charge les invitations au démarrage et après chaque reconnexion"""
+        # on_ready est rappelé à chaque reconnexion: ne pas lancer deux chargements
+        if self.warmup_task and not self.warmup_task.done():
+            return
+        self.warmup_task = asyncio.create_task(self.fetch_invites())
     
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
         """Charge les invitations pour un nouveau serveur"""
         try:
-            if guild.me.guild_permissions.manage_guild:
-                guild_invites = await guild.invites()
-                self.invites[guild.id] = {invite.code: invite for invite in guild_invites}
+            if await self.fetch_guild_invites(guild):
                 print(f"Invitations chargées pour le nouveau serveur {guild.name}")
         except Exception as e:
             print(f"Erreur lors du chargement des invitations pour {guild.name}: {e}")
@@ -89,9 +113,9 @@ class InviteTracker(commands.Cog):
     async def on_invite_create(self, invite):
         """Met à jour la cache lorsqu'une invitation est créée"""
         try:
-            if invite.guild.id not in self.invites:
-                self.invites[invite.guild.id] = {}
-            self.invites[invite.guild.id][invite.code] = invite
+            # Sans état initial du serveur, la prochaine récupération servira de référence
+            if invite.guild.id in self.invites:
+                self.invites[invite.guild.id].set(invite_entry(invite))
             print(f"Nouvelle invitation créée: {invite.code} par {invite.inviter.name}")
         except Exception as e:
             print(f"Erreur lors de la mise à jour d'une nouvelle invitation: {e}")
@@ -100,8 +124,7 @@ class InviteTracker(commands.Cog):
     async def on_invite_delete(self, invite):
         """Met à jour la cache lorsqu'une invitation est supprimée"""
         try:
-            if invite.guild.id in self.invites and invite.code in self.invites[invite.guild.id]:
-                del self.invites[invite.guild.id][invite.code]
+            if invite.guild.id in self.invites and self.invites[invite.guild.id].remove(invite.code):
                 print(f"Invitation supprimée: {invite.code}")
         except Exception as e:
             print(f"Erreur lors de la suppression d'une invitation: {e}")
@@ -115,64 +138,65 @@ class InviteTracker(commands.Cog):
         if member.bot:
             return
         
+        # Vérifier les permissions
+        if not guild.me.guild_permissions.manage_guild:
+            return
+        
+        self.joins.add(guild.id, member)
+    
+    async def resolve_joins(self, guild_id, members):
+        """Attribue un lot d'arrivées à partir d'une seule récupération des invitations"""
+        guild = members[0].guild
+        
+        # Récupérer les anciennes et les nouvelles invitations
+        old_invites = self.invites.get(guild_id)
+        new_invites = {invite.code: invite for invite in await guild.invites()}
+        
+        # Utilisations restées du lot précédent, si ce lot a commencé moins d'une fenêtre après lui
+        carry, expires = self.unclaimed.pop(guild_id, (None, 0.0))
+        if time.monotonic() - self.joins.window > expires:
+            carry = None
+        
+        # Répartir les nouvelles utilisations entre les membres du lot
+        joins, credits, leftover = match_joins(members, old_invites, new_invites, carry)
+        
+        # Mettre à jour le cache
+        self.store_invites(guild_id, old_invites.update(new_invites) if old_invites is not None
+                           else InviteSnapshot.from_invites(new_invites.values()))
+        if leftover:
+            self.unclaimed[guild_id] = (leftover, time.monotonic() + self.joins.window)
+        
+        # Lot partagé entre plusieurs inviteurs: seuls les nombres d'arrivées par inviteur sont sûrs
+        for inviter_id, count in credits.items():
+            await self.db.credit_invites(guild_id, inviter_id, count)
+        for member, invite in joins:
+            await self.record_join(member, invite, uncertain=bool(credits))
+    
+    async def record_join(self, member, invite, uncertain=False):
+        """Enregistre l'arrivée d'un membre et annonce son inviteur (sans inviteur si `uncertain`)"""
+        guild = member.guild
+        
         try:
-            # Vérifier les permissions
-            if not guild.me.guild_permissions.manage_guild:
+            if uncertain:
+                # Le retour du membre reste détecté, sans lien membre/inviteur inventé
+                tracking = await self.fakes.on_join(guild.id, 0, member.id, "", member.joined_at)
+                self.graph.join(guild.id, member.id, None, counted=not tracking["fake"])
+                print(f"{member.name} a rejoint pendant une vague d'arrivées, inviteur incertain.")
                 return
-                
-            # Récupérer les anciennes invitations
-            old_invites = self.invites.get(guild.id, {})
-            
-            # Récupérer les nouvelles invitations
-            new_invites = await guild.invites()
-            new_invites_dict = {invite.code: invite for invite in new_invites}
-            
-            # Mettre à jour le cache
-            self.invites[guild.id] = new_invites_dict
-            
-            # Trouver l'invitation utilisée
-            inviter = None
-            invite_code = None
-            
-            for invite_code, invite in new_invites_dict.items():
-                if invite_code in old_invites:
-                    old_invite = old_invites[invite_code]
-                    if invite.uses > old_invite.uses:
-                        inviter = invite.inviter
-                        invite_code = invite.code
-                        break
-            
-            # Si l'invitation n'a pas été trouvée (peut arriver si c'est une invitation temporaire ou nouvelle)
-            if not inviter and len(new_invites) > 0:
-                # Chercher une nouvelle invitation avec au moins 1 utilisation
-                for invite in new_invites:
-                    if invite.uses == 1 and invite.created_at.timestamp() > (datetime.datetime.now() - datetime.timedelta(minutes=5)).timestamp():
-                        inviter = invite.inviter
-                        invite_code = invite.code
-                        break
             
             # Si nous avons trouvé l'invitation
-            if inviter and invite_code:
-                # Enregistrer l'invitation dans la base de données
-                self.cursor.execute('''
-                INSERT INTO invite_tracking (server_id, inviter_id, invited_id, invite_code)
-                VALUES (?, ?, ?, ?)
-                ''', (guild.id, inviter.id, member.id, invite_code))
+            inviter = await self.get_inviter(guild, invite.inviter_id) if invite else None
+            if inviter:
+                invite_code = invite.code
                 
-                # Mettre à jour les statistiques de l'inviteur
-                self.cursor.execute('''
-                INSERT INTO invite_stats (user_id, server_id, invites_regular)
-                VALUES (?, ?, 1)
-                ON CONFLICT(user_id, server_id) DO UPDATE SET
-                invites_regular = invites_regular + 1
-                ''', (inviter.id, guild.id))
-                
-                self.conn.commit()
+                # Enregistrer l'invitation et mettre à jour les statistiques de l'inviteur
+                tracking = await self.fakes.on_join(guild.id, inviter.id, member.id, invite_code, member.joined_at)
+                self.graph.join(guild.id, member.id, inviter.id, counted=not tracking["fake"])
                 
                 print(f"{member.name} a rejoint via l'invitation de {inviter.name} (code: {invite_code})")
                 
                 # Envoyer un message de bienvenue
-                welcome_channel_id = self.get_welcome_channel_id(guild.id)
+                welcome_channel_id = await self.get_welcome_channel_id(guild.id)
                 if welcome_channel_id:
                     welcome_channel = guild.get_channel(welcome_channel_id)
                     if welcome_channel:
@@ -181,7 +205,7 @@ class InviteTracker(commands.Cog):
                         message += f"Invité par : {inviter.mention}\n"
                         
                         # Récupérer les stats d'invitation de l'inviteur
-                        invite_count = self.get_invite_count(inviter.id, guild.id)
+                        invite_count = await self.get_invite_count(inviter.id, guild.id)
                         message += f"C'est sa {invite_count}e invitation !"
                         
                         await welcome_channel.send(message)
@@ -190,7 +214,8 @@ class InviteTracker(commands.Cog):
                 await self.send_to_mod_server(
                     member=member,
                     inviter=inviter,
-                    invite_code=invite_code
+                    invite_code=invite_code,
+                    fake=tracking["fake"]
                 )
             else:
                 print(f"{member.name} a rejoint, mais l'invitation n'a pas pu être déterminée.")
@@ -208,65 +233,51 @@ class InviteTracker(commands.Cog):
             return
         
         try:
-            # Trouver qui l'a invité
-            self.cursor.execute('''
-            SELECT inviter_id FROM invite_tracking
-            WHERE server_id = ? AND invited_id = ?
-            ORDER BY join_time DESC LIMIT 1
-            ''', (guild.id, member.id))
-            
-            row = self.cursor.fetchone()
-            if row:
-                inviter_id = row[0]
-                
-                # Mettre à jour les statistiques de l'inviteur
-                self.cursor.execute('''
-                UPDATE invite_stats
-                SET invites_left = invites_left + 1
-                WHERE user_id = ? AND server_id = ?
-                ''', (inviter_id, guild.id))
-                
-                self.conn.commit()
-                
-                print(f"{member.name} a quitté, réduisant les invitations actives de l'utilisateur {inviter_id}")
+            # Trouver qui l'a invité et mettre à jour ses statistiques
+            left = await self.fakes.on_leave(guild.id, member.id)
+            if left:
+                self.graph.leave(guild.id, member.id)
+                if not left["inviter_id"]:
+                    print(f"{member.name} a quitté, inviteur incertain")
+                elif left["fake"]:
+                    print(f"{member.name} a quitté, invitation fausse de l'utilisateur {left['inviter_id']} ({describe_fake(left['fake'])})")
+                else:
+                    print(f"{member.name} a quitté, réduisant les invitations actives de l'utilisateur {left['inviter_id']}")
         
         except Exception as e:
             print(f"Erreur lors de la mise à jour des statistiques de départ pour {member.name}: {e}")
     
-    def get_welcome_channel_id(self, guild_id):
-        """Récupère l'ID du canal de bienvenue à partir de la configuration"""
+    async def get_inviter(self, guild, inviter_id):
+        """Retrouve l'auteur d'une invitation, même s'il a quitté le serveur"""
+        if not inviter_id:
+            return None
+        inviter = guild.get_member(inviter_id) or self.bot.get_user(inviter_id)
+        if inviter is None:
+            try:
+                inviter = await self.bot.fetch_user(inviter_id)
+            except discord.HTTPException:
+                return None
+        return inviter
+    
+    async def get_welcome_channel_id(self, guild_id):
+        """Récupère l'ID du canal de bienvenue à partir de la configuration (servie par le cache)"""
         try:
-            self.cursor.execute('''
-            SELECT config_json FROM server_configs
-            WHERE server_id = ?
-            ''', (guild_id,))
-            
-            row = self.cursor.fetchone()
-            if row:
-                config = json.loads(row[0])
-                return int(config.get('welcome_channel_id', 0))
+            channel_id = await self.db.get_server_config_value(guild_id, 'welcome_channel_id')
+            if channel_id:
+                return int(channel_id)
         except:
             pass
         return None
     
-    def get_invite_count(self, user_id, guild_id):
+    async def get_invite_count(self, user_id, guild_id):
         """Récupère le nombre total d'invitations d'un utilisateur"""
         try:
-            self.cursor.execute('''
-            SELECT invites_regular, invites_bonus, invites_fake, invites_left
-            FROM invite_stats
-            WHERE user_id = ? AND server_id = ?
-            ''', (user_id, guild_id))
-            
-            row = self.cursor.fetchone()
-            if row:
-                regular, bonus, fake, left = row
-                return (regular + bonus) - (fake + left)
-            return 0
+            stats = await self.db.get_invite_stats(user_id, guild_id)
+            return stats["total"] if stats else 0
         except:
             return 0
     
-    async def send_to_mod_server(self, member, inviter, invite_code):
+    async def send_to_mod_server(self, member, inviter, invite_code, fake=0):
         """Envoie un rapport d'invitation au serveur de modération"""
         try:
             # Récupérer le serveur de modération
@@ -294,18 +305,22 @@ class InviteTracker(commands.Cog):
             embed.add_field(name="Code d'invitation", value=invite_code, inline=True)
             
             # Compte d'invitations de l'inviteur
-            invite_count = self.get_invite_count(inviter.id, member.guild.id)
+            invite_count = await self.get_invite_count(inviter.id, member.guild.id)
             embed.add_field(name="Total d'invitations", value=invite_count, inline=True)
             
             # Âge du compte
-            account_age = (datetime.datetime.now() - member.created_at).days
-            embed.add_field(name="Âge du compte", value=f"{account_age} jours", inline=True)
+            embed.add_field(name="Âge du compte", value=f"{account_age(member.id).days} jours", inline=True)
             
-            # Vérifier si le compte est récent (moins de 7 jours)
-            if account_age < 7:
-                embed.add_field(name="⚠️ Attention", value="Compte récemment créé", inline=False)
+            # Invitation fausse (compte récent, membre déjà venu)
+            if fake:
+                embed.add_field(name="⚠️ Invitation fausse", value=describe_fake(fake).capitalize(), inline=False)
             
-            await mod_channel.send(embed=embed)
+            # Passer par la file des logs (prioritaire, envoyée sans attendre le prochain lot)
+            logging_cog = self.bot.get_cog("Logging")
+            if logging_cog is not None:
+                await logging_cog.log_to_mod_server("moderation", embed)
+            else:
+                await self.bot.log_webhooks.send(mod_channel, embed=embed)
             
         except Exception as e:
             print(f"Erreur lors de l'envoi du rapport d'invitation: {e}")
@@ -316,16 +331,14 @@ class InviteTracker(commands.Cog):
         member = member or ctx.author
         
         try:
-            self.cursor.execute('''
-            SELECT invites_regular, invites_bonus, invites_fake, invites_left
-            FROM invite_stats
-            WHERE user_id = ? AND server_id = ?
-            ''', (member.id, ctx.guild.id))
-            
-            row = self.cursor.fetchone()
-            if row:
-                regular, bonus, fake, left = row
-                total = (regular + bonus) - (fake + left)
+            stats = await self.db.get_invite_stats(member.id, ctx.guild.id)
+            if stats:
+                regular = stats["invites_regular"]
+                bonus = stats["invites_bonus"]
+                fake = stats["invites_fake"]
+                left = stats["invites_left"]
+                total = stats["total"]
+                rank = await self.db.get_invite_rank(member.id, ctx.guild.id)
                 
                 embed = discord.Embed(
                     title=f"Statistiques d'invitation de {member.display_name}",
@@ -334,7 +347,8 @@ class InviteTracker(commands.Cog):
                 )
                 
                 embed.set_thumbnail(url=member.display_avatar.url)
-                embed.add_field(name="Total", value=total, inline=False)
+                embed.add_field(name="Total", value=total, inline=True)
+                embed.add_field(name="Classement", value=f"#{rank['rank']}" if rank else "-", inline=True)
                 embed.add_field(name="Régulières", value=regular, inline=True)
                 embed.add_field(name="Bonus", value=bonus, inline=True)
                 embed.add_field(name="Parties", value=left, inline=True)
@@ -355,32 +369,13 @@ class InviteTracker(commands.Cog):
             return await ctx.send("Le nombre d'invitations doit être supérieur à 0.")
         
         try:
-            # Vérifier si l'utilisateur a déjà des stats
-            self.cursor.execute('''
-            SELECT COUNT(*) FROM invite_stats
-            WHERE user_id = ? AND server_id = ?
-            ''', (member.id, ctx.guild.id))
-            
-            if self.cursor.fetchone()[0] == 0:
-                # Créer une nouvelle entrée
-                self.cursor.execute('''
-                INSERT INTO invite_stats (user_id, server_id, invites_bonus)
-                VALUES (?, ?, ?)
-                ''', (member.id, ctx.guild.id, amount))
-            else:
-                # Mettre à jour l'entrée existante
-                self.cursor.execute('''
-                UPDATE invite_stats
-                SET invites_bonus = invites_bonus + ?
-                WHERE user_id = ? AND server_id = ?
-                ''', (amount, member.id, ctx.guild.id))
-            
-            self.conn.commit()
+            # Créer ou mettre à jour l'entrée de l'utilisateur
+            await self.db.add_bonus_invites(member.id, ctx.guild.id, amount)
             
             await ctx.send(f"✅ {amount} invitation(s) bonus ont été ajoutées à {member.mention}.")
             
             # Récupérer le nouveau total
-            total = self.get_invite_count(member.id, ctx.guild.id)
+            total = await self.get_invite_count(member.id, ctx.guild.id)
             
             # Envoyer un message privé à l'utilisateur
             try:
@@ -410,37 +405,12 @@ class InviteTracker(commands.Cog):
             return await ctx.send("Le nombre d'invitations doit être supérieur à 0.")
         
         try:
-            # Vérifier si l'utilisateur a déjà des stats
-            self.cursor.execute('''
-            SELECT invites_regular, invites_bonus FROM invite_stats
-            WHERE user_id = ? AND server_id = ?
-            ''', (member.id, ctx.guild.id))
-            
-            row = self.cursor.fetchone()
-            if row:
-                regular, bonus = row
-                
-                # Si les invitations bonus sont suffisantes
-                if bonus >= amount:
-                    self.cursor.execute('''
-                    UPDATE invite_stats
-                    SET invites_bonus = invites_bonus - ?
-                    WHERE user_id = ? AND server_id = ?
-                    ''', (amount, member.id, ctx.guild.id))
-                # Sinon, augmenter les fausses invitations
-                else:
-                    self.cursor.execute('''
-                    UPDATE invite_stats
-                    SET invites_fake = invites_fake + ?
-                    WHERE user_id = ? AND server_id = ?
-                    ''', (amount, member.id, ctx.guild.id))
-                
-                self.conn.commit()
-                
+            # Retirer sur les bonus s'ils suffisent, sinon augmenter les fausses invitations
+            if await self.db.remove_invites(member.id, ctx.guild.id, amount):
                 await ctx.send(f"✅ {amount} invitation(s) ont été retirées à {member.mention}.")
                 
                 # Récupérer le nouveau total
-                total = self.get_invite_count(member.id, ctx.guild.id)
+                total = await self.get_invite_count(member.id, ctx.guild.id)
                 
                 # Envoyer un message privé à l'utilisateur
                 try:
@@ -465,6 +435,21 @@ class InviteTracker(commands.Cog):
         except Exception as e:
             await ctx.send(f"Erreur lors du retrait des invitations: {e}")
     
+    @commands.hybrid_command(name="recompute_invites", description="Recalcule les invitations fausses de tout l'historique du serveur")
+    @commands.has_permissions(administrator=True)
+    async def recompute_invites(self, ctx):
+        """Réapplique la détection des invitations fausses à tout l'historique du serveur"""
+        try:
+            result = await self.fakes.recompute(ctx.guild.id)
+            # Les invitations reclassées changent les tailles des sous-arbres
+            self.graph.invalidate(ctx.guild.id)
+            await ctx.send(
+                f"✅ Invitations recalculées: {result['changed']} arrivée(s) reclassée(s), "
+                f"{result['inviters']} inviteur(s) mis à jour."
+            )
+        except Exception as e:
+            await ctx.send(f"Erreur lors du recalcul des invitations: {e}")
+    
     @commands.hybrid_command(name="invitestop", description="Affiche le classement des membres ayant le plus d'invitations")
     async def invitestop(self, ctx, count: int = 10):
         """Affiche le classement des membres par nombre d'invitations"""
@@ -472,36 +457,22 @@ class InviteTracker(commands.Cog):
             return await ctx.send("Le nombre doit être entre 1 et 25.")
         
         try:
-            self.cursor.execute('''
-            SELECT user_id, invites_regular, invites_bonus, invites_fake, invites_left
-            FROM invite_stats
-            WHERE server_id = ?
-            ''', (ctx.guild.id,))
-            
-            rows = self.cursor.fetchall()
-            
-            # Calculer le total pour chaque membre
-            invite_totals = []
-            for user_id, regular, bonus, fake, left in rows:
-                total = (regular + bonus) - (fake + left)
-                invite_totals.append((user_id, total))
-            
-            # Trier par nombre total d'invitations
-            invite_totals.sort(key=lambda x: x[1], reverse=True)
+            # Classement calculé par SQLite à partir de l'index (server_id, total DESC)
+            rows = await self.db.get_invite_leaderboard(ctx.guild.id, count)
             
             # Créer l'embed
             embed = discord.Embed(
-                title=f"Top {min(count, len(invite_totals))} des inviteurs",
+                title=f"Top {len(rows)} des inviteurs",
                 description=f"Classement des membres par invitations sur {ctx.guild.name}",
                 color=discord.Color.gold(),
                 timestamp=datetime.datetime.now()
             )
             
             # Ajouter les membres au classement
-            for i, (user_id, total) in enumerate(invite_totals[:count], 1):
-                member = ctx.guild.get_member(user_id)
-                member_name = member.display_name if member else f"Utilisateur {user_id}"
-                embed.add_field(name=f"{i}. {member_name}", value=f"{total} invitation(s)", inline=False)
+            for i, row in enumerate(rows, 1):
+                member = ctx.guild.get_member(row["user_id"])
+                member_name = member.display_name if member else f"Utilisateur {row['user_id']}"
+                embed.add_field(name=f"{i}. {member_name}", value=f"{row['total']} invitation(s)", inline=False)
             
             await ctx.send(embed=embed)
         
@@ -512,15 +483,12 @@ class InviteTracker(commands.Cog):
     async def inviter(self, ctx, member: discord.Member):
         """Affiche qui a invité un membre spécifique"""
         try:
-            self.cursor.execute('''
-            SELECT inviter_id, invite_code, join_time FROM invite_tracking
-            WHERE server_id = ? AND invited_id = ?
-            ORDER BY join_time DESC LIMIT 1
-            ''', (ctx.guild.id, member.id))
-            
-            row = self.cursor.fetchone()
-            if row:
-                inviter_id, invite_code, join_time = row
+            tracking = await self.db.get_invite_tracking(ctx.guild.id, member.id)
+            # inviter_id à 0: arrivée enregistrée sans inviteur certain
+            if tracking and tracking["inviter_id"]:
+                inviter_id = tracking["inviter_id"]
+                invite_code = tracking["invite_code"]
+                join_time = tracking["join_time"]
                 inviter = ctx.guild.get_member(inviter_id)
                 
                 embed = discord.Embed(
@@ -545,10 +513,43 @@ class InviteTracker(commands.Cog):
         
         except Exception as e:
             await ctx.send(f"Erreur lors de la récupération de l'inviteur: {e}")
-    
-    def cog_unload(self):
-        """Ferme la connexion à la base de données lors du déchargement du cog"""
-        self.conn.close()
+
+    @commands.hybrid_command(name="invitetree", description="Affiche les membres amenés par un utilisateur, directement et indirectement")
+    async def invitetree(self, ctx, member: Optional[discord.Member] = None):
+        """Affiche l'arbre d'invitations d'un membre"""
+        member = member or ctx.author
+        
+        try:
+            tree = await self.graph.get(ctx.guild.id)
+            
+            def name(user_id):
+                user = ctx.guild.get_member(user_id)
+                return user.display_name if user else f"Utilisateur {user_id}"
+            
+            embed = discord.Embed(
+                title=f"Arbre d'invitations de {member.display_name}",
+                color=member.color,
+                timestamp=datetime.datetime.now()
+            )
+            
+            embed.set_thumbnail(url=member.display_avatar.url)
+            embed.add_field(name="Invités directs", value=tree.direct(member.id), inline=True)
+            embed.add_field(name="Réseau total", value=tree.network(member.id), inline=True)
+            
+            chain = tree.chain(member.id)
+            if chain:
+                embed.add_field(name="Invité par", value=" ← ".join(name(user_id) for user_id in chain), inline=False)
+            
+            top = tree.top_invited(member.id)
+            if top:
+                lines = [f"{name(user_id)}: {size} membre(s)" for user_id, size in top]
+                embed.add_field(name="Principaux invités (avec leur réseau)", value="\n".join(lines), inline=False)
+            
+            embed.set_footer(text="Membres présents, invitations fausses exclues")
+            await ctx.send(embed=embed)
+        
+        except Exception as e:
+            await ctx.send(f"Erreur lors de la récupération de l'arbre d'invitations: {e}")
 
 async def setup(bot):
     await bot.add_cog(InviteTracker(bot))
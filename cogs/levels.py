@@ -0,0 +1,132 @@
+# cogs/levels.py
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+from typing import Optional
+
+from config import XP_COOLDOWN, XP_MIN, XP_MAX, XP_FLUSH_INTERVAL
+from utils.xp_engine import XPEngine, xp_for_next_level, level_from_total_xp
+
+class Levels(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.engine = XPEngine(bot.db, cooldown=XP_COOLDOWN, xp_min=XP_MIN, xp_max=XP_MAX)
+
+    async def cog_load(self):
+        self.flush_loop.change_interval(seconds=XP_FLUSH_INTERVAL)
+        self.flush_loop.start()
+        # Après un !restore, l'XP en mémoire ne doit pas écraser la base restaurée
+        self.bot.db.add_restore_hook(self.engine.reset)
+
+    async def cog_unload(self):
+        self.bot.db.remove_restore_hook(self.engine.reset)
+        self.flush_loop.cancel()
+        # Ne pas perdre l'XP accumulée depuis le dernier flush
+        self.engine.flush()
+
+    @tasks.loop(seconds=30)
+    async def flush_loop(self):
+        try:
+            self.engine.flush()
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement de l'XP: {e}")
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+
+        try:
+            new_level = await self.engine.process(message.guild.id, message.author.id)
+        except Exception as e:
+            print(f"Erreur lors de l'attribution d'XP à {message.author.name}: {e}")
+            return
+
+        # L'annonce part tout de suite, l'écriture en base attend le prochain flush
+        if new_level is not None:
+            try:
+                await message.channel.send(f"🎉 Bravo {message.author.mention}, tu passes au niveau **{new_level}** !")
+            except discord.HTTPException:
+                pass
+
+    @commands.hybrid_command(name="level", description="Afficher le niveau d'un membre")
+    @app_commands.describe(member="Le membre dont vous voulez voir le niveau (vous par défaut)")
+    async def level(self, ctx, member: Optional[discord.Member] = None):
+        member = member or ctx.author
+
+        total_xp = self.engine.get(ctx.guild.id, member.id)
+        if total_xp is None:
+            info = await self.bot.db.get_level_info(member.id, ctx.guild.id)
+            total_xp = info["total_xp"]
+        level, xp = level_from_total_xp(total_xp)
+
+        required = xp_for_next_level(level)
+        filled = int(10 * xp / required)
+
+        embed = discord.Embed(
+            title=f"Niveau de {member.display_name}",
+            color=discord.Color.blurple()
+        )
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.add_field(name="Niveau", value=str(level), inline=True)
+        embed.add_field(name="XP", value=f"{xp}/{required} ({total_xp} au total)", inline=True)
+        embed.add_field(name="Progression", value="▰" * filled + "▱" * (10 - filled), inline=False)
+
+        await ctx.send(embed=embed)
+
+    def format_ranking(self, guild, entries, highlight=None):
+        """Lignes de classement à partir de [(rang, user_id, xp totale), ...]"""
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        lines = []
+        for position, user_id, total_xp in entries:
+            member = guild.get_member(user_id)
+            name = member.display_name if member else f"Utilisateur {user_id}"
+            if user_id == highlight:
+                name = f"**{name}**"
+            level = level_from_total_xp(total_xp)[0]
+            lines.append(f"{medals.get(position, f'**{position}.**')} {name} - niveau {level} ({total_xp} XP)")
+        return lines
+
+    @commands.hybrid_command(name="rank", description="Afficher le rang d'un membre et ses voisins au classement")
+    @app_commands.describe(member="Le membre dont vous voulez voir le rang (vous par défaut)")
+    async def rank(self, ctx, member: Optional[discord.Member] = None):
+        member = member or ctx.author
+        ranking = await self.engine.ranking(ctx.guild.id)
+
+        position = ranking.rank(member.id)
+        if position is None:
+            return await ctx.send(f"❌ {member.display_name} n'a pas encore gagné d'XP sur ce serveur.")
+
+        embed = discord.Embed(
+            title=f"Rang de {member.display_name}",
+            description=f"**#{position}** sur {len(ranking)} membre(s) classé(s)",
+            color=discord.Color.blurple()
+        )
+        embed.add_field(
+            name="Autour de ce rang",
+            value="\n".join(self.format_ranking(ctx.guild, ranking.neighbors(member.id, 2), highlight=member.id)),
+            inline=False
+        )
+
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="leaderboard", description="Afficher le classement des niveaux du serveur")
+    async def leaderboard(self, ctx):
+        # Classement en mémoire, tenu à jour à chaque gain d'XP
+        ranking = await self.engine.ranking(ctx.guild.id)
+
+        if not len(ranking):
+            return await ctx.send("❌ Personne n'a encore gagné d'XP sur ce serveur.")
+
+        lines = self.format_ranking(ctx.guild, ranking.top(10))
+
+        embed = discord.Embed(
+            title=f"Classement de {ctx.guild.name}",
+            description="\n".join(lines),
+            color=discord.Color.gold()
+        )
+
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Levels(bot))
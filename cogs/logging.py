@@ -2,14 +2,53 @@
 import discord
 from discord.ext import commands
 import datetime
-from config import MOD_LOGS_CHANNEL_ID, MODERATION_SERVER_ID
+from config import MOD_LOGS_CHANNEL_ID, MODERATION_SERVER_ID, LOG_FLUSH_INTERVAL, LOG_QUEUE_SIZE, LOG_SAMPLE_EVERY
+from utils.log_sink import LogSink
 
 class Logging(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # File bornée et prioritaire, envoyée par messages de 10 embeds au plus
+        self.sink = LogSink(
+            self.send_embeds,
+            interval=LOG_FLUSH_INTERVAL,
+            max_size=LOG_QUEUE_SIZE,
+            sample_every=LOG_SAMPLE_EVERY,
+            summarize=self.dropped_logs_embed
+        )
+    
+    async def cog_load(self):
+        self.sink.start()
+    
+    async def cog_unload(self):
+        await self.sink.close()
+    
+    def get_mod_channel(self):
+        """Canal des logs du serveur de modération, ou None"""
+        mod_server = self.bot.get_guild(MODERATION_SERVER_ID)
+        return mod_server.get_channel(MOD_LOGS_CHANNEL_ID) if mod_server else None
+    
+    async def send_embeds(self, embeds):
+        """Envoie un lot de logs en un seul message"""
+        mod_channel = self.get_mod_channel()
+        if not mod_channel:
+            raise RuntimeError("Canal de logs introuvable sur le serveur de modération")
+        await self.bot.log_webhooks.send(mod_channel, embeds=embeds)
+    
+    def dropped_logs_embed(self, counts):
+        """Signale les logs ignorés quand la file était pleine"""
+        embed = discord.Embed(
+            title="⚠️ Logs ignorés",
+            description=f"{sum(counts.values())} log(s) ignoré(s): trop d'événements en attente d'envoi.",
+            color=discord.Color.gold(),
+            timestamp=datetime.datetime.now()
+        )
+        for log_type, count in sorted(counts.items()):
+            embed.add_field(name=log_type, value=count, inline=True)
+        return embed
         
     async def log_to_mod_server(self, log_type, embed):
-        """Envoie un log au serveur de modération"""
+        """Envoie un log au serveur de modération (les actions de modération partent sans attendre)"""
         try:
             # Récupérer le serveur de modération
             mod_server = self.bot.get_guild(MODERATION_SERVER_ID)
@@ -21,8 +60,8 @@ class Logging(commands.Cog):
             if not mod_channel:
                 return False, "Canal de logs introuvable sur le serveur de modération"
 
-            # Ajouter un identifiant pour le type de log
-            if not embed.title.startswith(("📝", "⚠️", "🔨", "🔄", "🚫")):
+            # Ajouter un identifiant pour le type de log (sauf titre déjà marqué, comme les rapports de modération)
+            if embed.title and embed.title[0].isalnum():
                 if log_type == "info":
                     embed.title = f"📝 {embed.title}"
                 elif log_type == "warning":
@@ -34,8 +73,9 @@ class Logging(commands.Cog):
                 elif log_type == "deletion":
                     embed.title = f"🚫 {embed.title}"
             
-            # Envoyer l'embed
-            await mod_channel.send(embed=embed)
+            # Mettre l'embed en attente du prochain lot (sans attendre l'envoi)
+            if not self.sink.put(embed, log_type):
+                return False, "Log ignoré: file d'attente pleine"
             return True, "Log envoyé avec succès"
             
         except Exception as e:
@@ -355,5 +395,39 @@ class Logging(commands.Cog):
             # Envoyer au serveur de modération
             await self.log_to_mod_server("info", embed)
 
+    @commands.hybrid_command(name="logstats", description="Affiche les statistiques d'envoi des logs")
+    @commands.has_permissions(administrator=True)
+    async def logstats(self, ctx):
+        stats = self.sink.stats()
+        embed = discord.Embed(
+            title="Envoi des logs",
+            color=discord.Color.blue(),
+            timestamp=datetime.datetime.now()
+        )
+        embed.add_field(name="Logs", value=stats["events"], inline=True)
+        embed.add_field(name="Messages envoyés", value=stats["api_calls"], inline=True)
+        embed.add_field(name="Logs par message", value=f"{stats['ratio']:.1f}", inline=True)
+        embed.add_field(name="En attente", value=f"{stats['depth']} (max {stats['max_depth']})", inline=True)
+        embed.add_field(name="Urgents", value=stats["urgent"], inline=True)
+        embed.add_field(name="Échecs", value=stats["failed"], inline=True)
+        ignored = {log_type: stats["dropped"].get(log_type, 0) + stats["sampled"].get(log_type, 0)
+                   for log_type in {**stats["dropped"], **stats["sampled"]}}
+        if ignored:
+            embed.add_field(
+                name="Ignorés",
+                value="\n".join(f"{log_type}: {count}" for log_type, count in sorted(ignored.items())),
+                inline=False
+            )
+        webhooks = self.bot.log_webhooks
+        if webhooks.size:
+            pool = webhooks.stats()
+            embed.add_field(
+                name="Webhooks",
+                value=f"{pool['webhooks']} actif(s), {pool['sent_webhook']} envoi(s), "
+                      f"{pool['sent_bot']} par le bot, {pool['fallbacks']} repli(s)",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(Logging(bot))
@@ -5,53 +5,19 @@ from discord import app_commands
 import datetime
 import asyncio
 from typing import Optional
-import sqlite3
 import sys
 import traceback
 
 from config import MOD_LOGS_CHANNEL_ID, MODERATION_SERVER_ID, MOD_ROLE_ID, ADMIN_ROLE_ID, WARN_THRESHOLD, MUTE_DURATION
 from utils.embeds import create_mod_action_embed, create_report_embed
 from utils.permissions import is_mod_or_admin
+from utils.pagination import KeysetPaginator
 
 class Moderation(commands.Cog):
     # Au lieu d'ouvrir et fermer la connexion dans chaque commande
     def __init__(self, bot):
         self.bot = bot
-        from utils.db_handler import DatabaseHandler
-        self.db_handler = DatabaseHandler()  # Instance unique
-
-    def cog_unload(self):
-        """Ferme la connexion à la base de données lors du déchargement du cog"""
-        if hasattr(self, 'db_handler'):
-            self.db_handler.close()
-
-    def setup_database(self):
-        # Créer la table pour les avertissements
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS warnings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Créer la table pour les actions de modération
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS mod_actions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            action_type TEXT NOT NULL,
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            duration INTEGER
-        )
-        ''')
-        self.conn.commit()
+        self.db = bot.db  # Gestionnaire de connexions partagé par tout le bot
 
     async def send_to_mod_server(self, action_type, user, moderator, reason, duration=None):
         """Envoie un rapport au serveur de modération"""
@@ -75,8 +41,11 @@ class Moderation(commands.Cog):
                 duration=duration
             )
             
-            # Envoyer l'embed
-            await mod_channel.send(embed=embed)
+            # Passer par la file des logs (prioritaire, envoyée sans attendre le prochain lot)
+            logging_cog = self.bot.get_cog("Logging")
+            if logging_cog is not None:
+                return await logging_cog.log_to_mod_server("moderation", embed)
+            await self.bot.log_webhooks.send(mod_channel, embed=embed)
             return True, "Rapport envoyé avec succès"
             
         except Exception as e:
@@ -95,26 +64,12 @@ class Moderation(commands.Cog):
         if is_mod_or_admin(member):
             return await ctx.send("Vous ne pouvez pas avertir un modérateur ou administrateur.")
         
-        # Enregistrer l'avertissement dans la base de données
-        self.cursor.execute('''
-        INSERT INTO warnings (user_id, server_id, moderator_id, reason)
-        VALUES (?, ?, ?, ?)
-        ''', (member.id, ctx.guild.id, ctx.author.id, reason))
-        
-        self.cursor.execute('''
-        INSERT INTO mod_actions (action_type, user_id, server_id, moderator_id, reason)
-        VALUES (?, ?, ?, ?, ?)
-        ''', ("warn", member.id, ctx.guild.id, ctx.author.id, reason))
+        # Enregistrer l'avertissement dans la base de données (écritures en file, validées par lot)
+        self.db.add_warning(member.id, ctx.guild.id, ctx.author.id, reason)
+        self.db.add_mod_action("warn", member.id, ctx.guild.id, ctx.author.id, reason)
         
-        self.conn.commit()
-        
-        # Obtenir le nombre total d'avertissements
-        self.cursor.execute('''
-        SELECT COUNT(*) FROM warnings 
-        WHERE user_id = ? AND server_id = ?
-        ''', (member.id, ctx.guild.id))
-        
-        warning_count = self.cursor.fetchone()[0]
+        # Obtenir le nombre total d'avertissements (la lecture vide d'abord la file)
+        warning_count = await self.db.get_warning_count(member.id, ctx.guild.id)
         
         # Envoyer un message dans le canal actuel
         embed = create_mod_action_embed(
@@ -167,11 +122,7 @@ class Moderation(commands.Cog):
             return await ctx.send("Vous ne pouvez pas expulser un modérateur ou administrateur.")
         
         # Enregistrer l'action dans la base de données
-        self.cursor.execute('''
-        INSERT INTO mod_actions (action_type, user_id, server_id, moderator_id, reason)
-        VALUES (?, ?, ?, ?, ?)
-        ''', ("kick", member.id, ctx.guild.id, ctx.author.id, reason))
-        self.conn.commit()
+        self.db.add_mod_action("kick", member.id, ctx.guild.id, ctx.author.id, reason)
         
         # Créer l'embed pour l'expulsion
         embed = create_mod_action_embed(
@@ -222,11 +173,7 @@ class Moderation(commands.Cog):
         delete_days = max(0, min(7, delete_days))
         
         # Enregistrer l'action dans la base de données
-        self.cursor.execute('''
-        INSERT INTO mod_actions (action_type, user_id, server_id, moderator_id, reason)
-        VALUES (?, ?, ?, ?, ?)
-        ''', ("ban", member.id, ctx.guild.id, ctx.author.id, reason))
-        self.conn.commit()
+        self.db.add_mod_action("ban", member.id, ctx.guild.id, ctx.author.id, reason)
         
         # Créer l'embed pour le bannissement
         embed = create_mod_action_embed(
@@ -278,11 +225,7 @@ class Moderation(commands.Cog):
         until = discord.utils.utcnow() + datetime.timedelta(seconds=duration_seconds)
         
         # Enregistrer l'action dans la base de données
-        self.cursor.execute('''
-        INSERT INTO mod_actions (action_type, user_id, server_id, moderator_id, reason, duration)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', ("timeout", member.id, ctx.guild.id, ctx.author.id, reason, duration_seconds))
-        self.conn.commit()
+        self.db.add_mod_action("timeout", member.id, ctx.guild.id, ctx.author.id, reason, duration_seconds)
         
         # Appliquer le timeout
         await member.timeout(until, reason=reason)
@@ -346,11 +289,7 @@ class Moderation(commands.Cog):
         
         # Enregistrer l'action dans la base de données
         target_user_id = user.id if user else 0
-        self.cursor.execute('''
-        INSERT INTO mod_actions (action_type, user_id, server_id, moderator_id, reason)
-        VALUES (?, ?, ?, ?, ?)
-        ''', ("clear", target_user_id, ctx.guild.id, ctx.author.id, f"Suppression de {len(deleted)} messages"))
-        self.conn.commit()
+        self.db.add_mod_action("clear", target_user_id, ctx.guild.id, ctx.author.id, f"Suppression de {len(deleted)} messages")
         
         # Envoyer le rapport au serveur de modération
         await self.send_to_mod_server(
@@ -370,40 +309,36 @@ class Moderation(commands.Cog):
     )
     @commands.has_any_role(MOD_ROLE_ID, ADMIN_ROLE_ID)
     async def warnings(self, ctx, member: discord.Member):
-        # Récupérer les avertissements de la base de données
-        self.cursor.execute('''
-        SELECT id, moderator_id, reason, timestamp FROM warnings 
-        WHERE user_id = ? AND server_id = ?
-        ORDER BY timestamp DESC
-        ''', (member.id, ctx.guild.id))
-        
-        warnings = self.cursor.fetchall()
-        
-        if not warnings:
-            return await ctx.send(f"{member.mention} n'a pas d'avertissements.")
+        # Total tenu à jour par triggers, les pages sont lues à la demande
+        total = await self.db.get_warning_count(member.id, ctx.guild.id)
         
-        # Créer un embed pour afficher les avertissements
-        embed = discord.Embed(
-            title=f"Avertissements de {member.display_name}",
-            description=f"Total: {len(warnings)} avertissement(s)",
-            color=discord.Color.gold()
-        )
-        
-        # Ajouter les 10 derniers avertissements à l'embed
-        for i, (warn_id, mod_id, reason, timestamp) in enumerate(warnings[:10], 1):
-            mod = ctx.guild.get_member(mod_id)
-            mod_name = mod.display_name if mod else "Modérateur inconnu"
-            embed.add_field(
-                name=f"Avertissement #{warn_id} | {timestamp}",
-                value=f"**Modérateur:** {mod_name}\n**Raison:** {reason}",
-                inline=False
+        def build_embed(warnings, page):
+            embed = discord.Embed(
+                title=f"Avertissements de {member.display_name}",
+                description=f"Total: {total} avertissement(s)",
+                color=discord.Color.gold()
             )
-        
-        # Si plus de 10 avertissements, ajouter une note
-        if len(warnings) > 10:
-            embed.set_footer(text=f"Affichage des 10 derniers avertissements sur un total de {len(warnings)}")
-        
-        await ctx.send(embed=embed)
+            
+            for warning in warnings:
+                mod = ctx.guild.get_member(warning["moderator_id"])
+                mod_name = mod.display_name if mod else "Modérateur inconnu"
+                embed.add_field(
+                    name=f"Avertissement #{warning['id']} | {warning['timestamp']}",
+                    value=f"**Modérateur:** {mod_name}\n**Raison:** {warning['reason']}",
+                    inline=False
+                )
+            
+            embed.set_footer(text=f"Page {page}/{max(1, -(-total // 10))}")
+            return embed
+        
+        paginator = KeysetPaginator(
+            ctx.author.id,
+            lambda before, limit: self.db.get_warnings(member.id, ctx.guild.id, limit, before),
+            build_embed,
+            page_size=10
+        )
+        if not await paginator.start(ctx):
+            await ctx.send(f"{member.mention} n'a pas d'avertissements.")
 
     @commands.hybrid_command(name="clearwarnings", description="Effacer les avertissements d'un membre")
     @app_commands.describe(
@@ -413,22 +348,10 @@ class Moderation(commands.Cog):
     @commands.has_any_role(ADMIN_ROLE_ID)
     async def clearwarnings(self, ctx, member: discord.Member, warn_id: Optional[int] = None):
         if warn_id:
-            # Vérifier si l'avertissement existe
-            self.cursor.execute('''
-            SELECT id FROM warnings 
-            WHERE id = ? AND user_id = ? AND server_id = ?
-            ''', (warn_id, member.id, ctx.guild.id))
-            
-            if not self.cursor.fetchone():
+            # Supprimer l'avertissement spécifique (False s'il n'existe pas)
+            if not await self.db.remove_warning(warn_id, member.id, ctx.guild.id):
                 return await ctx.send(f"Avertissement #{warn_id} non trouvé pour {member.mention}.")
             
-            # Supprimer l'avertissement spécifique
-            self.cursor.execute('''
-            DELETE FROM warnings 
-            WHERE id = ? AND user_id = ? AND server_id = ?
-            ''', (warn_id, member.id, ctx.guild.id))
-            self.conn.commit()
-            
             await ctx.send(f"L'avertissement #{warn_id} de {member.mention} a été supprimé.")
             
             # Envoyer le rapport au serveur de modération
@@ -440,23 +363,14 @@ class Moderation(commands.Cog):
             )
         
         else:
-            # Compter le nombre d'avertissements pour obtenir un décompte avant de les supprimer
-            self.cursor.execute('''
-            SELECT COUNT(*) FROM warnings 
-            WHERE user_id = ? AND server_id = ?
-            ''', (member.id, ctx.guild.id))
-            
-            count = self.cursor.fetchone()[0]
+            # Lire le compteur avant de supprimer (temps constant)
+            count = await self.db.get_warning_count(member.id, ctx.guild.id)
             
             if count == 0:
                 return await ctx.send(f"{member.mention} n'a pas d'avertissements.")
             
-            # Supprimer tous les avertissements
-            self.cursor.execute('''
-            DELETE FROM warnings 
-            WHERE user_id = ? AND server_id = ?
-            ''', (member.id, ctx.guild.id))
-            self.conn.commit()
+            # Supprimer tous les avertissements (les triggers remettent le compteur à zéro)
+            count = await self.db.clear_warnings(member.id, ctx.guild.id)
             
             await ctx.send(f"Tous les avertissements ({count}) de {member.mention} ont été supprimés.")
             
@@ -474,41 +388,38 @@ class Moderation(commands.Cog):
     )
     @commands.has_any_role(MOD_ROLE_ID, ADMIN_ROLE_ID)
     async def modlogs(self, ctx, member: discord.Member):
-        # Récupérer l'historique des actions de modération
-        self.cursor.execute('''
-        SELECT action_type, moderator_id, reason, timestamp, duration
-        FROM mod_actions 
-        WHERE user_id = ? AND server_id = ?
-        ORDER BY timestamp DESC
-        LIMIT 15
-        ''', (member.id, ctx.guild.id))
-        
-        actions = self.cursor.fetchall()
-        
-        if not actions:
-            return await ctx.send(f"Aucune action de modération enregistrée pour {member.mention}.")
-        
-        # Créer un embed pour afficher l'historique
-        embed = discord.Embed(
-            title=f"Historique de modération de {member.display_name}",
-            color=discord.Color.blue()
-        )
-        
-        for action_type, mod_id, reason, timestamp, duration in actions:
-            mod = ctx.guild.get_member(mod_id)
-            mod_name = mod.display_name if mod else "Modérateur inconnu"
+        def build_embed(actions, page):
+            embed = discord.Embed(
+                title=f"Historique de modération de {member.display_name}",
+                color=discord.Color.blue()
+            )
             
-            value = f"**Modérateur:** {mod_name}\n**Raison:** {reason}"
-            if duration:
-                value += f"\n**Durée:** {duration} secondes"
+            for action in actions:
+                mod = ctx.guild.get_member(action["moderator_id"])
+                mod_name = mod.display_name if mod else "Modérateur inconnu"
                 
-            embed.add_field(
-                name=f"{action_type} | {timestamp}",
-                value=value,
-                inline=False
-            )
-        
-        await ctx.send(embed=embed)
+                value = f"**Modérateur:** {mod_name}\n**Raison:** {action['reason']}"
+                if action["duration"]:
+                    value += f"\n**Durée:** {action['duration']} secondes"
+                    
+                embed.add_field(
+                    name=f"{action['action_type']} | {action['timestamp']}",
+                    value=value,
+                    inline=False
+                )
+            
+            embed.set_footer(text=f"Page {page}")
+            return embed
+        
+        # Historique parcouru page par page, du plus récent au plus ancien
+        paginator = KeysetPaginator(
+            ctx.author.id,
+            lambda before, limit: self.db.get_mod_actions(member.id, ctx.guild.id, limit, before),
+            build_embed,
+            page_size=15
+        )
+        if not await paginator.start(ctx):
+            await ctx.send(f"Aucune action de modération enregistrée pour {member.mention}.")
 
     @commands.hybrid_command(name="report", description="Signaler un utilisateur aux modérateurs")
     @app_commands.describe(
@@ -551,9 +462,5 @@ class Moderation(commands.Cog):
         else:
             await ctx.send(f"⚠️ Erreur lors de l'envoi du signalement: {message}")
 
-    def cog_unload(self):
-        # Fermer la connexion à la base de données lors du déchargement du cog
-        self.conn.close()
-
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -11,12 +11,62 @@ import asyncio
 from typing import Optional
 
 from config import MOD_ROLE_ID, ADMIN_ROLE_ID
+from utils.reminder_scheduler import ReminderScheduler
+from utils.scheduler import TIME_FORMAT, to_db_time
+from utils.giveaways import GiveawayScheduler, draw_winners, parse_winner_ids
 
 class Utilities(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.suggestion_channels = {}  # ID du canal: {"suggestion": bool, "vote": bool}
         self.load_settings()
+        # Rappels persistants: ils survivent aux redémarrages
+        self.reminders = ReminderScheduler(bot.db, self.deliver_reminders)
+        # Giveaways persistants: terminés à l'échéance, même après un redémarrage
+        self.giveaways = GiveawayScheduler(bot.db, self.finish_giveaway, batch_size=10)
+
+    async def cog_load(self):
+        self.reminders.start()
+        self.giveaways.start()
+        # Après un !restore, les échéances en mémoire sont relues depuis la base restaurée
+        self.bot.db.add_restore_hook(self.reminders.reload)
+        self.bot.db.add_restore_hook(self.giveaways.reload)
+
+    async def cog_unload(self):
+        self.bot.db.remove_restore_hook(self.reminders.reload)
+        self.bot.db.remove_restore_hook(self.giveaways.reload)
+        await self.reminders.stop()
+        await self.giveaways.stop()
+
+    async def deliver_reminders(self, reminders):
+        """Envoie un lot de rappels dus"""
+        await self.bot.wait_until_ready()
+        results = await asyncio.gather(*(self.send_reminder(reminder) for reminder in reminders), return_exceptions=True)
+        for reminder, result in zip(reminders, results):
+            if isinstance(result, Exception):
+                print(f"Erreur lors de l'envoi du rappel #{reminder['id']}: {result}")
+
+    async def send_reminder(self, reminder):
+        created = datetime.datetime.strptime(reminder["created_time"], TIME_FORMAT)
+        due = datetime.datetime.strptime(reminder["remind_time"], TIME_FORMAT)
+        minutes = round((due - created).total_seconds() / 60)
+        
+        embed = discord.Embed(
+            title="⏰ Rappel",
+            description=reminder["message"],
+            color=discord.Color.blue(),
+            timestamp=datetime.datetime.now()
+        )
+        embed.set_footer(text=f"Rappel défini il y a {minutes} minutes")
+        
+        user = self.bot.get_user(reminder["user_id"]) or await self.bot.fetch_user(reminder["user_id"])
+        try:
+            await user.send(embed=embed)
+        except discord.Forbidden:
+            # Si l'utilisateur a bloqué les DMs
+            channel = self.bot.get_channel(reminder["channel_id"])
+            if channel:
+                await channel.send(f"{user.mention}, voici votre rappel: {reminder['message']}")
 
     def load_settings(self):
         try:
@@ -265,7 +315,7 @@ class Utilities(commands.Cog):
             return await ctx.send("Le nombre de gagnants doit être d'au moins 1.")
         
         # Calcul de la date de fin
-        end_time = datetime.datetime.now() + datetime.timedelta(minutes=duration)
+        end_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=duration)
         
         # Création de l'embed
         embed = discord.Embed(
@@ -284,52 +334,96 @@ class Utilities(commands.Cog):
         giveaway_msg = await ctx.send(embed=embed)
         await giveaway_msg.add_reaction('🎉')
         
+        # Enregistrer le giveaway, le planificateur le terminera à l'échéance
+        end_time_db = to_db_time(end_time)
+        giveaway_id = await self.bot.db.add_giveaway(
+            ctx.guild.id, giveaway_msg.channel.id, giveaway_msg.id, ctx.author.id, prize, winners, end_time_db
+        )
+        self.giveaways.schedule(end_time_db, giveaway_id)
+        
         # Confirmation à l'auteur
         await ctx.send(f"✅ Giveaway créé! Il se terminera <t:{int(end_time.timestamp())}:R>.", ephemeral=True)
+
+    async def draw_giveaway(self, message, count, exclude=()):
+        """Tire les gagnants parmi les réactions 🎉 d'un message (participants lus page par page)"""
+        reaction = discord.utils.get(message.reactions, emoji='🎉')
+        if not reaction:
+            return []
+        return await draw_winners(reaction.users(), count, random.getrandbits(64), exclude={self.bot.user.id, *exclude})
+
+    async def finish_giveaway(self, giveaway):
+        """Termine un giveaway arrivé à échéance"""
+        await self.bot.wait_until_ready()
+        # Gagnants déjà tirés lors d'un essai précédent
+        winner_ids = parse_winner_ids(giveaway["winner_ids"])
+        channel = self.bot.get_channel(giveaway["channel_id"])
+        if channel is None:
+            return await self.bot.db.finish_giveaway(giveaway["id"], winner_ids or [])
         
-        # Attendre la fin du giveaway
-        await asyncio.sleep(duration * 60)
-        
-        # Récupérer le message à jour
         try:
-            channel = giveaway_msg.channel
-            giveaway_msg = await channel.fetch_message(giveaway_msg.id)
-            
-            # Récupérer les participants
-            reaction = discord.utils.get(giveaway_msg.reactions, emoji='🎉')
-            
-            if not reaction or reaction.count <= 1:
-                # Pas assez de participants
-                embed.description = f"**{prize}**\n\n**Tirage terminé!**\nPas assez de participants."
-                await giveaway_msg.edit(embed=embed)
-                return await channel.send("Le giveaway s'est terminé, mais il n'y avait pas assez de participants!")
-            
-            # Récupérer la liste des participants (sans le bot)
-            users = await reaction.users().flatten()
-            users.remove(self.bot.user)
-            
-            # S'assurer qu'il y a des participants
-            if not users:
-                embed.description = f"**{prize}**\n\n**Tirage terminé!**\nPas de participants."
-                await giveaway_msg.edit(embed=embed)
-                return await channel.send("Le giveaway s'est terminé, mais personne n'a participé!")
-            
-            # Sélectionner les gagnants
-            winners_count = min(winners, len(users))
-            winners_list = random.sample(users, winners_count)
-            
-            # Mettre à jour l'embed
-            winners_mentions = ", ".join(winner.mention for winner in winners_list)
-            embed.description = f"**{prize}**\n\n**Tirage terminé!**\nGagnant(s): {winners_mentions}"
-            await giveaway_msg.edit(embed=embed)
-            
-            # Annoncer les gagnants
-            await channel.send(f"🎉 Félicitations {winners_mentions}! Vous avez gagné **{prize}**!")
-            
+            giveaway_msg = await channel.fetch_message(giveaway["message_id"])
         except discord.NotFound:
-            pass  # Le message a été supprimé
-        except Exception as e:
-            print(f"Erreur lors de la fin du giveaway: {e}")
+            # Le message a été supprimé
+            return await self.bot.db.finish_giveaway(giveaway["id"], winner_ids or [])
+        
+        prize = giveaway["prize"]
+        if winner_ids is None:
+            winners_list = await self.draw_giveaway(giveaway_msg, giveaway["winners"])
+            winner_ids = [winner.id for winner in winners_list]
+            # Gagnants enregistrés avant l'annonce: si elle échoue, le nouvel essai annonce les mêmes
+            await self.bot.db.save_giveaway_winners(giveaway["id"], winner_ids)
+        
+        embed = giveaway_msg.embeds[0] if giveaway_msg.embeds else discord.Embed(title="🎉 GIVEAWAY 🎉", color=discord.Color.purple())
+        if not winner_ids:
+            # Pas de participants
+            embed.description = f"**{prize}**\n\n**Tirage terminé!**\nPas de participants."
+            await giveaway_msg.edit(embed=embed)
+            await channel.send("Le giveaway s'est terminé, mais personne n'a participé!")
+            return await self.bot.db.finish_giveaway(giveaway["id"], [])
+        
+        # Mettre à jour l'embed
+        winners_mentions = ", ".join(f"<@{winner_id}>" for winner_id in winner_ids)
+        embed.description = f"**{prize}**\n\n**Tirage terminé!**\nGagnant(s): {winners_mentions}"
+        await giveaway_msg.edit(embed=embed)
+        
+        # Annoncer les gagnants, puis seulement marquer le giveaway terminé
+        await channel.send(f"🎉 Félicitations {winners_mentions}! Vous avez gagné **{prize}**!")
+        await self.bot.db.finish_giveaway(giveaway["id"], winner_ids)
+
+    @commands.hybrid_command(name="reroll", description="Tirer de nouveaux gagnants pour un giveaway terminé")
+    @app_commands.describe(
+        message_id="L'ID du message du giveaway",
+        winners="Nombre de nouveaux gagnants"
+    )
+    @commands.has_any_role(MOD_ROLE_ID, ADMIN_ROLE_ID)
+    async def reroll(self, ctx, message_id: str, winners: int = 1):
+        if not message_id.isdigit():
+            return await ctx.send("L'ID du message doit être un nombre.")
+        
+        giveaway = await self.bot.db.get_giveaway_by_message(int(message_id))
+        if not giveaway or giveaway["server_id"] != ctx.guild.id:
+            return await ctx.send("Aucun giveaway trouvé pour ce message.")
+        if not giveaway["ended"]:
+            return await ctx.send("Ce giveaway n'est pas encore terminé.")
+        
+        channel = self.bot.get_channel(giveaway["channel_id"])
+        try:
+            giveaway_msg = await channel.fetch_message(giveaway["message_id"])
+        except (AttributeError, discord.NotFound):
+            return await ctx.send("Le message du giveaway n'existe plus.")
+        
+        # Même tirage que la fin du giveaway, sans les gagnants précédents
+        previous = parse_winner_ids(giveaway["winner_ids"]) or []
+        winners_list = await self.draw_giveaway(giveaway_msg, winners, exclude=previous)
+        if not winners_list:
+            return await ctx.send("Il n'y a plus de participants à tirer au sort.")
+        
+        await self.bot.db.finish_giveaway(giveaway["id"], previous + [winner.id for winner in winners_list])
+        
+        winners_mentions = ", ".join(winner.mention for winner in winners_list)
+        await channel.send(f"🎉 Nouveau tirage! Félicitations {winners_mentions}! Vous avez gagné **{giveaway['prize']}**!")
+        if channel.id != ctx.channel.id:
+            await ctx.send(f"✅ Nouveau tirage effectué: {winners_mentions}")
 
     @commands.hybrid_command(name="avatar", description="Afficher l'avatar d'un utilisateur")
     @app_commands.describe(member="L'utilisateur dont vous voulez voir l'avatar")
@@ -355,26 +449,18 @@ class Utilities(commands.Cog):
         if time < 1:
             return await ctx.send("Le délai doit être d'au moins 1 minute.")
         
+        # Le rappel est enregistré en base, le planificateur l'enverra à l'échéance
+        remind_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=time)
+        await self.reminders.add(
+            ctx.author.id,
+            ctx.guild.id if ctx.guild else 0,
+            ctx.channel.id,
+            reminder,
+            remind_at
+        )
+        
         # Confirmation
         await ctx.send(f"✅ Je vous rappellerai de '{reminder}' dans {time} minutes.")
-        
-        # Attendre le délai
-        await asyncio.sleep(time * 60)
-        
-        # Envoyer le rappel
-        try:
-            embed = discord.Embed(
-                title="⏰ Rappel",
-                description=reminder,
-                color=discord.Color.blue(),
-                timestamp=datetime.datetime.now()
-            )
-            embed.set_footer(text=f"Rappel défini il y a {time} minutes")
-            
-            await ctx.author.send(embed=embed)
-        except discord.Forbidden:
-            # Si l'utilisateur a bloqué les DMs
-            await ctx.send(f"{ctx.author.mention}, voici votre rappel: {reminder}")
 
     @commands.hybrid_command(name="help", description="Afficher l'aide des commandes")
     @app_commands.describe(command="Commande spécifique pour laquelle afficher l'aide")
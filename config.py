@@ -22,6 +22,45 @@ MOD_ROLE_ID = int(os.getenv('MOD_ROLE_ID'))
 # Configuration base de données
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/database.db')
 
+# Profil de stockage SQLite (appliqué à chaque connexion, voir benchmarks/sqlite_profiles.py)
+DATABASE_PRAGMAS = {
+    "busy_timeout": int(os.getenv('DB_BUSY_TIMEOUT', 5000)),  # en millisecondes
+    "journal_mode": os.getenv('DB_JOURNAL_MODE', 'WAL'),
+    "synchronous": os.getenv('DB_SYNCHRONOUS', 'NORMAL'),
+    "cache_size": int(os.getenv('DB_CACHE_SIZE', -16000)),  # négatif = en Kio
+    "mmap_size": int(os.getenv('DB_MMAP_SIZE', 268435456)),  # en octets
+    "temp_store": os.getenv('DB_TEMP_STORE', 'MEMORY'),
+}
+
+# Sauvegardes automatiques (instantanés dédupliqués, voir utils/snapshots.py)
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+BACKUP_INTERVAL_MINUTES = int(os.getenv('BACKUP_INTERVAL_MINUTES', 60))  # 0 pour désactiver
+BACKUP_RETENTION = {
+    "hourly": int(os.getenv('BACKUP_KEEP_HOURLY', 24)),
+    "daily": int(os.getenv('BACKUP_KEEP_DAILY', 7)),
+    "weekly": int(os.getenv('BACKUP_KEEP_WEEKLY', 4)),
+}
+
+# Système de niveaux
+XP_COOLDOWN = int(os.getenv('XP_COOLDOWN', 60))  # en secondes entre deux gains d'XP
+XP_MIN = int(os.getenv('XP_MIN', 15))
+XP_MAX = int(os.getenv('XP_MAX', 25))
+XP_FLUSH_INTERVAL = int(os.getenv('XP_FLUSH_INTERVAL', 30))  # en secondes
+
+# Suivi des invitations
+INVITE_JOIN_WINDOW = float(os.getenv('INVITE_JOIN_WINDOW', 1.0))  # en secondes, regroupement des arrivées
+INVITE_SNAPSHOT_TTL = int(os.getenv('INVITE_SNAPSHOT_TTL', 600))  # en secondes, pas de rechargement à la reconnexion
+INVITE_WARMUP_CONCURRENCY = int(os.getenv('INVITE_WARMUP_CONCURRENCY', 8))  # requêtes simultanées au démarrage
+INVITE_WARMUP_RATE = float(os.getenv('INVITE_WARMUP_RATE', 40))  # requêtes par seconde (limite globale Discord: 50)
+INVITE_FAKE_ACCOUNT_DAYS = int(os.getenv('INVITE_FAKE_ACCOUNT_DAYS', 7))  # compte plus jeune = invitation fausse
+INVITE_FAKE_LEAVE_SECONDS = int(os.getenv('INVITE_FAKE_LEAVE_SECONDS', 3600))  # départ plus rapide = invitation fausse
+
+# Logs du serveur de modération
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', 2.0))  # en secondes, regroupement des logs (10 embeds par message)
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 500))  # logs en attente au-delà desquels les moins prioritaires sont ignorés
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 5))  # file à moitié pleine: un log info sur N gardé
+LOG_WEBHOOKS = int(os.getenv('LOG_WEBHOOKS', 0))  # webhooks créés dans le canal des logs, 0 = envoi par le bot seul
+
 # Cooldowns et limites
 WARN_THRESHOLD = int(os.getenv('WARN_THRESHOLD', 3))
 MUTE_DURATION = int(os.getenv('DEFAULT_MUTE_DURATION', 3600))  # en secondes (1 heure)
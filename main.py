@@ -57,15 +57,15 @@ owner_ids_str = os.getenv('OWNER_IDS', '')
 bot.owner_ids = set(map(int, owner_ids_str.split(','))) if owner_ids_str else set()
 logger.info(f"Propriétaires du bot configurés: {bot.owner_ids}")
 
-# Initialisation de la base de données
-try:
-    from utils.db_handler import DatabaseHandler
-    db = DatabaseHandler()
-    db.setup_database()
-    db.close()
-    logger.info("Base de données initialisée avec succès")
-except Exception as e:
-    logger.error(f"Erreur lors de l'initialisation de la base de données: {e}")
+# Gestionnaire de base de données partagé par tous les cogs (un écrivain, un pool de lecteurs)
+from config import DATABASE_PATH, DATABASE_PRAGMAS
+from utils.async_db import AsyncDatabaseHandler
+bot.db = AsyncDatabaseHandler(DATABASE_PATH, pragmas=DATABASE_PRAGMAS)
+
+# Envoi des logs du serveur de modération (par le bot, ou réparti sur des webhooks)
+from config import LOG_WEBHOOKS
+from utils.webhook_pool import WebhookPool
+bot.log_webhooks = WebhookPool(LOG_WEBHOOKS)
 
 # Chargement des extensions (cogs)
 async def load_extensions():
@@ -135,6 +135,14 @@ async def main():
     """Fonction principale"""
     logger.info(f"Démarrage du bot (version {VERSION})...")
     
+    # Initialisation de la base de données (schéma appliqué une seule fois)
+    try:
+        await bot.db.connect()
+        config_count = await bot.db.warm_config_cache()
+        logger.info(f"Base de données initialisée avec succès ({config_count} configurations de serveur en cache)")
+    except Exception as e:
+        logger.error(f"Erreur lors de l'initialisation de la base de données: {e}")
+    
     # Chargement des modules
     cog_count = await load_extensions()
     if cog_count == 0:
@@ -147,6 +155,11 @@ async def main():
         logger.critical("Token invalide. Vérifiez votre fichier .env")
     except Exception as e:
         logger.critical(f"Erreur lors du démarrage du bot: {e}")
+    finally:
+        # Décharger les cogs (XP en mémoire, logs en attente...) avant de fermer la base
+        if not bot.is_closed():
+            await bot.close()
+        await bot.db.close()
 
 # Point d'entrée
 if __name__ == "__main__":
@@ -0,0 +1,384 @@
+# utils/async_db.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from utils.db_handler import DatabaseHandler
+from utils.config_cache import ServerConfigCache
+from utils.backup import backup_database, ProgressCallback
+from utils.snapshots import SnapshotStore
+
+class AsyncDatabaseHandler:
+    """
+    Gestionnaire de connexions asynchrone, partagé par tout le bot (bot.db).
+    Les écritures passent par un thread écrivain unique, les lectures par un
+    pool borné de connexions en lecture: la boucle d'événements (heartbeat,
+    commandes) n'attend jamais SQLite. Le schéma n'est appliqué qu'une fois,
+    à l'ouverture de la connexion d'écriture.
+
+    Les insertions et mises à jour fréquentes (avertissements, actions de
+    modération, XP, invitations) sont mises en file (write-behind) et validées
+    ensemble, en une transaction par intervalle de flush ou par lot plein.
+    Elles retournent un Future: l'attendre revient à attendre le commit.
+    Toute lecture ou écriture directe vide d'abord la file, une lecture voit
+    donc toujours les écritures qui la précèdent; close() vide aussi la file.
+
+    Les configurations de serveur sont servies par un cache en mémoire
+    (chargé en bloc par warm_config_cache, mis à jour à chaque écriture).
+    Les autres caches de la base (XP, arbres d'invitations, échéances) s'inscrivent
+    avec add_restore_hook pour être vidés après une restauration.
+    """
+
+    def __init__(self, db_path: str = 'data/database.db', readers: int = 4, pragmas: Optional[Dict[str, Any]] = None,
+                 flush_interval: float = 0.05, batch_size: int = 200):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # File d'écriture: [(méthode, args, kwargs, future), ...]
+        self._pending: List[Tuple[str, tuple, dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._last_flush: Optional[asyncio.Future] = None
+        self.config_cache = ServerConfigCache()
+        self._config_cache_warmed = False
+        self._restore_hooks: List[Callable[[], None]] = []
+        self._handler: Optional[DatabaseHandler] = None
+        # Un seul écrivain: SQLite n'accepte qu'une transaction d'écriture à la fois
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._ready = self._executor.submit(self._open)
+        # Pool de lecture: une connexion par thread, ouverte à la première requête
+        self._reader_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._local = threading.local()
+        self._readers: List[DatabaseHandler] = []
+        self._readers_lock = threading.Lock()
+
+    def _open(self):
+        """Ouvre la connexion d'écriture et prépare le schéma"""
+        self._handler = DatabaseHandler(self.db_path, pragmas=self.pragmas)
+
+    def _reader(self) -> DatabaseHandler:
+        handler = getattr(self._local, 'handler', None)
+        if handler is None:
+            # Le schéma est prêt dès que la connexion d'écriture est ouverte
+            self._ready.result()
+            handler = DatabaseHandler(self.db_path, setup=False, check_same_thread=False, pragmas=self.pragmas)
+            self._local.handler = handler
+            with self._readers_lock:
+                self._readers.append(handler)
+        return handler
+
+    def _call(self, method: str, args: tuple, kwargs: dict):
+        return getattr(self._handler, method)(*args, **kwargs)
+
+    def _call_reader(self, method: str, args: tuple, kwargs: dict):
+        return getattr(self._reader(), method)(*args, **kwargs)
+
+    def _restore(self, source_path: str) -> float:
+        """Remplace le contenu de la base par source_path sur la connexion d'écriture"""
+        start = time.perf_counter()
+        source = sqlite3.connect(source_path)
+        try:
+            self._handler.conn.commit()
+            # Copie en une seule étape: les lecteurs voient l'ancienne ou la nouvelle base, jamais un mélange
+            source.backup(self._handler.conn)
+        finally:
+            source.close()
+        # Un instantané ancien peut précéder des migrations
+        self._handler.setup_database()
+        return time.perf_counter() - start
+
+    def _close(self):
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    async def connect(self):
+        """Attend l'ouverture de la base (lève l'erreur éventuelle du schéma)"""
+        await asyncio.wrap_future(self._ready)
+
+    def queue(self, method: str, *args, **kwargs) -> asyncio.Future:
+        """Met une écriture en file; le Future retourné est résolu après le commit du lot"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        future.add_done_callback(self._log_write_error)
+        self._pending.append((method, args, kwargs, future))
+        if len(self._pending) >= self.batch_size:
+            self._submit_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self._submit_pending)
+        return future
+
+    def _submit_pending(self):
+        """Envoie la file au thread écrivain (l'ordre de soumission est préservé)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        operations = [(method, args, kwargs) for method, args, kwargs, _ in batch]
+        loop = asyncio.get_running_loop()
+        flush = loop.run_in_executor(self._executor, self._call, 'execute_batch', (operations,), {})
+        flush.add_done_callback(lambda done: self._resolve_batch(batch, done))
+        self._last_flush = flush
+
+    @staticmethod
+    def _resolve_batch(batch, done: asyncio.Future):
+        if done.cancelled():
+            return
+        error = done.exception()
+        results = done.result() if error is None else [(False, error)] * len(batch)
+        for (_, _, _, future), (ok, result) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    @staticmethod
+    def _log_write_error(future: asyncio.Future):
+        # Les écritures en file ne sont pas toujours attendues: journaliser les échecs
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Erreur lors d'une écriture en file: {future.exception()}")
+
+    async def flush(self):
+        """Valide immédiatement les écritures en file et attend leur commit"""
+        self._submit_pending()
+        if self._last_flush is not None and not self._last_flush.done():
+            await asyncio.shield(self._last_flush)
+
+    async def run(self, method: str, *args, **kwargs):
+        """Exécute une méthode de DatabaseHandler sur le thread écrivain"""
+        # Les écritures en file passent avant: le thread écrivain traite dans l'ordre
+        self._submit_pending()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, method, args, kwargs)
+
+    async def read(self, method: str, *args, **kwargs):
+        """Exécute une méthode de lecture de DatabaseHandler sur le pool de lecture"""
+        # Lecture après écriture: la lecture doit voir les écritures déjà demandées
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader_executor, self._call_reader, method, args, kwargs)
+
+    # Méthodes pour les avertissements
+    def add_warning(self, user_id: int, server_id: int, moderator_id: int, reason: str) -> asyncio.Future:
+        return self.queue('add_warning', user_id, server_id, moderator_id, reason)
+
+    async def get_warnings(self, user_id: int, server_id: int, limit: int = 10,
+                           before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        return await self.read('get_warnings', user_id, server_id, limit, before)
+
+    async def get_warning_count(self, user_id: int, server_id: int) -> int:
+        return await self.read('get_warning_count', user_id, server_id)
+
+    async def remove_warning(self, warning_id: int, user_id: int, server_id: int) -> bool:
+        return await self.run('remove_warning', warning_id, user_id, server_id)
+
+    async def clear_warnings(self, user_id: int, server_id: int) -> int:
+        return await self.run('clear_warnings', user_id, server_id)
+
+    async def rebuild_warning_counts(self) -> int:
+        return await self.run('rebuild_warning_counts')
+
+    # Méthodes pour les actions de modération
+    def add_mod_action(self, action_type: str, user_id: int, server_id: int, moderator_id: int, reason: str, duration: Optional[int] = None) -> asyncio.Future:
+        return self.queue('add_mod_action', action_type, user_id, server_id, moderator_id, reason, duration)
+
+    async def get_mod_actions(self, user_id: int, server_id: int, limit: int = 15,
+                              before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        return await self.read('get_mod_actions', user_id, server_id, limit, before)
+
+    # Méthodes pour la configuration du serveur
+    async def get_server_config(self, server_id: int) -> Dict[str, Any]:
+        config = self.config_cache.get(server_id)
+        if config is None:
+            version = self.config_cache.version(server_id)
+            config = self.config_cache.set_read(server_id, await self.read('get_server_config', server_id), version)
+        return config
+
+    async def get_server_config_value(self, server_id: int, key: str, default: Any = None) -> Any:
+        config = self.config_cache.get(server_id)
+        if config is None:
+            return await self.read('get_server_config_value', server_id, key, default)
+        return config.get(key, default)
+
+    async def set_server_config_value(self, server_id: int, key: str, value: Any) -> None:
+        await self.run('set_server_config_value', server_id, key, value)
+        self.config_cache.set_value(server_id, key, value)
+
+    async def update_server_config(self, server_id: int, config: Dict[str, Any]) -> None:
+        # Écrire d'abord, puis mettre en cache la valeur écrite: une lecture commencée
+        # avant l'écriture porte une version dépassée et ne remplace pas le cache
+        await self.run('update_server_config', server_id, config)
+        self.config_cache.set(server_id, config)
+
+    async def warm_config_cache(self) -> int:
+        """Charge en bloc la configuration de tous les serveurs et retourne leur nombre"""
+        configs = await self.read('get_all_server_configs')
+        self.config_cache.load(configs)
+        self._config_cache_warmed = True
+        return len(configs)
+
+    # Méthodes pour le système de niveaux
+    def add_xp(self, user_id: int, server_id: int, xp_amount: int) -> asyncio.Future:
+        return self.queue('add_xp', user_id, server_id, xp_amount)
+
+    def save_levels(self, rows: List[Tuple[int, int, int]]) -> asyncio.Future:
+        return self.queue('save_levels', rows)
+
+    async def get_level_info(self, user_id: int, server_id: int) -> Dict[str, Any]:
+        return await self.read('get_level_info', user_id, server_id)
+
+    async def get_guild_levels(self, server_id: int) -> List[Dict[str, Any]]:
+        return await self.read('get_guild_levels', server_id)
+
+    async def get_leaderboard(self, server_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        return await self.read('get_leaderboard', server_id, limit)
+
+    # Méthodes pour les rappels
+    def add_reminder(self, user_id: int, server_id: int, channel_id: int, message: str, remind_time: str) -> asyncio.Future:
+        return self.queue('add_reminder', user_id, server_id, channel_id, message, remind_time)
+
+    async def get_due_reminders(self) -> List[Dict[str, Any]]:
+        return await self.read('get_due_reminders')
+
+    async def get_next_reminders(self, limit: int) -> List[Tuple[str, int]]:
+        return await self.read('get_next_reminders', limit)
+
+    async def get_reminders(self, reminder_ids: List[int]) -> List[Dict[str, Any]]:
+        return await self.read('get_reminders', reminder_ids)
+
+    async def remove_reminder(self, reminder_id: int) -> bool:
+        return await self.run('remove_reminder', reminder_id)
+
+    async def remove_reminders(self, reminder_ids: List[int]) -> int:
+        return await self.run('remove_reminders', reminder_ids)
+
+    # Méthodes pour les giveaways
+    async def add_giveaway(self, server_id: int, channel_id: int, message_id: int, host_id: int,
+                           prize: str, winners: int, end_time: str) -> int:
+        return await self.run('add_giveaway', server_id, channel_id, message_id, host_id, prize, winners, end_time)
+
+    async def get_next_giveaways(self, limit: int) -> List[Tuple[str, int]]:
+        return await self.read('get_next_giveaways', limit)
+
+    async def get_giveaways(self, giveaway_ids: List[int]) -> List[Dict[str, Any]]:
+        return await self.read('get_giveaways', giveaway_ids)
+
+    async def get_giveaway_by_message(self, message_id: int) -> Optional[Dict[str, Any]]:
+        return await self.read('get_giveaway_by_message', message_id)
+
+    async def save_giveaway_winners(self, giveaway_id: int, winner_ids: List[int]) -> None:
+        return await self.run('save_giveaway_winners', giveaway_id, winner_ids)
+
+    async def postpone_giveaway(self, giveaway_id: int, end_time: str) -> bool:
+        return await self.run('postpone_giveaway', giveaway_id, end_time)
+
+    async def finish_giveaway(self, giveaway_id: int, winner_ids: List[int]) -> None:
+        return await self.run('finish_giveaway', giveaway_id, winner_ids)
+
+    # Méthodes pour le suivi des invitations
+    def add_invite_tracking(self, server_id: int, inviter_id: int, invited_id: int, invite_code: str,
+                            fake: int = 0) -> asyncio.Future:
+        return self.queue('add_invite_tracking', server_id, inviter_id, invited_id, invite_code, fake)
+
+    def credit_invites(self, server_id: int, inviter_id: int, count: int) -> asyncio.Future:
+        return self.queue('credit_invites', server_id, inviter_id, count)
+
+    async def get_invite_tracking(self, server_id: int, invited_id: int) -> Optional[Dict[str, Any]]:
+        return await self.read('get_invite_tracking', server_id, invited_id)
+
+    def record_invite_left(self, server_id: int, invited_id: int, fast_leave_seconds: int = 0) -> asyncio.Future:
+        return self.queue('record_invite_left', server_id, invited_id, fast_leave_seconds)
+
+    async def recompute_fake_invites(self, min_account_days: int, fast_leave_seconds: int,
+                                     server_id: Optional[int] = None) -> Dict[str, int]:
+        return await self.run('recompute_fake_invites', min_account_days, fast_leave_seconds, server_id)
+
+    async def get_invite_edges(self, server_id: int) -> List[Tuple[int, int, int, int]]:
+        return await self.read('get_invite_edges', server_id)
+
+    async def get_invite_stats(self, user_id: int, server_id: int) -> Optional[Dict[str, Any]]:
+        return await self.read('get_invite_stats', user_id, server_id)
+
+    async def get_server_invite_stats(self, server_id: int) -> List[Dict[str, Any]]:
+        return await self.read('get_server_invite_stats', server_id)
+
+    async def get_invite_leaderboard(self, server_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        return await self.read('get_invite_leaderboard', server_id, limit)
+
+    async def get_invite_rank(self, user_id: int, server_id: int) -> Optional[Dict[str, Any]]:
+        return await self.read('get_invite_rank', user_id, server_id)
+
+    def add_bonus_invites(self, user_id: int, server_id: int, amount: int) -> asyncio.Future:
+        return self.queue('add_bonus_invites', user_id, server_id, amount)
+
+    async def remove_invites(self, user_id: int, server_id: int, amount: int) -> bool:
+        return await self.run('remove_invites', user_id, server_id, amount)
+
+    async def backup(self, dest_path: str, compress: bool = False, verify: bool = True,
+                     progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Sauvegarde en ligne dans un thread dédié, après avoir validé les écritures en file"""
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: backup_database(self.db_path, dest_path, compress=compress, verify=verify, progress=progress)
+        )
+
+    async def snapshot(self, store: SnapshotStore) -> Dict[str, Any]:
+        """Ajoute un instantané dédupliqué de la base au dépôt"""
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, store.create_snapshot, self.db_path)
+
+    async def restore(self, store: SnapshotStore, snapshot_id: str) -> Dict[str, Any]:
+        """
+        Vérifie puis restaure un instantané. La reconstruction et les vérifications
+        se font à côté de la base; seule la copie finale bloque les écritures.
+        """
+        loop = asyncio.get_running_loop()
+        restore_path = os.path.join(store.root, 'restore.tmp')
+        try:
+            result = await loop.run_in_executor(None, store.materialize, snapshot_id, restore_path)
+            await self.flush()
+            result["swap_duration"] = await loop.run_in_executor(self._executor, self._restore, restore_path)
+        finally:
+            if os.path.exists(restore_path):
+                os.remove(restore_path)
+        # Les données en cache proviennent de l'ancienne base: elles sont oubliées
+        # (sans être écrites) avant toute autre opération
+        for hook in list(self._restore_hooks):
+            try:
+                hook()
+            except Exception as e:
+                print(f"Erreur lors de la réinitialisation d'un cache après restauration: {e}")
+        self.config_cache = ServerConfigCache()
+        if self._config_cache_warmed:
+            await self.warm_config_cache()
+        return result
+
+    def add_restore_hook(self, hook: Callable[[], None]) -> None:
+        """Appelle `hook()` juste après chaque restauration, pour vider un cache de la base"""
+        self._restore_hooks.append(hook)
+
+    def remove_restore_hook(self, hook: Callable[[], None]) -> None:
+        if hook in self._restore_hooks:
+            self._restore_hooks.remove(hook)
+
+    async def close(self):
+        """Vide la file d'écriture, ferme toutes les connexions puis arrête les threads"""
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=True)
+        self._reader_executor.shutdown(wait=True)
+        with self._readers_lock:
+            for handler in self._readers:
+                handler.close()
+            self._readers.clear()
@@ -0,0 +1,80 @@
+# utils/backup.py
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Optional
+
+# progress(pages_copiées, pages_totales), appelé depuis le thread de sauvegarde
+ProgressCallback = Callable[[int, int], None]
+
+def check_integrity(db_path: str) -> str:
+    """Retourne le résultat de PRAGMA integrity_check ("ok" si la base est saine)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+        return "; ".join(row[0] for row in rows)
+    finally:
+        conn.close()
+
+def backup_database(source_path: str, dest_path: str, pages: int = 256, step_sleep: float = 0.005,
+                    compress: bool = False, verify: bool = True,
+                    progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Copie la base en ligne avec l'API de sauvegarde de SQLite, `pages` pages par étape.
+    Fonction bloquante: à exécuter hors de la boucle d'événements.
+
+    Une transaction de lecture est tenue sur la source pendant toute la copie:
+    la sauvegarde est un instantané cohérent et, en mode WAL, les écritures du
+    bot continuent sans faire recommencer la copie.
+    """
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+    if compress and not dest_path.endswith('.gz'):
+        dest_path += '.gz'
+    # La copie est faite dans un fichier temporaire, renommé seulement une fois vérifié
+    raw_path = dest_path + '.tmp'
+    if os.path.exists(raw_path):
+        os.remove(raw_path)
+
+    source = sqlite3.connect(source_path, isolation_level=None)
+    target = sqlite3.connect(raw_path)
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        def on_step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+
+        source.backup(target, pages=pages, progress=on_step, sleep=step_sleep)
+        source.execute("COMMIT")
+        page_count = target.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+
+    try:
+        integrity = check_integrity(raw_path) if verify else None
+        if integrity not in (None, "ok"):
+            raise sqlite3.DatabaseError(f"Sauvegarde corrompue: {integrity}")
+
+        if compress:
+            with open(raw_path, 'rb') as raw, gzip.open(dest_path, 'wb', compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+            os.remove(raw_path)
+        else:
+            os.replace(raw_path, dest_path)
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+    return {
+        "path": dest_path,
+        "pages": page_count,
+        "size": os.path.getsize(dest_path),
+        "compressed": compress,
+        "integrity": integrity,
+        "duration": time.perf_counter() - start,
+    }
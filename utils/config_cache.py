@@ -0,0 +1,125 @@
+# utils/config_cache.py
+import json
+import re
+from typing import Dict, Any, Optional, Tuple
+
+# Entier écrit sans zéro initial ni espace: "007" ou " 7" restent du texte
+INTEGER_PATTERN = re.compile(r"0|-?[1-9][0-9]*")
+
+def parse_config_value(value: Any) -> Any:
+    """
+    Convertit une valeur de configuration saisie en texte vers son type.
+    Seuls les littéraux exacts true/false et les entiers simples sont convertis;
+    tout le reste est gardé tel que saisi.
+    """
+    if not isinstance(value, str):
+        return value
+    if INTEGER_PATTERN.fullmatch(value):
+        return int(value)
+    if value == "true":
+        return True
+    if value == "false":
+        return False
+    return value
+
+def encode_config_value(value: Any) -> Tuple[str, str]:
+    """Convertit une valeur en (texte, type) pour la table server_config_values"""
+    value = parse_config_value(value)
+    # bool avant int: True est aussi une instance de int
+    if isinstance(value, bool):
+        return ("1" if value else "0"), "bool"
+    if isinstance(value, int):
+        return str(value), "int"
+    if isinstance(value, float):
+        return repr(value), "float"
+    if isinstance(value, str):
+        return value, "str"
+    return json.dumps(value), "json"
+
+def decode_config_value(value: str, value_type: str) -> Any:
+    """Opération inverse de encode_config_value"""
+    if value_type == "bool":
+        return value == "1"
+    if value_type == "int":
+        return int(value)
+    if value_type == "float":
+        return float(value)
+    if value_type == "json":
+        return json.loads(value)
+    return value
+
+class ServerConfigCache:
+    """
+    Cache en mémoire des configurations de serveur, valeurs déjà typées.
+    Une fois chargé en bloc (complete=True), un serveur absent du cache n'a
+    simplement pas de configuration: la base n'est plus jamais interrogée.
+    Chaque écriture incrémente la version du serveur; une lecture en base ne
+    remplit le cache que si aucune écriture n'a eu lieu depuis son début.
+    """
+
+    def __init__(self):
+        self._configs: Dict[int, Dict[str, Any]] = {}
+        self._versions: Dict[int, int] = {}
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, server_id: int) -> Optional[Dict[str, Any]]:
+        """Retourne une copie de la configuration, ou None si elle doit être lue en base"""
+        config = self._configs.get(server_id)
+        if config is None and self.complete:
+            config = {}
+        if config is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(config)
+
+    def version(self, server_id: int) -> int:
+        """Numéro de la dernière écriture du serveur, à relever avant une lecture en base"""
+        return self._versions.get(server_id, 0)
+
+    def set(self, server_id: int, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Met en cache une configuration écrite (déjà validée en base) et retourne sa version typée"""
+        self._versions[server_id] = self.version(server_id) + 1
+        parsed = {key: parse_config_value(value) for key, value in config.items()}
+        self._configs[server_id] = parsed
+        return dict(parsed)
+
+    def set_read(self, server_id: int, config: Dict[str, Any], version: int) -> Dict[str, Any]:
+        """Met en cache une configuration lue en base, sauf si une écriture a eu lieu depuis `version`"""
+        parsed = {key: parse_config_value(value) for key, value in config.items()}
+        if version == self.version(server_id):
+            self._configs[server_id] = parsed
+        return dict(parsed)
+
+    def set_value(self, server_id: int, key: str, value: Any) -> None:
+        """Met à jour une seule clé (écriture déjà validée en base)"""
+        self._versions[server_id] = self.version(server_id) + 1
+        config = self._configs.get(server_id)
+        if config is None:
+            if not self.complete:
+                # Entrée absente d'un cache partiel: elle sera relue au prochain accès
+                return
+            config = self._configs[server_id] = {}
+        config[key] = parse_config_value(value)
+
+    def load(self, configs: Dict[int, Dict[str, Any]]) -> None:
+        """Chargement en bloc au démarrage"""
+        for server_id, config in configs.items():
+            self.set(server_id, config)
+        self.complete = True
+
+    def invalidate(self, server_id: int) -> None:
+        self._configs.pop(server_id, None)
+        # Un serveur invalidé doit être relu: le cache n'est plus exhaustif
+        self.complete = False
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "servers": len(self._configs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -1,83 +1,85 @@
 # utils/db_handler.py
 import sqlite3
 import os
-import json
 from typing import List, Dict, Any, Optional, Tuple
 
+from utils.migrations import migrate
+from utils.config_cache import encode_config_value, decode_config_value
+from utils.xp_engine import level_from_total_xp
+from utils.fake_invites import DISCORD_EPOCH, FAKE_YOUNG_ACCOUNT, FAKE_FAST_LEAVE, FAKE_REJOIN
+
+# Profil de stockage par défaut: WAL pour que les lecteurs ne bloquent pas l'écrivain,
+# synchronous=NORMAL (sûr en WAL, un fsync par checkpoint et non par transaction)
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,        # ms d'attente avant "database is locked"
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,        # négatif = en Kio (16 Mo)
+    "mmap_size": 268435456,      # 256 Mo
+    "temp_store": "MEMORY",
+}
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Any]) -> None:
+    """Applique un profil de stockage à une connexion"""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
 class DatabaseHandler:
-    def __init__(self, db_path: str = 'data/database.db'):
-        """Initialise la connexion à la base de données"""
+    def __init__(self, db_path: str = 'data/database.db', setup: bool = True, check_same_thread: bool = True,
+                 pragmas: Optional[Dict[str, Any]] = None):
+        """
+        Initialise la connexion à la base de données.
+        setup=False évite de rejouer le schéma (connexions de lecture du pool)
+        """
         # Créer le dossier si nécessaire
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
         self.conn.row_factory = sqlite3.Row
+        apply_pragmas(self.conn, DEFAULT_PRAGMAS if pragmas is None else pragmas)
         self.cursor = self.conn.cursor()
-        self.setup_database()
+        # Désactivé pendant execute_batch: une seule transaction pour tout le lot
+        self._autocommit = True
+        if setup:
+            self.setup_database()
     
     def setup_database(self):
-        """Configure les tables nécessaires"""
-        # Créer la table pour les avertissements
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS warnings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Créer la table pour les actions de modération
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS mod_actions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            action_type TEXT NOT NULL,
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            duration INTEGER
-        )
-        ''')
-        
-        # Créer la table pour les configurations du serveur
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS server_configs (
-            server_id INTEGER PRIMARY KEY,
-            config_json TEXT
-        )
-        ''')
-        
-        # Créer la table pour le système de niveaux
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS levels (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            xp INTEGER DEFAULT 0,
-            level INTEGER DEFAULT 0,
-            last_message_time DATETIME,
-            UNIQUE(user_id, server_id)
-        )
-        ''')
-        
-        # Créer la table pour les rappels
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            server_id INTEGER NOT NULL,
-            channel_id INTEGER NOT NULL,
-            message TEXT,
-            remind_time DATETIME NOT NULL,
-            created_time DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        self.conn.commit()
+        """Met le schéma à jour (tables et index sont définis dans utils/migrations.py)"""
+        return migrate(self.conn)
+    
+    def _commit(self):
+        """Valide la transaction, sauf si l'opération fait partie d'un lot"""
+        if self._autocommit:
+            self.conn.commit()
+    
+    def execute_batch(self, operations: List[Tuple[str, tuple, dict]]) -> List[Tuple[bool, Any]]:
+        """
+        Exécute une liste d'opérations (méthode, args, kwargs) dans une seule transaction.
+        Chaque opération est isolée par un savepoint: un échec n'annule que celle-ci.
+        Retourne [(succès, résultat ou exception), ...] dans l'ordre des opérations
+        """
+        results = []
+        self._autocommit = False
+        try:
+            if not self.conn.in_transaction:
+                self.cursor.execute("BEGIN")
+            for method, args, kwargs in operations:
+                self.cursor.execute("SAVEPOINT batch_op")
+                try:
+                    result = getattr(self, method)(*args, **kwargs)
+                    self.cursor.execute("RELEASE batch_op")
+                    results.append((True, result))
+                except Exception as e:
+                    self.cursor.execute("ROLLBACK TO batch_op")
+                    self.cursor.execute("RELEASE batch_op")
+                    results.append((False, e))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._autocommit = True
+        return results
     
     # Méthodes pour les avertissements
     def add_warning(self, user_id: int, server_id: int, moderator_id: int, reason: str) -> int:
@@ -86,27 +88,72 @@ class DatabaseHandler:
         INSERT INTO warnings (user_id, server_id, moderator_id, reason)
         VALUES (?, ?, ?, ?)
         ''', (user_id, server_id, moderator_id, reason))
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
     
-    def get_warnings(self, user_id: int, server_id: int) -> List[Dict[str, Any]]:
-        """Récupère tous les avertissements d'un utilisateur"""
-        self.cursor.execute('''
-        SELECT id, moderator_id, reason, timestamp FROM warnings 
-        WHERE user_id = ? AND server_id = ?
-        ORDER BY timestamp DESC
-        ''', (user_id, server_id))
+    def get_warnings(self, user_id: int, server_id: int, limit: int = 10,
+                     before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Récupère une page d'avertissements d'un utilisateur, du plus récent au plus ancien.
+        `before` est le curseur (timestamp, id) de la dernière ligne de la page précédente.
+        """
+        if before is None:
+            self.cursor.execute('''
+            SELECT id, moderator_id, reason, timestamp FROM warnings 
+            WHERE user_id = ? AND server_id = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            ''', (user_id, server_id, limit))
+        else:
+            self.cursor.execute('''
+            SELECT id, moderator_id, reason, timestamp FROM warnings 
+            WHERE user_id = ? AND server_id = ? AND (timestamp, id) < (?, ?)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            ''', (user_id, server_id, before[0], before[1], limit))
         
         return [dict(row) for row in self.cursor.fetchall()]
     
     def get_warning_count(self, user_id: int, server_id: int) -> int:
-        """Récupère le nombre d'avertissements d'un utilisateur"""
+        """Récupère le nombre d'avertissements d'un utilisateur (compteur tenu à jour par triggers)"""
         self.cursor.execute('''
-        SELECT COUNT(*) FROM warnings 
-        WHERE user_id = ? AND server_id = ?
-        ''', (user_id, server_id))
+        SELECT count FROM warning_counts
+        WHERE server_id = ? AND user_id = ?
+        ''', (server_id, user_id))
+        
+        row = self.cursor.fetchone()
+        return row[0] if row else 0
+    
+    def rebuild_warning_counts(self) -> int:
+        """
+        Vérifie les compteurs d'avertissements contre la table warnings et les reconstruit.
+        Retourne le nombre de membres dont le compteur était faux
+        """
+        self.cursor.execute('''
+        WITH real_counts AS (
+            SELECT server_id, user_id, COUNT(*) AS count FROM warnings
+            GROUP BY server_id, user_id
+        ), stored_counts AS (
+            SELECT server_id, user_id, count FROM warning_counts
+            WHERE count != 0
+        )
+        SELECT COUNT(*) FROM (
+            SELECT server_id, user_id FROM (SELECT * FROM real_counts EXCEPT SELECT * FROM stored_counts)
+            UNION
+            SELECT server_id, user_id FROM (SELECT * FROM stored_counts EXCEPT SELECT * FROM real_counts)
+        )
+        ''')
+        mismatches = self.cursor.fetchone()[0]
         
-        return self.cursor.fetchone()[0]
+        if mismatches:
+            self.cursor.execute("DELETE FROM warning_counts")
+            self.cursor.execute('''
+            INSERT INTO warning_counts (server_id, user_id, count)
+            SELECT server_id, user_id, COUNT(*) FROM warnings
+            GROUP BY server_id, user_id
+            ''')
+            self._commit()
+        return mismatches
     
     def remove_warning(self, warning_id: int, user_id: int, server_id: int) -> bool:
         """Supprime un avertissement et retourne True si réussi"""
@@ -114,7 +161,7 @@ class DatabaseHandler:
         DELETE FROM warnings 
         WHERE id = ? AND user_id = ? AND server_id = ?
         ''', (warning_id, user_id, server_id))
-        self.conn.commit()
+        self._commit()
         return self.cursor.rowcount > 0
     
     def clear_warnings(self, user_id: int, server_id: int) -> int:
@@ -123,7 +170,7 @@ class DatabaseHandler:
         DELETE FROM warnings 
         WHERE user_id = ? AND server_id = ?
         ''', (user_id, server_id))
-        self.conn.commit()
+        self._commit()
         return self.cursor.rowcount
     
     # Méthodes pour les actions de modération
@@ -133,18 +180,28 @@ class DatabaseHandler:
         INSERT INTO mod_actions (action_type, user_id, server_id, moderator_id, reason, duration)
         VALUES (?, ?, ?, ?, ?, ?)
         ''', (action_type, user_id, server_id, moderator_id, reason, duration))
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
     
-    def get_mod_actions(self, user_id: int, server_id: int, limit: int = 15) -> List[Dict[str, Any]]:
-        """Récupère les actions de modération d'un utilisateur"""
-        self.cursor.execute('''
-        SELECT action_type, moderator_id, reason, timestamp, duration
-        FROM mod_actions 
-        WHERE user_id = ? AND server_id = ?
-        ORDER BY timestamp DESC
-        LIMIT ?
-        ''', (user_id, server_id, limit))
+    def get_mod_actions(self, user_id: int, server_id: int, limit: int = 15,
+                        before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """Récupère une page d'actions de modération d'un utilisateur (même curseur que get_warnings)"""
+        if before is None:
+            self.cursor.execute('''
+            SELECT id, action_type, moderator_id, reason, timestamp, duration
+            FROM mod_actions 
+            WHERE user_id = ? AND server_id = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            ''', (user_id, server_id, limit))
+        else:
+            self.cursor.execute('''
+            SELECT id, action_type, moderator_id, reason, timestamp, duration
+            FROM mod_actions 
+            WHERE user_id = ? AND server_id = ? AND (timestamp, id) < (?, ?)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            ''', (user_id, server_id, before[0], before[1], limit))
         
         return [dict(row) for row in self.cursor.fetchall()]
     
@@ -152,79 +209,111 @@ class DatabaseHandler:
     def get_server_config(self, server_id: int) -> Dict[str, Any]:
         """Récupère la configuration d'un serveur"""
         self.cursor.execute('''
-        SELECT config_json FROM server_configs 
+        SELECT key, value, type FROM server_config_values
         WHERE server_id = ?
         ''', (server_id,))
         
+        return {row[0]: decode_config_value(row[1], row[2]) for row in self.cursor.fetchall()}
+    
+    def get_server_config_value(self, server_id: int, key: str, default: Any = None) -> Any:
+        """Récupère une seule clé de configuration d'un serveur"""
+        self.cursor.execute('''
+        SELECT value, type FROM server_config_values
+        WHERE server_id = ? AND key = ?
+        ''', (server_id, key))
+        
         row = self.cursor.fetchone()
         if row:
-            return json.loads(row[0])
-        return {}
+            return decode_config_value(row[0], row[1])
+        return default
+    
+    def get_all_server_configs(self) -> Dict[int, Dict[str, Any]]:
+        """Récupère la configuration de tous les serveurs (chargement du cache)"""
+        self.cursor.execute('''
+        SELECT server_id, key, value, type FROM server_config_values
+        ''')
+        
+        configs: Dict[int, Dict[str, Any]] = {}
+        for row in self.cursor.fetchall():
+            configs.setdefault(row[0], {})[row[1]] = decode_config_value(row[2], row[3])
+        return configs
+    
+    def set_server_config_value(self, server_id: int, key: str, value: Any) -> None:
+        """Définit une seule clé de configuration d'un serveur"""
+        self.cursor.execute('''
+        INSERT INTO server_config_values (server_id, key, value, type)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(server_id, key) DO UPDATE SET value = excluded.value, type = excluded.type
+        ''', (server_id, key, *encode_config_value(value)))
+        self._commit()
     
     def update_server_config(self, server_id: int, config: Dict[str, Any]) -> None:
-        """Met à jour la configuration d'un serveur"""
-        config_json = json.dumps(config)
+        """Remplace toute la configuration d'un serveur"""
         self.cursor.execute('''
-        INSERT OR REPLACE INTO server_configs (server_id, config_json)
-        VALUES (?, ?)
-        ''', (server_id, config_json))
-        self.conn.commit()
+        DELETE FROM server_config_values WHERE server_id = ?
+        ''', (server_id,))
+        self.cursor.executemany('''
+        INSERT INTO server_config_values (server_id, key, value, type)
+        VALUES (?, ?, ?, ?)
+        ''', [(server_id, key, *encode_config_value(value)) for key, value in config.items()])
+        self._commit()
     
     # Méthodes pour le système de niveaux
     def add_xp(self, user_id: int, server_id: int, xp_amount: int) -> Tuple[int, int, bool]:
         """
-        Ajoute de l'XP à un utilisateur et retourne (xp_total, niveau, level_up)
+        Ajoute de l'XP à un utilisateur et retourne (xp_dans_le_niveau, niveau, level_up)
         où level_up est True si l'utilisateur a gagné un niveau
         """
-        # Vérifier si l'utilisateur existe déjà dans la table
         self.cursor.execute('''
-        SELECT xp, level FROM levels
+        SELECT total_xp, level FROM levels
         WHERE user_id = ? AND server_id = ?
         ''', (user_id, server_id))
         
         row = self.cursor.fetchone()
-        if row:
-            current_xp = row[0]
-            current_level = row[1]
-        else:
-            current_xp = 0
-            current_level = 0
-            # Créer une entrée pour l'utilisateur
-            self.cursor.execute('''
-            INSERT INTO levels (user_id, server_id, xp, level, last_message_time)
-            VALUES (?, ?, 0, 0, CURRENT_TIMESTAMP)
-            ''', (user_id, server_id))
-        
-        # Calculer le nouvel XP et le niveau
-        new_xp = current_xp + xp_amount
-        # Formule pour calculer l'XP requis pour le prochain niveau: 5 * (lvl ^ 2) + 50 * lvl + 100
-        xp_required = 5 * (current_level ** 2) + 50 * current_level + 100
-        
-        level_up = False
-        new_level = current_level
-        
-        # Vérifier si l'utilisateur a gagné un niveau
-        while new_xp >= xp_required:
-            new_level += 1
-            new_xp -= xp_required
-            level_up = True
-            # Recalculer l'XP requis pour le prochain niveau
-            xp_required = 5 * (new_level ** 2) + 50 * new_level + 100
-        
-        # Mettre à jour la base de données
-        self.cursor.execute('''
-        UPDATE levels
-        SET xp = ?, level = ?, last_message_time = CURRENT_TIMESTAMP
-        WHERE user_id = ? AND server_id = ?
-        ''', (new_xp, new_level, user_id, server_id))
+        total_xp, current_level = (row[0], row[1]) if row else (0, 0)
+        
+        # Le niveau se déduit de l'XP totale, quel que soit le montant ajouté
+        total_xp += xp_amount
+        new_level, new_xp = level_from_total_xp(total_xp)
+        
+        self.cursor.execute('''
+        INSERT INTO levels (user_id, server_id, total_xp, xp, level, last_message_time)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(user_id, server_id) DO UPDATE SET
+            total_xp = excluded.total_xp,
+            xp = excluded.xp,
+            level = excluded.level,
+            last_message_time = excluded.last_message_time
+        ''', (user_id, server_id, total_xp, new_xp, new_level))
         
-        self.conn.commit()
-        return (new_xp, new_level, level_up)
+        self._commit()
+        return (new_xp, new_level, new_level > current_level)
+    
+    def save_levels(self, rows: List[Tuple[int, int, int]]) -> None:
+        """
+        Enregistre en une fois l'XP totale (user_id, server_id, total_xp) des membres
+        modifiés; niveau et XP dans le niveau en sont déduits. Sert aussi aux imports.
+        """
+        params = []
+        for user_id, server_id, total_xp in rows:
+            level, xp = level_from_total_xp(total_xp)
+            params.append((user_id, server_id, total_xp, xp, level))
+        
+        self.cursor.executemany('''
+        INSERT INTO levels (user_id, server_id, total_xp, xp, level, last_message_time)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(user_id, server_id) DO UPDATE SET
+            total_xp = excluded.total_xp,
+            xp = excluded.xp,
+            level = excluded.level,
+            last_message_time = excluded.last_message_time
+        ''', params)
+        self._commit()
     
     def get_level_info(self, user_id: int, server_id: int) -> Dict[str, Any]:
         """Récupère les informations de niveau d'un utilisateur"""
         self.cursor.execute('''
-        SELECT xp, level, last_message_time FROM levels
+        SELECT xp, level, total_xp, last_message_time FROM levels
         WHERE user_id = ? AND server_id = ?
         ''', (user_id, server_id))
         
@@ -233,12 +322,14 @@ class DatabaseHandler:
             return {
                 "xp": row[0],
                 "level": row[1],
-                "last_message_time": row[2]
+                "total_xp": row[2],
+                "last_message_time": row[3]
             }
         
         return {
             "xp": 0,
             "level": 0,
+            "total_xp": 0,
             "last_message_time": None
         }
     
@@ -250,12 +341,21 @@ class DatabaseHandler:
         """Renvoie le curseur pour des opérations personnalisées"""
         return self.curso
 
+    def get_guild_levels(self, server_id: int) -> List[Dict[str, Any]]:
+        """Récupère l'XP et le niveau de tous les membres d'un serveur (chargement en mémoire)"""
+        self.cursor.execute('''
+        SELECT user_id, total_xp, level FROM levels
+        WHERE server_id = ?
+        ''', (server_id,))
+        
+        return [dict(row) for row in self.cursor.fetchall()]
+    
     def get_leaderboard(self, server_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Récupère le classement des niveaux"""
         self.cursor.execute('''
-        SELECT user_id, xp, level FROM levels
+        SELECT user_id, xp, level, total_xp FROM levels
         WHERE server_id = ?
-        ORDER BY level DESC, xp DESC
+        ORDER BY total_xp DESC
         LIMIT ?
         ''', (server_id, limit))
         
@@ -268,7 +368,7 @@ class DatabaseHandler:
         INSERT INTO reminders (user_id, server_id, channel_id, message, remind_time)
         VALUES (?, ?, ?, ?, ?)
         ''', (user_id, server_id, channel_id, message, remind_time))
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
     
     def get_due_reminders(self) -> List[Dict[str, Any]]:
@@ -281,13 +381,362 @@ class DatabaseHandler:
         
         return [dict(row) for row in self.cursor.fetchall()]
     
+    def get_next_reminders(self, limit: int) -> List[Tuple[str, int]]:
+        """Retourne les (remind_time, id) des `limit` prochains rappels, les plus proches d'abord"""
+        self.cursor.execute('''
+        SELECT remind_time, id FROM reminders
+        ORDER BY remind_time, id
+        LIMIT ?
+        ''', (limit,))
+        
+        return [tuple(row) for row in self.cursor.fetchall()]
+    
+    def get_reminders(self, reminder_ids: List[int]) -> List[Dict[str, Any]]:
+        """Récupère le contenu d'un lot de rappels"""
+        placeholders = ", ".join("?" * len(reminder_ids))
+        self.cursor.execute(f'''
+        SELECT id, user_id, server_id, channel_id, message, remind_time, created_time
+        FROM reminders
+        WHERE id IN ({placeholders})
+        ORDER BY remind_time, id
+        ''', reminder_ids)
+        
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def remove_reminders(self, reminder_ids: List[int]) -> int:
+        """Supprime un lot de rappels et retourne le nombre de rappels supprimés"""
+        self.cursor.executemany('''
+        DELETE FROM reminders 
+        WHERE id = ?
+        ''', [(reminder_id,) for reminder_id in reminder_ids])
+        self._commit()
+        return self.cursor.rowcount
+    
     def remove_reminder(self, reminder_id: int) -> bool:
         """Supprime un rappel et retourne True si réussi"""
         self.cursor.execute('''
         DELETE FROM reminders 
         WHERE id = ?
         ''', (reminder_id,))
-        self.conn.commit()
+        self._commit()
+        return self.cursor.rowcount > 0
+    
+    # Méthodes pour les giveaways
+    def add_giveaway(self, server_id: int, channel_id: int, message_id: int, host_id: int,
+                     prize: str, winners: int, end_time: str) -> int:
+        """Enregistre un giveaway et retourne son ID"""
+        self.cursor.execute('''
+        INSERT INTO giveaways (server_id, channel_id, message_id, host_id, prize, winners, end_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (server_id, channel_id, message_id, host_id, prize, winners, end_time))
+        self._commit()
+        return self.cursor.lastrowid
+    
+    def get_next_giveaways(self, limit: int) -> List[Tuple[str, int]]:
+        """Retourne les (end_time, id) des `limit` prochains giveaways en cours"""
+        self.cursor.execute('''
+        SELECT end_time, id FROM giveaways
+        WHERE ended = 0
+        ORDER BY end_time, id
+        LIMIT ?
+        ''', (limit,))
+        
+        return [tuple(row) for row in self.cursor.fetchall()]
+    
+    def get_giveaways(self, giveaway_ids: List[int]) -> List[Dict[str, Any]]:
+        """Récupère un lot de giveaways en cours"""
+        placeholders = ", ".join("?" * len(giveaway_ids))
+        self.cursor.execute(f'''
+        SELECT * FROM giveaways
+        WHERE id IN ({placeholders}) AND ended = 0
+        ''', giveaway_ids)
+        
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def get_giveaway_by_message(self, message_id: int) -> Optional[Dict[str, Any]]:
+        """Récupère un giveaway à partir de l'ID de son message"""
+        self.cursor.execute('''
+        SELECT * FROM giveaways
+        WHERE message_id = ?
+        ''', (message_id,))
+        
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def save_giveaway_winners(self, giveaway_id: int, winner_ids: List[int]) -> None:
+        """Enregistre les gagnants tirés d'un giveaway en cours, avant leur annonce"""
+        self.cursor.execute('''
+        UPDATE giveaways
+        SET winner_ids = ?
+        WHERE id = ? AND ended = 0
+        ''', (",".join(str(winner_id) for winner_id in winner_ids), giveaway_id))
+        self._commit()
+    
+    def postpone_giveaway(self, giveaway_id: int, end_time: str) -> bool:
+        """Reporte la fin d'un giveaway en cours après un échec et compte l'échec"""
+        self.cursor.execute('''
+        UPDATE giveaways
+        SET end_time = ?, attempts = attempts + 1
+        WHERE id = ? AND ended = 0
+        ''', (end_time, giveaway_id))
+        self._commit()
+        return self.cursor.rowcount > 0
+    
+    def finish_giveaway(self, giveaway_id: int, winner_ids: List[int]) -> None:
+        """Marque un giveaway comme terminé et enregistre ses gagnants"""
+        self.cursor.execute('''
+        UPDATE giveaways
+        SET ended = 1, winner_ids = ?
+        WHERE id = ?
+        ''', (",".join(str(winner_id) for winner_id in winner_ids), giveaway_id))
+        self._commit()
+    
+    # Méthodes pour le suivi des invitations
+    def add_invite_tracking(self, server_id: int, inviter_id: int, invited_id: int, invite_code: str,
+                            fake: int = 0) -> Dict[str, Any]:
+        """
+        Enregistre l'arrivée d'un membre et crédite son inviteur. Une arrivée fausse (`fake`,
+        ou membre déjà venu sur le serveur) compte aussi en invites_fake. Avec `inviter_id`
+        à 0 (inviteur inconnu), seule l'arrivée est enregistrée.
+        Retourne l'ID du suivi et son masque d'invitation fausse
+        """
+        self.cursor.execute('''
+        SELECT 1 FROM invite_tracking
+        WHERE server_id = ? AND invited_id = ?
+        LIMIT 1
+        ''', (server_id, invited_id))
+        if self.cursor.fetchone():
+            fake |= FAKE_REJOIN
+        
+        self.cursor.execute('''
+        INSERT INTO invite_tracking (server_id, inviter_id, invited_id, invite_code, fake)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (server_id, inviter_id, invited_id, invite_code, fake))
+        tracking_id = self.cursor.lastrowid
+        
+        if inviter_id:
+            self.cursor.execute('''
+            INSERT INTO invite_stats (user_id, server_id, invites_regular, invites_fake)
+            VALUES (?, ?, 1, ?)
+            ON CONFLICT(user_id, server_id) DO UPDATE SET
+            invites_regular = invites_regular + 1,
+            invites_fake = invites_fake + excluded.invites_fake
+            ''', (inviter_id, server_id, 1 if fake else 0))
+        
+        self._commit()
+        return {"id": tracking_id, "fake": fake}
+    
+    def credit_invites(self, server_id: int, inviter_id: int, count: int) -> None:
+        """Crédite un inviteur d'arrivées qui ne lui sont pas attribuées membre par membre"""
+        self.cursor.execute('''
+        INSERT INTO invite_stats (user_id, server_id, invites_regular)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, server_id) DO UPDATE SET
+        invites_regular = invites_regular + excluded.invites_regular
+        ''', (inviter_id, server_id, count))
+        self._commit()
+    
+    def get_invite_tracking(self, server_id: int, invited_id: int) -> Optional[Dict[str, Any]]:
+        """Récupère la dernière invitation utilisée par un membre"""
+        self.cursor.execute('''
+        SELECT inviter_id, invite_code, join_time FROM invite_tracking
+        WHERE server_id = ? AND invited_id = ?
+        ORDER BY join_time DESC LIMIT 1
+        ''', (server_id, invited_id))
+        
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def record_invite_left(self, server_id: int, invited_id: int, fast_leave_seconds: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Comptabilise le départ d'un membre invité: en invites_fake s'il part moins de
+        `fast_leave_seconds` après son arrivée, en invites_left sinon (rien si l'arrivée
+        était déjà fausse). Retourne l'ID de son inviteur et le masque d'invitation fausse
+        """
+        self.cursor.execute('''
+        SELECT id, inviter_id, fake, left_time,
+               (julianday('now') - julianday(join_time)) * 86400 AS stay
+        FROM invite_tracking
+        WHERE server_id = ? AND invited_id = ?
+        ORDER BY join_time DESC, id DESC LIMIT 1
+        ''', (server_id, invited_id))
+        tracking = self.cursor.fetchone()
+        if not tracking or tracking["left_time"] is not None:
+            return None
+        
+        fake = tracking["fake"]
+        if tracking["stay"] < fast_leave_seconds:
+            fake |= FAKE_FAST_LEAVE
+        self.cursor.execute('''
+        UPDATE invite_tracking
+        SET left_time = CURRENT_TIMESTAMP, fake = ?
+        WHERE id = ?
+        ''', (fake, tracking["id"]))
+        
+        if not tracking["fake"]:
+            counter = "invites_fake" if fake else "invites_left"
+            self.cursor.execute(f'''
+            UPDATE invite_stats
+            SET {counter} = {counter} + 1
+            WHERE user_id = ? AND server_id = ?
+            ''', (tracking["inviter_id"], server_id))
+        self._commit()
+        return {"inviter_id": tracking["inviter_id"], "fake": fake}
+    
+    def recompute_fake_invites(self, min_account_days: int, fast_leave_seconds: int,
+                               server_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Réapplique les règles d'invitations fausses à tout le suivi (d'un serveur ou de tous),
+        en un seul parcours de l'index (server_id, invited_id, join_time). Seuls les suivis dont
+        le masque change sont réécrits, et les statistiques des inviteurs sont corrigées de la
+        différence (les ajustements manuels de remove_invites sont conservés).
+        """
+        where = "WHERE server_id = ?" if server_id is not None else ""
+        params = (min_account_days, fast_leave_seconds) + ((server_id,) if server_id is not None else ())
+        
+        self.cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS fake_changes (
+            id INTEGER PRIMARY KEY,
+            server_id INTEGER,
+            inviter_id INTEGER,
+            old_fake INTEGER,
+            new_fake INTEGER,
+            has_left INTEGER
+        )
+        ''')
+        self.cursor.execute("DELETE FROM fake_changes")
+        self.cursor.execute(f'''
+        INSERT INTO fake_changes
+        SELECT id, server_id, inviter_id, old_fake, new_fake, has_left FROM (
+            SELECT id, server_id, inviter_id, fake AS old_fake, left_time IS NOT NULL AS has_left,
+                -- Âge du compte à l'arrivée, tiré du snowflake (en jours juliens)
+                (CASE WHEN julianday(join_time) - ((invited_id >> 22) + {DISCORD_EPOCH}) / 86400000.0 - 2440587.5 < ?
+                      THEN {FAKE_YOUNG_ACCOUNT} ELSE 0 END)
+                | (CASE WHEN left_time IS NOT NULL AND (julianday(left_time) - julianday(join_time)) * 86400 < ?
+                        THEN {FAKE_FAST_LEAVE} ELSE 0 END)
+                | (CASE WHEN ROW_NUMBER() OVER (PARTITION BY server_id, invited_id ORDER BY join_time, id) > 1
+                        THEN {FAKE_REJOIN} ELSE 0 END) AS new_fake
+            FROM invite_tracking
+            {where}
+        )
+        WHERE new_fake != old_fake
+        ''', params)
+        changed = self.cursor.rowcount
+        
+        self.cursor.execute('''
+        UPDATE invite_tracking SET fake = fake_changes.new_fake
+        FROM fake_changes
+        WHERE invite_tracking.id = fake_changes.id
+        ''')
+        # Une arrivée fausse compte en invites_fake; une arrivée réelle suivie d'un départ, en invites_left
+        self.cursor.execute('''
+        UPDATE invite_stats
+        SET invites_fake = invites_fake + delta.fake_delta,
+            invites_left = invites_left + delta.left_delta
+        FROM (
+            SELECT server_id, inviter_id,
+                   SUM((new_fake != 0) - (old_fake != 0)) AS fake_delta,
+                   SUM(CASE WHEN has_left THEN (new_fake = 0) - (old_fake = 0) ELSE 0 END) AS left_delta
+            FROM fake_changes
+            GROUP BY server_id, inviter_id
+        ) AS delta
+        WHERE invite_stats.user_id = delta.inviter_id AND invite_stats.server_id = delta.server_id
+              AND (delta.fake_delta != 0 OR delta.left_delta != 0)
+        ''')
+        inviters = self.cursor.rowcount
+        self.cursor.execute("DELETE FROM fake_changes")
+        self._commit()
+        return {"changed": changed, "inviters": inviters}
+    
+    def get_invite_edges(self, server_id: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Récupère le graphe des invitations d'un serveur: (invité, inviteur, masque fausse, présent)
+        pour la dernière arrivée de chaque membre, en un parcours de l'index (server_id, invited_id, join_time)
+        """
+        self.cursor.execute('''
+        SELECT invited_id, inviter_id, fake, left_time IS NULL
+        FROM invite_tracking
+        WHERE server_id = ?
+        ORDER BY invited_id, join_time, id
+        ''', (server_id,))
+        
+        # Les arrivées d'un membre sont consécutives, la dernière écrase les précédentes
+        latest = {}
+        for row in self.cursor:
+            latest[row[0]] = tuple(row)
+        return list(latest.values())
+    
+    def get_invite_stats(self, user_id: int, server_id: int) -> Optional[Dict[str, Any]]:
+        """Récupère les statistiques d'invitation d'un utilisateur"""
+        self.cursor.execute('''
+        SELECT invites_regular, invites_bonus, invites_fake, invites_left, total
+        FROM invite_stats
+        WHERE user_id = ? AND server_id = ?
+        ''', (user_id, server_id))
+        
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def get_invite_leaderboard(self, server_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Récupère les `limit` meilleurs inviteurs d'un serveur (total net décroissant)"""
+        self.cursor.execute('''
+        SELECT user_id, total FROM invite_stats
+        WHERE server_id = ?
+        ORDER BY total DESC, user_id
+        LIMIT ?
+        ''', (server_id, limit))
+        
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def get_invite_rank(self, user_id: int, server_id: int) -> Optional[Dict[str, Any]]:
+        """Récupère le rang (1 = premier, même ordre que le classement) et le total d'un membre"""
+        # Deux parcours de plage de l'index (server_id, total DESC, user_id)
+        self.cursor.execute('''
+        SELECT 1
+            + (SELECT COUNT(*) FROM invite_stats
+               WHERE server_id = s.server_id AND total > s.total)
+            + (SELECT COUNT(*) FROM invite_stats
+               WHERE server_id = s.server_id AND total = s.total AND user_id < s.user_id) AS rank,
+            s.total AS total
+        FROM invite_stats s
+        WHERE s.user_id = ? AND s.server_id = ?
+        ''', (user_id, server_id))
+        
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def get_server_invite_stats(self, server_id: int) -> List[Dict[str, Any]]:
+        """Récupère les statistiques d'invitation de tous les membres d'un serveur"""
+        self.cursor.execute('''
+        SELECT user_id, invites_regular, invites_bonus, invites_fake, invites_left, total
+        FROM invite_stats
+        WHERE server_id = ?
+        ''', (server_id,))
+        
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def add_bonus_invites(self, user_id: int, server_id: int, amount: int) -> None:
+        """Ajoute des invitations bonus à un utilisateur"""
+        self.cursor.execute('''
+        INSERT INTO invite_stats (user_id, server_id, invites_bonus)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, server_id) DO UPDATE SET
+        invites_bonus = invites_bonus + excluded.invites_bonus
+        ''', (user_id, server_id, amount))
+        self._commit()
+    
+    def remove_invites(self, user_id: int, server_id: int, amount: int) -> bool:
+        """
+        Retire des invitations à un utilisateur: d'abord sur les bonus s'ils suffisent,
+        sinon en ajoutant des invitations fausses. Retourne False si l'utilisateur n'a pas de stats
+        """
+        self.cursor.execute('''
+        UPDATE invite_stats
+        SET invites_bonus = CASE WHEN invites_bonus >= ? THEN invites_bonus - ? ELSE invites_bonus END,
+            invites_fake = CASE WHEN invites_bonus >= ? THEN invites_fake ELSE invites_fake + ? END
+        WHERE user_id = ? AND server_id = ?
+        ''', (amount, amount, amount, amount, user_id, server_id))
+        self._commit()
         return self.cursor.rowcount > 0
     
     def get_connection(self):
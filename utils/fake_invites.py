@@ -0,0 +1,65 @@
+# utils/fake_invites.py
+import datetime
+from typing import Any, Dict, Optional
+
+# Horodatage (ms) du premier snowflake Discord
+DISCORD_EPOCH = 1420070400000
+
+# Raisons d'une invitation fausse (masque de bits de invite_tracking.fake)
+FAKE_YOUNG_ACCOUNT = 1  # compte créé peu avant l'arrivée
+FAKE_FAST_LEAVE = 2  # départ peu après l'arrivée
+FAKE_REJOIN = 4  # membre déjà arrivé sur le serveur
+
+FAKE_REASONS = {
+    FAKE_YOUNG_ACCOUNT: "compte récent",
+    FAKE_FAST_LEAVE: "départ rapide",
+    FAKE_REJOIN: "déjà venu",
+}
+
+def snowflake_time(snowflake: int) -> datetime.datetime:
+    """Date de création (UTC) encodée dans un ID Discord"""
+    return datetime.datetime.fromtimestamp(((snowflake >> 22) + DISCORD_EPOCH) / 1000, datetime.timezone.utc)
+
+def account_age(user_id: int, moment: Optional[datetime.datetime] = None) -> datetime.timedelta:
+    """Âge du compte au moment donné (maintenant par défaut)"""
+    return (moment or datetime.datetime.now(datetime.timezone.utc)) - snowflake_time(user_id)
+
+def describe_fake(flags: int) -> str:
+    """Raisons lisibles d'un masque d'invitation fausse"""
+    return ", ".join(reason for flag, reason in FAKE_REASONS.items() if flags & flag)
+
+class FakeInviteDetector:
+    """
+    Détection des invitations fausses.
+    À chaque arrivée, l'âge du compte (tiré du snowflake) et un éventuel passage
+    précédent sur le serveur marquent le suivi; à chaque départ, un départ rapide
+    le marque à son tour. Les statistiques de l'inviteur sont ajustées au fil des
+    événements (une arrivée fausse compte en invites_fake, pas en invites_left).
+    recompute() réapplique les règles à tout l'historique en une passe.
+    """
+
+    def __init__(self, db, min_account_days: int = 7, fast_leave_seconds: int = 3600):
+        self.db = db
+        self.min_account_days = min_account_days
+        self.fast_leave_seconds = fast_leave_seconds
+
+    def join_flags(self, user_id: int, joined_at: Optional[datetime.datetime] = None) -> int:
+        """Raisons connues dès l'arrivée (le retour d'un membre est vérifié par la base)"""
+        if account_age(user_id, joined_at) < datetime.timedelta(days=self.min_account_days):
+            return FAKE_YOUNG_ACCOUNT
+        return 0
+
+    async def on_join(self, server_id: int, inviter_id: int, user_id: int, invite_code: str,
+                      joined_at: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """Enregistre l'arrivée, retourne {"id": ..., "fake": masque}"""
+        return await self.db.add_invite_tracking(
+            server_id, inviter_id, user_id, invite_code, self.join_flags(user_id, joined_at)
+        )
+
+    async def on_leave(self, server_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Enregistre le départ, retourne {"inviter_id": ..., "fake": masque} ou None si l'arrivée est inconnue"""
+        return await self.db.record_invite_left(server_id, user_id, self.fast_leave_seconds)
+
+    async def recompute(self, server_id: Optional[int] = None) -> Dict[str, int]:
+        """Réapplique les règles à tout le suivi (d'un serveur ou de tous)"""
+        return await self.db.recompute_fake_invites(self.min_account_days, self.fast_leave_seconds, server_id)
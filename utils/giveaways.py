@@ -0,0 +1,88 @@
+# utils/giveaways.py
+import datetime
+import hashlib
+import heapq
+from typing import Any, AsyncIterable, Awaitable, Callable, Collection, Dict, List, Optional, Tuple
+
+import discord
+
+from utils.scheduler import DeadlineScheduler, to_db_time
+
+def draw_priority(seed: int, user_id: int) -> int:
+    """Priorité pseudo-aléatoire d'un participant, stable pour un tirage donné"""
+    digest = hashlib.blake2b(f"{seed}:{user_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def parse_winner_ids(winner_ids: Optional[str]) -> Optional[List[int]]:
+    """Gagnants enregistrés d'un giveaway (None s'ils n'ont pas encore été tirés)"""
+    if winner_ids is None:
+        return None
+    return [int(winner_id) for winner_id in winner_ids.split(",") if winner_id]
+
+async def draw_winners(users: AsyncIterable, count: int, seed: int, exclude: Collection[int] = ()) -> List[Any]:
+    """
+    Tire `count` gagnants en parcourant les participants page par page.
+    Échantillonnage par réservoir à priorités: chaque participant reçoit une
+    priorité dérivée de (seed, id) et les `count` plus petites sont gardées.
+    Un doublon retrouve la même priorité et n'est jamais compté deux fois;
+    la mémoire reste en O(count) quel que soit le nombre de participants.
+    """
+    # Tas max (priorités négées) des `count` meilleurs participants
+    reservoir: List[Tuple[int, int, Any]] = []
+    kept = set()
+    async for user in users:
+        if user.id in exclude or user.id in kept:
+            continue
+        priority = draw_priority(seed, user.id)
+        if len(reservoir) < count:
+            heapq.heappush(reservoir, (-priority, user.id, user))
+            kept.add(user.id)
+        elif priority < -reservoir[0][0]:
+            _, removed_id, _ = heapq.heapreplace(reservoir, (-priority, user.id, user))
+            kept.discard(removed_id)
+            kept.add(user.id)
+    return [user for _, _, user in sorted(reservoir, reverse=True)]
+
+class GiveawayScheduler(DeadlineScheduler):
+    """
+    Termine les giveaways persistants à leur échéance, y compris après un redémarrage.
+    `finish` enregistre les gagnants tirés avant de les annoncer, et ne marque le
+    giveaway terminé qu'une fois l'annonce faite: un nouvel essai annonce les mêmes.
+    Une erreur passagère (5xx, limite de débit, délai dépassé) est retentée avec un
+    délai doublé à chaque échec, de `retry_delay` à `max_retry_delay` secondes;
+    l'échéance reportée et le nombre d'échecs sont enregistrés en base, la fenêtre
+    rechargée (redémarrage, restauration) respecte donc le délai.
+    """
+
+    def __init__(self, db, finish: Callable[[Dict[str, Any]], Awaitable[None]],
+                 retry_delay: float = 60, max_retry_delay: float = 3600, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+        self.finish = finish
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+    async def load_next(self, limit: int) -> List[Tuple[str, int]]:
+        return await self.db.get_next_giveaways(limit)
+
+    async def process_due(self, giveaway_ids: List[int]) -> int:
+        giveaways = await self.db.get_giveaways(giveaway_ids)
+        for giveaway in giveaways:
+            giveaway_id = giveaway["id"]
+            try:
+                await self.finish(giveaway)
+            except (discord.NotFound, discord.Forbidden) as e:
+                print(f"Erreur lors de la fin du giveaway #{giveaway_id}: {e}")
+                # Message ou canal supprimé, accès retiré: le giveaway ne pourra pas se terminer,
+                # il est clos sans effacer les gagnants déjà tirés
+                current = await self.db.get_giveaways([giveaway_id])
+                if current:
+                    await self.db.finish_giveaway(giveaway_id, parse_winner_ids(current[0]["winner_ids"]) or [])
+            except Exception as e:
+                delay = min(self.retry_delay * 2 ** giveaway["attempts"], self.max_retry_delay)
+                print(f"Erreur lors de la fin du giveaway #{giveaway_id} (nouvel essai dans {delay:.0f} s): {e}")
+                retry_time = to_db_time(self.clock() + datetime.timedelta(seconds=delay))
+                # Giveaway terminé entre-temps: rien à retenter
+                if await self.db.postpone_giveaway(giveaway_id, retry_time):
+                    self.schedule(retry_time, giveaway_id)
+        return len(giveaways)
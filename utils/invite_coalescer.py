@@ -0,0 +1,92 @@
+# utils/invite_coalescer.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.invite_snapshot import InviteEntry, InviteSnapshot, invite_entry
+
+def match_joins(members: List[Any], old: Optional[InviteSnapshot], new: Dict[str, Any],
+                carry: Optional[Dict[str, int]] = None,
+                now: Optional[float] = None
+                ) -> Tuple[List[Tuple[Any, Optional[InviteEntry]]], Dict[int, int], Dict[str, int]]:
+    """
+    Attribue un lot d'arrivées (dans l'ordre) aux invitations dont le compteur a augmenté,
+    `new` étant la réponse de guild.invites() sous forme de dict {code: discord.Invite}.
+    Retourne [(membre, invitation ou None), ...], les crédits {inviteur: nombre} d'un lot
+    ambigu et les utilisations restées sans membre, à reporter sur le lot suivant (arrivée
+    comptée par Discord mais pas encore reçue).
+    Si les invitations utilisées sont toutes du même inviteur, chaque membre lui est
+    attribué. Sinon seul le nombre d'arrivées par inviteur est sûr: aucun membre n'est
+    attribué et ces nombres sont retournés dans les crédits.
+    Sans état précédent (`old` à None), aucune arrivée n'est attribuée.
+    """
+    if old is None:
+        return [(member, None) for member in members], {}, {}
+    deltas = old.diff(new, now)
+    for code, used in (carry or {}).items():
+        deltas[code] = deltas.get(code, 0) + used
+    slots = []
+    for code, used in deltas.items():
+        invite = new.get(code)
+        entry = invite_entry(invite) if invite is not None else old.get(code)
+        if entry is not None:
+            slots.extend([entry] * used)
+    claimed = slots[:len(members)]
+
+    leftover: Dict[str, int] = {}
+    for entry in slots[len(members):]:
+        leftover[entry.code] = leftover.get(entry.code, 0) + 1
+
+    if len({entry.inviter_id for entry in claimed}) > 1:
+        # Appariement membre/inviteur inconnu: ne créditer que les nombres par inviteur
+        credits: Dict[int, int] = {}
+        for entry in claimed:
+            if entry.inviter_id:
+                credits[entry.inviter_id] = credits.get(entry.inviter_id, 0) + 1
+        return [(member, None) for member in members], credits, leftover
+    pairs = [(member, claimed[i] if i < len(claimed) else None) for i, member in enumerate(members)]
+    return pairs, {}, leftover
+
+class JoinCoalescer:
+    """
+    Regroupe les arrivées d'un serveur qui tombent dans la même fenêtre.
+    La première arrivée ouvre une fenêtre de `window` secondes; à sa fermeture, le lot
+    entier est passé à `resolve(guild_id, members)`, soit une seule récupération des
+    invitations par lot. Un seul lot est traité à la fois par serveur: les arrivées
+    pendant le traitement forment le lot suivant.
+    """
+
+    def __init__(self, resolve: Callable[[int, List[Any]], Awaitable[None]], window: float = 1.0):
+        self.resolve = resolve
+        self.window = window
+        self._pending: Dict[int, List[Any]] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.joins = 0
+        self.batches = 0
+
+    def add(self, guild_id: int, member: Any) -> None:
+        self.joins += 1
+        self._pending.setdefault(guild_id, []).append(member)
+        task = self._tasks.get(guild_id)
+        if task is None or task.done():
+            self._tasks[guild_id] = asyncio.create_task(self._drain(guild_id))
+
+    async def _drain(self, guild_id: int) -> None:
+        try:
+            while self._pending.get(guild_id):
+                await asyncio.sleep(self.window)
+                members = self._pending.pop(guild_id)
+                self.batches += 1
+                try:
+                    await self.resolve(guild_id, members)
+                except Exception as e:
+                    print(f"Erreur lors du traitement d'un lot de {len(members)} arrivée(s) sur le serveur {guild_id}: {e}")
+        finally:
+            self._tasks.pop(guild_id, None)
+
+    async def close(self) -> None:
+        """Annule les lots en attente"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
@@ -0,0 +1,164 @@
+# utils/invite_graph.py
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+class InviteTree:
+    """
+    Arbre des invitations d'un serveur: chaque membre pointe vers l'inviteur de sa
+    dernière arrivée. Chaque nœud garde la taille de son sous-arbre (membres
+    présents et invités pour de vrai, lui compris), mise à jour en remontant la
+    chaîne des inviteurs à chaque arrivée ou départ: O(profondeur) par événement,
+    O(1) pour lire le nombre de membres amenés directement et indirectement.
+    """
+
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+        self.children: Dict[int, Set[int]] = {}
+        # 1 si le membre est présent et son invitation réelle, 0 sinon
+        self.weight: Dict[int, int] = {}
+        # Somme des poids du sous-arbre
+        self.size: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    def _node(self, user_id: int) -> None:
+        if user_id not in self.size:
+            self.size[user_id] = 0
+            self.weight[user_id] = 0
+
+    def _add_up(self, user_id: Optional[int], delta: int) -> None:
+        """Ajoute `delta` au sous-arbre de user_id et de tous ses ancêtres"""
+        while user_id is not None:
+            self.size[user_id] += delta
+            user_id = self.parent.get(user_id)
+
+    def _in_subtree(self, user_id: int, root: int) -> bool:
+        while user_id is not None:
+            if user_id == root:
+                return True
+            user_id = self.parent.get(user_id)
+        return False
+
+    def join(self, user_id: int, inviter_id: Optional[int], counted: bool = True) -> None:
+        """Arrivée (ou retour) d'un membre via l'invitation de inviter_id"""
+        self._node(user_id)
+        # Un retour ne doit pas créer de cycle (A invite B, B réinvite A): le membre devient une racine
+        if inviter_id is not None and self._in_subtree(inviter_id, user_id):
+            inviter_id = None
+
+        old_parent = self.parent.get(user_id)
+        if old_parent != inviter_id:
+            if old_parent is not None:
+                self.children[old_parent].discard(user_id)
+                self._add_up(old_parent, -self.size[user_id])
+                del self.parent[user_id]
+            if inviter_id is not None:
+                self._node(inviter_id)
+                self.parent[user_id] = inviter_id
+                self.children.setdefault(inviter_id, set()).add(user_id)
+                self._add_up(inviter_id, self.size[user_id])
+
+        weight = 1 if counted else 0
+        if weight != self.weight[user_id]:
+            self._add_up(user_id, weight - self.weight[user_id])
+            self.weight[user_id] = weight
+
+    def leave(self, user_id: int) -> None:
+        """Départ d'un membre: ses invités restent rattachés à lui"""
+        if self.weight.get(user_id):
+            self.weight[user_id] = 0
+            self._add_up(user_id, -1)
+
+    def direct(self, user_id: int) -> int:
+        """Membres présents amenés directement"""
+        return sum(self.weight[child] for child in self.children.get(user_id, ()))
+
+    def network(self, user_id: int) -> int:
+        """Membres présents amenés directement et indirectement"""
+        return self.size.get(user_id, 0) - self.weight.get(user_id, 0)
+
+    def top_invited(self, user_id: int, count: int = 10) -> List[Tuple[int, int]]:
+        """[(membre, taille de son sous-arbre), ...] des invités directs aux plus grands réseaux"""
+        children = self.children.get(user_id, ())
+        ranked = sorted(((self.size[child], child) for child in children if self.size[child]), reverse=True)
+        return [(child, size) for size, child in ranked[:count]]
+
+    def chain(self, user_id: int, limit: int = 5) -> List[int]:
+        """Inviteur, inviteur de l'inviteur... jusqu'à `limit` niveaux"""
+        chain = []
+        user_id = self.parent.get(user_id)
+        while user_id is not None and len(chain) < limit:
+            chain.append(user_id)
+            user_id = self.parent.get(user_id)
+        return chain
+
+class InviteGraph:
+    """
+    Arbres d'invitations des serveurs, chargés à la première consultation depuis
+    invite_tracking puis tenus à jour par les arrivées et départs. Les événements
+    reçus pendant un chargement sont rejoués ensuite (join et leave sont idempotents).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._trees: Dict[int, InviteTree] = {}
+        self._loading: Dict[int, asyncio.Task] = {}
+        # Événements reçus pendant le chargement d'un serveur
+        self._pending: Dict[int, List[Tuple]] = {}
+        # Incrémenté par clear(): un arbre chargé avant n'est pas gardé
+        self._generation = 0
+
+    async def get(self, server_id: int) -> InviteTree:
+        tree = self._trees.get(server_id)
+        if tree is not None:
+            return tree
+        task = self._loading.get(server_id)
+        if task is None:
+            task = self._loading[server_id] = asyncio.create_task(self._load(server_id))
+        return await asyncio.shield(task)
+
+    async def _load(self, server_id: int) -> InviteTree:
+        self._pending[server_id] = []
+        generation = self._generation
+        try:
+            tree = self.build(await self.db.get_invite_edges(server_id))
+            for event in self._pending[server_id]:
+                getattr(tree, event[0])(*event[1:])
+            if generation == self._generation:
+                self._trees[server_id] = tree
+            return tree
+        finally:
+            self._pending.pop(server_id, None)
+            self._loading.pop(server_id, None)
+
+    @staticmethod
+    def build(edges: Iterable[Tuple[int, int, int, int]]) -> InviteTree:
+        """Construit un arbre à partir des (invité, inviteur, masque fausse, présent)"""
+        tree = InviteTree()
+        for invited_id, inviter_id, fake, active in edges:
+            # inviter_id à 0: inviteur inconnu, le membre est une racine
+            tree.join(invited_id, inviter_id or None, counted=bool(active) and not fake)
+        return tree
+
+    def _apply(self, server_id: int, *event) -> None:
+        tree = self._trees.get(server_id)
+        if tree is not None:
+            getattr(tree, event[0])(*event[1:])
+        elif server_id in self._pending:
+            self._pending[server_id].append(event)
+
+    def join(self, server_id: int, user_id: int, inviter_id: int, counted: bool = True) -> None:
+        self._apply(server_id, "join", user_id, inviter_id, counted)
+
+    def leave(self, server_id: int, user_id: int) -> None:
+        self._apply(server_id, "leave", user_id)
+
+    def invalidate(self, server_id: int) -> None:
+        """Oublie l'arbre d'un serveur (rechargé à la prochaine consultation)"""
+        self._trees.pop(server_id, None)
+
+    def clear(self) -> None:
+        """Oublie tous les arbres (base restaurée)"""
+        self._generation += 1
+        self._trees.clear()
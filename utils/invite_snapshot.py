@@ -0,0 +1,137 @@
+# utils/invite_snapshot.py
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+
+class InviteEntry(NamedTuple):
+    """Ce que le suivi des arrivées garde d'une invitation"""
+    code: str
+    uses: int
+    inviter_id: int  # 0 si l'invitation n'a pas d'auteur (URL personnalisée, widget)
+    max_uses: int  # 0 = illimitée
+    expires_at: float  # horodatage Unix, 0 = n'expire pas
+
+def invite_entry(invite) -> InviteEntry:
+    """Extrait l'entrée compacte d'un discord.Invite"""
+    return InviteEntry(
+        invite.code,
+        invite.uses or 0,
+        invite.inviter.id if invite.inviter else 0,
+        invite.max_uses or 0,
+        invite.expires_at.timestamp() if invite.expires_at else 0.0,
+    )
+
+class InviteSnapshot:
+    """
+    État des invitations d'un serveur, sans les objets discord.Invite.
+    Les champs sont rangés dans des tableaux parallèles, dans l'ordre de la
+    réponse de guild.invites() (quelques octets par invitation au lieu d'un
+    graphe d'objets). Les tableaux ne servent qu'au stockage: une nouvelle
+    réponse est comparée sous forme de dict {code: discord.Invite}, d'un seul
+    parcours quand elle liste les mêmes codes dans le même ordre, puis ses
+    compteurs sont reportés sur place.
+    """
+    __slots__ = ("_codes", "_uses", "_inviters", "_max_uses", "_expires")
+
+    def __init__(self, entries: Iterable[InviteEntry] = ()):
+        entries = list(entries)
+        self._codes = [entry.code for entry in entries]
+        self._uses = array("l", [entry.uses for entry in entries])
+        self._inviters = array("q", [entry.inviter_id for entry in entries])
+        self._max_uses = array("l", [entry.max_uses for entry in entries])
+        self._expires = array("d", [entry.expires_at for entry in entries])
+
+    @classmethod
+    def from_invites(cls, invites) -> "InviteSnapshot":
+        """Construit l'état directement depuis une réponse de guild.invites()"""
+        invites = list(invites)
+        snapshot = cls.__new__(cls)
+        snapshot._codes = [invite.code for invite in invites]
+        snapshot._uses = array("l", [invite.uses or 0 for invite in invites])
+        snapshot._inviters = array("q", [invite.inviter.id if invite.inviter else 0 for invite in invites])
+        snapshot._max_uses = array("l", [invite.max_uses or 0 for invite in invites])
+        snapshot._expires = array("d", [invite.expires_at.timestamp() if invite.expires_at else 0.0 for invite in invites])
+        return snapshot
+
+    def _index(self, code: str) -> int:
+        try:
+            return self._codes.index(code)
+        except ValueError:
+            return -1
+
+    def _entry(self, i: int) -> InviteEntry:
+        return InviteEntry(self._codes[i], self._uses[i], self._inviters[i], self._max_uses[i], self._expires[i])
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __contains__(self, code: str) -> bool:
+        return self._index(code) >= 0
+
+    def __iter__(self) -> Iterator[InviteEntry]:
+        return (self._entry(i) for i in range(len(self._codes)))
+
+    def get(self, code: str) -> Optional[InviteEntry]:
+        i = self._index(code)
+        return self._entry(i) if i >= 0 else None
+
+    def set(self, entry: InviteEntry) -> None:
+        """Ajoute ou remplace une invitation (création d'invitation)"""
+        i = self._index(entry.code)
+        if i >= 0:
+            self._uses[i], self._inviters[i] = entry.uses, entry.inviter_id
+            self._max_uses[i], self._expires[i] = entry.max_uses, entry.expires_at
+            return
+        self._codes.append(entry.code)
+        self._uses.append(entry.uses)
+        self._inviters.append(entry.inviter_id)
+        self._max_uses.append(entry.max_uses)
+        self._expires.append(entry.expires_at)
+
+    def remove(self, code: str) -> bool:
+        i = self._index(code)
+        if i < 0:
+            return False
+        del self._codes[i], self._uses[i], self._inviters[i], self._max_uses[i], self._expires[i]
+        return True
+
+    def diff(self, invites: Dict[str, Any], now: Optional[float] = None) -> Dict[str, int]:
+        """Utilisations apparues entre cet état et `invites` ({code: discord.Invite}), par code d'invitation"""
+        now = time.time() if now is None else now
+        deltas: Dict[str, int] = {}
+        if list(invites) == self._codes:
+            # Cas courant: mêmes invitations dans le même ordre, seuls les compteurs ont pu changer
+            for invite, before in zip(invites.values(), self._uses):
+                used = (invite.uses or 0) - before
+                if used > 0:
+                    deltas[invite.code] = used
+            return deltas
+        vanished = 0
+        for i, (code, before) in enumerate(zip(self._codes, self._uses)):
+            invite = invites.get(code)
+            if invite is None:
+                # Une invitation à usage limité disparaît quand sa dernière utilisation est consommée
+                vanished += 1
+                max_uses, expires = self._max_uses[i], self._expires[i]
+                if max_uses and before < max_uses and (not expires or expires > now):
+                    deltas[code] = max_uses - before
+                continue
+            used = (invite.uses or 0) - before
+            if used > 0:
+                deltas[code] = used
+        if len(invites) > len(self._codes) - vanished:
+            # Invitations créées sans que l'événement ait été reçu
+            for code, invite in invites.items():
+                if invite.uses and self._index(code) < 0:
+                    deltas[code] = invite.uses
+        return deltas
+
+    def update(self, invites: Dict[str, Any]) -> "InviteSnapshot":
+        """
+        Reporte les compteurs de `invites` ({code: discord.Invite}) et retourne l'état à garder:
+        celui-ci si les codes sont les mêmes et dans le même ordre, sinon un état reconstruit.
+        """
+        if list(invites) != self._codes:
+            return InviteSnapshot.from_invites(invites.values())
+        self._uses = array("l", [invite.uses or 0 for invite in invites.values()])
+        return self
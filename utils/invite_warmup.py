@@ -0,0 +1,63 @@
+# utils/invite_warmup.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+class RateLimiter:
+    """
+    Seau à jetons: au plus `rate` appels par seconde, par rafales de `burst`.
+    Sur une seconde glissante, au plus `rate + burst` appels passent.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+async def warm_up(guilds: Iterable[Any], fetch: Callable[[Any], Awaitable[bool]],
+                  concurrency: int = 8, rate: float = 40.0,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Charge les invitations de plusieurs serveurs en parallèle.
+    Au plus `concurrency` requêtes en vol et `rate` requêtes par seconde, sous la
+    limite globale de Discord (50/s) pour laisser de la marge au reste du bot.
+    `fetch(guild)` retourne True si les invitations ont été chargées.
+    `progress(faits, total)` est appelé à chaque dixième du total.
+    """
+    guilds = list(guilds)
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"total": len(guilds), "loaded": 0, "failed": 0, "duration": 0.0}
+    done = 0
+    started = time.perf_counter()
+
+    async def load(guild):
+        nonlocal done
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                loaded = await fetch(guild)
+            except Exception as e:
+                print(f"Erreur lors du chargement des invitations du serveur {getattr(guild, 'id', guild)}: {e}")
+                loaded = False
+        stats["loaded" if loaded else "failed"] += 1
+        done += 1
+        if progress and (done * 10 // len(guilds) > (done - 1) * 10 // len(guilds)):
+            progress(done, len(guilds))
+
+    await asyncio.gather(*(load(guild) for guild in guilds))
+    stats["duration"] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,198 @@
+# utils/log_sink.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# Limites Discord par message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000  # total des titres, descriptions, champs, pieds et auteurs
+
+# Priorité des types de logs (0 = la plus haute)
+LOG_PRIORITIES = {
+    "moderation": 0,
+    "warning": 1,
+    "deletion": 1,
+    "change": 2,
+    "info": 3,
+}
+LOWEST_PRIORITY = max(LOG_PRIORITIES.values())
+
+def embed_size(embed) -> int:
+    """Caractères comptés par Discord pour un embed (discord.Embed implémente __len__)"""
+    return len(embed)
+
+class LogSink:
+    """
+    File d'attente bornée des logs envoyés dans un canal.
+    Les embeds sont regroupés par messages d'au plus 10 embeds et 6000 caractères,
+    pris par ordre de priorité du type de log (moderation > deletion > change > info).
+    Une seule tâche envoie: `interval` secondes après le premier log en attente, ou
+    tout de suite pour un log de modération ou quand un lot est plein.
+    put() ne bloque jamais. Au-delà de `max_size` logs en attente, un nouveau log
+    prend la place du plus ancien log de priorité inférieure, ou est ignoré s'il n'y
+    en a pas (les logs de modération ne sont jamais ignorés). Dès la moitié de la
+    file, seul un log `info` sur `sample_every` est gardé. Les logs ignorés sont
+    comptés et signalés en tête d'un lot par `summarize(compteurs)`, au plus une
+    fois par `report_interval` secondes.
+    """
+
+    def __init__(self, deliver: Callable[[List[Any]], Awaitable[None]], interval: float = 2.0,
+                 max_size: int = 500, sample_every: int = 5,
+                 summarize: Optional[Callable[[Dict[str, int]], Any]] = None,
+                 report_interval: float = 60.0,
+                 max_embeds: int = MAX_EMBEDS, max_chars: int = MAX_EMBED_CHARS):
+        self.deliver = deliver
+        self.interval = interval
+        self.max_size = max_size
+        self.sample_every = sample_every
+        self.summarize = summarize
+        self.report_interval = report_interval
+        self.max_embeds = max_embeds
+        self.max_chars = max_chars
+        # Une file par priorité: (embed, taille, type de log)
+        self._queues: List[Deque[Tuple[Any, int, str]]] = [deque() for _ in range(LOWEST_PRIORITY + 1)]
+        self._depth = 0
+        self._pending = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._sample_count = 0
+        # Logs ignorés depuis le dernier signalement
+        self._unreported: Dict[str, int] = {}
+        self._reported_at: Optional[float] = None
+        self.events = 0
+        self.api_calls = 0
+        self.urgent = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.dropped: Dict[str, int] = {}
+        self.sampled: Dict[str, int] = {}
+
+    @property
+    def depth(self) -> int:
+        """Logs en attente d'envoi"""
+        return self._depth
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def put(self, embed, log_type: str = "info") -> bool:
+        """Met un log en attente, retourne False s'il a été ignoré"""
+        self.events += 1
+        priority = LOG_PRIORITIES.get(log_type, LOWEST_PRIORITY)
+
+        # Sous pression, les logs de plus basse priorité sont échantillonnés
+        if priority == LOWEST_PRIORITY and self._depth >= self.max_size // 2:
+            self._sample_count += 1
+            if self._sample_count % self.sample_every:
+                self._ignore(self.sampled, log_type)
+                return False
+
+        if self._depth >= self.max_size and priority > 0:
+            victim = next((queue for queue in reversed(self._queues[priority + 1:]) if queue), None)
+            if victim is None:
+                self._ignore(self.dropped, log_type)
+                return False
+            _, _, victim_type = victim.popleft()
+            self._depth -= 1
+            self._ignore(self.dropped, victim_type)
+
+        self._queues[priority].append((embed, embed_size(embed), log_type))
+        self._depth += 1
+        self.max_depth = max(self.max_depth, self._depth)
+        self._pending.set()
+        if priority == 0:
+            self.urgent += 1
+            self._wakeup.set()
+        elif self._depth >= self.max_embeds:
+            self._wakeup.set()
+        return True
+
+    def _ignore(self, counts: Dict[str, int], log_type: str) -> None:
+        counts[log_type] = counts.get(log_type, 0) + 1
+        self._unreported[log_type] = self._unreported.get(log_type, 0) + 1
+
+    def _take(self) -> List[Any]:
+        """Retire le prochain lot (limites Discord respectées), priorités d'abord"""
+        batch = []
+        chars = 0
+        for queue in self._queues:
+            while queue and len(batch) < self.max_embeds:
+                embed, size, _ = queue[0]
+                if batch and chars + size > self.max_chars:
+                    break
+                queue.popleft()
+                batch.append(embed)
+                chars += size
+            if queue and batch:
+                break
+        self._depth -= len(batch)
+        return batch
+
+    async def _run(self) -> None:
+        while not self._closed:
+            await self._pending.wait()
+            # Laisser le lot se remplir, sauf log urgent ou lot déjà plein
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Envoie tout ce qui est en attente"""
+        self._wakeup.clear()
+        self._report()
+        while self._depth:
+            # La file peut rester pleine longtemps: signaler aussi en cours d'envoi
+            self._report()
+            batch = self._take()
+            self.api_calls += 1
+            try:
+                await self.deliver(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Erreur lors de l'envoi d'un lot de {len(batch)} log(s): {e}")
+        self._pending.clear()
+
+    def _report(self) -> None:
+        """Place le signalement des logs ignorés en tête de la file"""
+        if not self._unreported or not self.summarize:
+            return
+        now = time.monotonic()
+        if self._reported_at is not None and now - self._reported_at < self.report_interval:
+            return
+        counts, self._unreported = self._unreported, {}
+        self._reported_at = now
+        try:
+            report = self.summarize(counts)
+            self._queues[0].appendleft((report, embed_size(report), "warning"))
+            self._depth += 1
+        except Exception as e:
+            print(f"Erreur lors du signalement des logs ignorés: {e}")
+
+    async def close(self) -> None:
+        """Arrête la tâche d'envoi après l'envoi des logs restants"""
+        self._closed = True
+        if self._task is not None:
+            # Pas d'annulation: un lot retiré de la file serait perdu en cours d'envoi
+            self._pending.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "api_calls": self.api_calls,
+            "ratio": self.events / self.api_calls if self.api_calls else 0.0,
+            "urgent": self.urgent,
+            "failed": self.failed,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "dropped": dict(self.dropped),
+            "sampled": dict(self.sampled),
+        }
@@ -0,0 +1,241 @@
+# utils/migrations.py
+import json
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+from utils.config_cache import encode_config_value
+
+# Une étape est soit une requête SQL, soit une fonction qui reçoit la connexion
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+def _split_config_json(conn: sqlite3.Connection) -> None:
+    """Éclate chaque document config_json en une ligne par clé"""
+    rows = conn.execute("SELECT server_id, config_json FROM server_configs").fetchall()
+    for server_id, config_json in rows:
+        if not config_json:
+            continue
+        conn.executemany('''
+        INSERT OR REPLACE INTO server_config_values (server_id, key, value, type)
+        VALUES (?, ?, ?, ?)
+        ''', [(server_id, key, *encode_config_value(value)) for key, value in json.loads(config_json).items()])
+
+# Migrations versionnées: (version, description, étapes). Ne jamais modifier une
+# migration publiée, en ajouter une nouvelle à la fin de la liste.
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Schéma initial", [
+        '''
+        CREATE TABLE IF NOT EXISTS warnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS mod_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            action_type TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            duration INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS server_configs (
+            server_id INTEGER PRIMARY KEY,
+            config_json TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS levels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            last_message_time DATETIME,
+            UNIQUE(user_id, server_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message TEXT,
+            remind_time DATETIME NOT NULL,
+            created_time DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS invite_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id INTEGER NOT NULL,
+            inviter_id INTEGER NOT NULL,
+            invited_id INTEGER NOT NULL,
+            invite_code TEXT NOT NULL,
+            join_time DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS invite_stats (
+            user_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            invites_regular INTEGER DEFAULT 0,
+            invites_left INTEGER DEFAULT 0,
+            invites_fake INTEGER DEFAULT 0,
+            invites_bonus INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, server_id)
+        )
+        ''',
+    ]),
+    (2, "Index composites pour les requêtes fréquentes", [
+        # get_warnings, get_warning_count, warn
+        "CREATE INDEX IF NOT EXISTS idx_warnings_server_user_time ON warnings (server_id, user_id, timestamp)",
+        # get_mod_actions, modlogs
+        "CREATE INDEX IF NOT EXISTS idx_mod_actions_server_user_time ON mod_actions (server_id, user_id, timestamp)",
+        # get_leaderboard
+        "CREATE INDEX IF NOT EXISTS idx_levels_server_rank ON levels (server_id, level DESC, xp DESC)",
+        # get_due_reminders
+        "CREATE INDEX IF NOT EXISTS idx_reminders_remind_time ON reminders (remind_time)",
+        # inviter, on_member_remove
+        "CREATE INDEX IF NOT EXISTS idx_invite_tracking_server_invited_time ON invite_tracking (server_id, invited_id, join_time)",
+        # invitestop
+        "CREATE INDEX IF NOT EXISTS idx_invite_stats_server ON invite_stats (server_id)",
+    ]),
+    (3, "Compteur d'avertissements par membre maintenu par triggers", [
+        '''
+        CREATE TABLE IF NOT EXISTS warning_counts (
+            server_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (server_id, user_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_warnings_count_insert AFTER INSERT ON warnings
+        BEGIN
+            INSERT INTO warning_counts (server_id, user_id, count)
+            VALUES (NEW.server_id, NEW.user_id, 1)
+            ON CONFLICT(server_id, user_id) DO UPDATE SET count = count + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_warnings_count_delete AFTER DELETE ON warnings
+        BEGIN
+            UPDATE warning_counts SET count = count - 1
+            WHERE server_id = OLD.server_id AND user_id = OLD.user_id;
+        END
+        ''',
+        '''
+        INSERT OR REPLACE INTO warning_counts (server_id, user_id, count)
+        SELECT server_id, user_id, COUNT(*) FROM warnings
+        GROUP BY server_id, user_id
+        ''',
+    ]),
+    (4, "Configuration normalisée clé/valeur à la place du document JSON", [
+        '''
+        CREATE TABLE IF NOT EXISTS server_config_values (
+            server_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            type TEXT NOT NULL DEFAULT 'str',
+            PRIMARY KEY (server_id, key)
+        ) WITHOUT ROWID
+        ''',
+        _split_config_json,
+        "DROP TABLE server_configs",
+    ]),
+    (5, "XP totale cumulée pour les niveaux et le classement", [
+        "ALTER TABLE levels ADD COLUMN total_xp INTEGER NOT NULL DEFAULT 0",
+        # XP cumulée pour atteindre le niveau (forme fermée, voir utils/xp_engine.py) + XP dans le niveau
+        '''
+        UPDATE levels SET total_xp =
+            5 * (level - 1) * level * (2 * level - 1) / 6 + 25 * level * (level - 1) + 100 * level + xp
+        ''',
+        "DROP INDEX IF EXISTS idx_levels_server_rank",
+        # get_leaderboard, get_guild_levels
+        "CREATE INDEX IF NOT EXISTS idx_levels_server_total ON levels (server_id, total_xp DESC)",
+    ]),
+    (6, "Giveaways persistants", [
+        '''
+        CREATE TABLE IF NOT EXISTS giveaways (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL UNIQUE,
+            host_id INTEGER NOT NULL,
+            prize TEXT NOT NULL,
+            winners INTEGER NOT NULL,
+            end_time DATETIME NOT NULL,
+            ended INTEGER NOT NULL DEFAULT 0,
+            winner_ids TEXT,
+            created_time DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Planificateur: prochains giveaways en cours
+        "CREATE INDEX IF NOT EXISTS idx_giveaways_active_end ON giveaways (end_time) WHERE ended = 0",
+    ]),
+    (7, "Total net des invitations en colonne générée et indexée", [
+        # Colonne virtuelle: calculée à la lecture, mais sa valeur est stockée dans l'index
+        '''
+        ALTER TABLE invite_stats ADD COLUMN total INTEGER
+        GENERATED ALWAYS AS ((invites_regular + invites_bonus) - (invites_fake + invites_left)) VIRTUAL
+        ''',
+        "DROP INDEX IF EXISTS idx_invite_stats_server",
+        # invitestop, get_invite_rank (user_id départage les égalités)
+        "CREATE INDEX IF NOT EXISTS idx_invite_stats_server_total ON invite_stats (server_id, total DESC, user_id)",
+    ]),
+    (8, "Détection des invitations fausses", [
+        # Masque des raisons (voir utils/fake_invites.py), 0 = invitation réelle
+        "ALTER TABLE invite_tracking ADD COLUMN fake INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE invite_tracking ADD COLUMN left_time DATETIME",
+    ]),
+    (9, "Nouveaux essais des giveaways", [
+        # Échecs consécutifs de la fin d'un giveaway; le prochain essai est reporté dans end_time
+        "ALTER TABLE giveaways ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+    ]),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Retourne la version du schéma (0 pour une base vierge)"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Applique les migrations manquantes, chacune dans sa transaction, et retourne la version finale"""
+    current = get_schema_version(conn)
+    conn.commit()
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute('''
+            INSERT INTO schema_version (version, description)
+            VALUES (?, ?)
+            ''', (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+    return current
@@ -0,0 +1,85 @@
+# utils/pagination.py
+import discord
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Cursor = Tuple[str, int]
+Row = Dict[str, Any]
+
+class KeysetPaginator(discord.ui.View):
+    """
+    Vue à boutons qui parcourt un historique page par page avec un curseur (timestamp, id).
+    Seule la page affichée est en mémoire, plus la pile des curseurs des pages déjà vues.
+    """
+
+    def __init__(self, author_id: int,
+                 fetch_page: Callable[[Optional[Cursor], int], Awaitable[List[Row]]],
+                 build_embed: Callable[[List[Row], int], discord.Embed],
+                 page_size: int = 10, timeout: float = 180):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.fetch_page = fetch_page
+        self.build_embed = build_embed
+        self.page_size = page_size
+        # cursors[i] est le curseur qui ouvre la page i (None pour la première)
+        self.cursors: List[Optional[Cursor]] = [None]
+        self.rows: List[Row] = []
+        self.has_next = False
+        self.message: Optional[discord.Message] = None
+
+    @property
+    def page(self) -> int:
+        return len(self.cursors)
+
+    async def load(self) -> None:
+        """Charge la page courante (une ligne de plus pour savoir s'il existe une page suivante)"""
+        rows = await self.fetch_page(self.cursors[-1], self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        self.rows = rows[:self.page_size]
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = not self.has_next
+
+    async def start(self, ctx) -> bool:
+        """Envoie la première page; retourne False si l'historique est vide"""
+        await self.load()
+        if not self.rows:
+            return False
+        embed = self.build_embed(self.rows, self.page)
+        if self.has_next:
+            self.message = await ctx.send(embed=embed, view=self)
+        else:
+            # Une seule page: pas besoin de boutons
+            await ctx.send(embed=embed)
+            self.stop()
+        return True
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Seul l'auteur de la commande peut changer de page.", ephemeral=True)
+            return False
+        return True
+
+    async def show(self, interaction: discord.Interaction) -> None:
+        await self.load()
+        await interaction.response.edit_message(embed=self.build_embed(self.rows, self.page), view=self)
+
+    @discord.ui.button(label="Précédent", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await self.show(interaction)
+
+    @discord.ui.button(label="Suivant", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_next and self.rows:
+            last = self.rows[-1]
+            self.cursors.append((last["timestamp"], last["id"]))
+        await self.show(interaction)
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
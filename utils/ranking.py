@@ -0,0 +1,133 @@
+# utils/ranking.py
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class RankIndex:
+    """
+    Classement en mémoire d'un serveur (structure de statistiques d'ordre).
+    Les clés (-xp_totale, user_id) sont rangées dans une liste triée découpée en
+    blocs d'au plus `load` éléments; un arbre de Fenwick sur la taille des blocs
+    donne le rang d'un membre et le membre d'un rang en O(log n).
+    """
+
+    def __init__(self, scores: Iterable[Tuple[int, int]] = (), load: int = 256):
+        self.load = load
+        # user_id -> xp totale
+        self._scores: Dict[int, int] = dict(scores)
+        keys = sorted((-score, user_id) for user_id, score in self._scores.items())
+        self._blocks: List[List[Tuple[int, int]]] = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Recalcule les maxima des blocs et l'arbre de Fenwick (après ajout ou retrait d'un bloc)"""
+        self._maxes = [block[-1] for block in self._blocks]
+        self._tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, 1):
+            self._tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent <= len(self._blocks):
+                self._tree[parent] += self._tree[i]
+
+    def _tree_add(self, block_index: int, delta: int) -> None:
+        i = block_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _tree_prefix(self, block_index: int) -> int:
+        """Nombre d'éléments dans les blocs [0, block_index)"""
+        total = 0
+        i = block_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _tree_find(self, position: int) -> Tuple[int, int]:
+        """(bloc, position dans le bloc) du `position`-ième élément (à partir de 0)"""
+        block_index = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = block_index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                block_index = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return block_index, position
+
+    def _insert(self, key: Tuple[int, int]) -> None:
+        if not self._blocks:
+            self._blocks.append([key])
+            self._rebuild()
+            return
+        block_index = min(bisect.bisect_left(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[block_index]
+        bisect.insort(block, key)
+        self._maxes[block_index] = block[-1]
+        if len(block) > 2 * self.load:
+            self._blocks[block_index:block_index + 1] = [block[:self.load], block[self.load:]]
+            self._rebuild()
+        else:
+            self._tree_add(block_index, 1)
+
+    def _remove(self, key: Tuple[int, int]) -> None:
+        block_index = bisect.bisect_left(self._maxes, key)
+        block = self._blocks[block_index]
+        del block[bisect.bisect_left(block, key)]
+        if not block:
+            del self._blocks[block_index]
+            self._rebuild()
+        else:
+            self._maxes[block_index] = block[-1]
+            self._tree_add(block_index, -1)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._scores
+
+    def update(self, user_id: int, score: int) -> None:
+        """Ajoute un membre ou met à jour son XP totale"""
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._remove((-old, user_id))
+        self._scores[user_id] = score
+        self._insert((-score, user_id))
+
+    def discard(self, user_id: int) -> None:
+        score = self._scores.pop(user_id, None)
+        if score is not None:
+            self._remove((-score, user_id))
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Rang (1 = premier) d'un membre, None s'il n'est pas classé"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        key = (-score, user_id)
+        block_index = bisect.bisect_left(self._maxes, key)
+        return self._tree_prefix(block_index) + bisect.bisect_left(self._blocks[block_index], key) + 1
+
+    def at(self, rank: int) -> Tuple[int, int]:
+        """(user_id, xp totale) du membre classé `rank` (1 = premier)"""
+        if not 1 <= rank <= len(self._scores):
+            raise IndexError(rank)
+        block_index, offset = self._tree_find(rank - 1)
+        score, user_id = self._blocks[block_index][offset]
+        return user_id, -score
+
+    def top(self, count: int = 10) -> List[Tuple[int, int, int]]:
+        """[(rang, user_id, xp totale), ...] des `count` premiers"""
+        return [(rank, *self.at(rank)) for rank in range(1, min(count, len(self._scores)) + 1)]
+
+    def neighbors(self, user_id: int, radius: int = 2) -> List[Tuple[int, int, int]]:
+        """[(rang, user_id, xp totale), ...] autour d'un membre, lui compris"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        first = max(1, rank - radius)
+        last = min(len(self._scores), rank + radius)
+        return [(r, *self.at(r)) for r in range(first, last + 1)]
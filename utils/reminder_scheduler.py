@@ -0,0 +1,44 @@
+# utils/reminder_scheduler.py
+import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from utils.scheduler import DeadlineScheduler, to_db_time, utcnow
+
+class ReminderScheduler(DeadlineScheduler):
+    """
+    Planificateur de rappels persistants.
+    Les rappels vivent dans la table reminders; seule la fenêtre des prochaines
+    échéances est en mémoire. Les rappels dus sont lus, livrés puis supprimés par lots.
+    """
+
+    def __init__(self, db, deliver: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+                 window: int = 1000, batch_size: int = 100,
+                 clock: Callable[[], datetime.datetime] = utcnow):
+        super().__init__(window=window, batch_size=batch_size, clock=clock)
+        self.db = db
+        self.deliver = deliver
+
+    @property
+    def delivered(self) -> int:
+        return self.processed
+
+    async def add(self, user_id: int, server_id: int, channel_id: int, message: str,
+                  remind_at: datetime.datetime) -> int:
+        """Enregistre un rappel et retourne son ID"""
+        remind_time = to_db_time(remind_at)
+        reminder_id = await self.db.add_reminder(user_id, server_id, channel_id, message, remind_time)
+        self.schedule(remind_time, reminder_id)
+        return reminder_id
+
+    async def load_next(self, limit: int) -> List[Tuple[str, int]]:
+        return await self.db.get_next_reminders(limit)
+
+    async def process_due(self, reminder_ids: List[int]) -> int:
+        reminders = await self.db.get_reminders(reminder_ids)
+        if reminders:
+            try:
+                await self.deliver(reminders)
+            finally:
+                # Livraison « au plus une fois »: un rappel en échec n'est pas renvoyé en boucle
+                await self.db.remove_reminders([reminder["id"] for reminder in reminders])
+        return len(reminders)
@@ -0,0 +1,152 @@
+# utils/scheduler.py
+import abc
+import asyncio
+import datetime
+import heapq
+from typing import Callable, List, Optional, Tuple
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def to_db_time(moment: datetime.datetime) -> str:
+    """Format UTC de la base (même format que CURRENT_TIMESTAMP)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment.strftime(TIME_FORMAT)
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+class DeadlineScheduler(abc.ABC):
+    """
+    Planificateur d'échéances persistantes (classe de base).
+    Les éléments vivent en base; seule une fenêtre des `window` prochaines
+    échéances (échéance, id) est gardée dans un tas en mémoire, rechargée par
+    load_next() quand elle est vide. Une seule tâche dort jusqu'à la prochaine
+    échéance, puis passe les éléments dus à process_due() par lots.
+    """
+
+    def __init__(self, window: int = 1000, batch_size: int = 100,
+                 clock: Callable[[], datetime.datetime] = utcnow):
+        self.window = window
+        self.batch_size = batch_size
+        self.clock = clock
+        self._heap: List[Tuple[str, int]] = []
+        # True si le tas contient toutes les échéances en attente
+        self._complete = False
+        # Échéance la plus lointaine chargée (fenêtre incomplète uniquement)
+        self._horizon: Optional[str] = None
+        # Éléments signalés pendant un rechargement, ajoutés à la fenêtre une fois chargée
+        self._refilling = False
+        self._added: List[Tuple[str, int]] = []
+        # reload() pendant un rechargement: la fenêtre lue est périmée
+        self._stale = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.batches = 0
+
+    @abc.abstractmethod
+    async def load_next(self, limit: int) -> List[Tuple[str, int]]:
+        """Les `limit` prochaines échéances (échéance, id) en base, les plus proches d'abord"""
+
+    @abc.abstractmethod
+    async def process_due(self, item_ids: List[int]) -> int:
+        """Traite un lot d'éléments dus et retourne le nombre d'éléments traités"""
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reload(self) -> None:
+        """Oublie la fenêtre en mémoire (base restaurée): elle est relue depuis la base"""
+        self._heap = []
+        self._complete = False
+        self._horizon = None
+        self._stale = self._refilling
+        self._wakeup.set()
+
+    def schedule(self, due_time: str, item_id: int) -> None:
+        """Signale un élément déjà enregistré en base"""
+        if self._refilling:
+            # La lecture en cours a pu commencer avant l'écriture de l'élément
+            self._added.append((due_time, item_id))
+        elif self._complete or (self._horizon is not None and due_time <= self._horizon):
+            # Au-delà de la fenêtre chargée, l'élément sera lu au prochain rechargement
+            heapq.heappush(self._heap, (due_time, item_id))
+            if len(self._heap) > 2 * self.window:
+                self._heap = []
+                self._complete = False
+                self._horizon = None
+        self._wakeup.set()
+
+    async def _refill(self) -> None:
+        self._refilling = True
+        try:
+            while True:
+                self._added = []
+                entries = await self.load_next(self.window)
+                if not self._stale:
+                    break
+                # Base restaurée pendant la lecture: relire la fenêtre
+                self._stale = False
+        finally:
+            self._refilling = False
+        self._heap = entries
+        heapq.heapify(self._heap)
+        self._complete = len(entries) < self.window
+        self._horizon = None if self._complete else entries[-1][0]
+        loaded = set(entries)
+        for due_time, item_id in self._added:
+            if (due_time, item_id) not in loaded:
+                self.schedule(due_time, item_id)
+        self._added = []
+
+    async def _sleep_until(self, due_time: Optional[str]) -> None:
+        """Dort jusqu'à l'échéance (ou indéfiniment), réveillé plus tôt par schedule()"""
+        self._wakeup.clear()
+        timeout = None
+        if due_time is not None:
+            due = datetime.datetime.strptime(due_time, TIME_FORMAT)
+            timeout = max(0.0, (due - self.clock()).total_seconds())
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self._heap and not self._complete:
+                    await self._refill()
+                if not self._heap:
+                    await self._sleep_until(None)
+                    continue
+
+                now = to_db_time(self.clock())
+                if self._heap[0][0] > now:
+                    await self._sleep_until(self._heap[0][0])
+                    continue
+
+                due_ids = []
+                while self._heap and self._heap[0][0] <= now and len(due_ids) < self.batch_size:
+                    due_ids.append(heapq.heappop(self._heap)[1])
+                self.processed += await self.process_due(due_ids)
+                self.batches += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Erreur dans le planificateur {type(self).__name__}: {e}")
+                await asyncio.sleep(5)
+
+    def __len__(self) -> int:
+        """Nombre d'échéances en mémoire"""
+        return len(self._heap)
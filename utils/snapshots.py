@@ -0,0 +1,179 @@
+# utils/snapshots.py
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from utils.backup import backup_database, check_integrity
+
+# Quatre pages SQLite: une écriture isolée ne change qu'un petit bloc (voir benchmarks/snapshots.py)
+CHUNK_SIZE = 16 * 1024
+
+class SnapshotStore:
+    """
+    Instantanés dédupliqués de la base de données.
+    Chaque instantané est découpé en blocs de taille fixe, stockés une seule fois
+    sous leur empreinte SHA-256 (chunks/) et référencés par un manifeste JSON
+    (manifests/). Les méthodes sont bloquantes: à appeler hors de la boucle d'événements.
+    """
+
+    def __init__(self, root: str = 'backups/snapshots', chunk_size: int = CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.manifests_dir, f"{snapshot_id}.json")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def create_snapshot(self, source_path: str) -> Dict[str, Any]:
+        """Prend un instantané cohérent de la base et ne stocke que les blocs nouveaux"""
+        start = time.perf_counter()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        snapshot_id = now.strftime("%Y%m%dT%H%M%SZ")
+        if os.path.exists(self._manifest_path(snapshot_id)):
+            snapshot_id += f"-{now.microsecond:06d}"
+
+        raw_path = os.path.join(self.root, 'snapshot.tmp')
+        result = backup_database(source_path, raw_path, verify=True)
+        chunks = []
+        new_chunks = 0
+        new_bytes = 0
+        file_hash = hashlib.sha256()
+        try:
+            with open(raw_path, 'rb') as raw:
+                while True:
+                    block = raw.read(self.chunk_size)
+                    if not block:
+                        break
+                    file_hash.update(block)
+                    digest = hashlib.sha256(block).hexdigest()
+                    chunks.append(digest)
+                    path = self._chunk_path(digest)
+                    if not os.path.exists(path):
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        packed = zlib.compress(block, 6)
+                        self._write_atomic(path, packed)
+                        new_chunks += 1
+                        new_bytes += len(packed)
+        finally:
+            os.remove(raw_path)
+
+        manifest = {
+            "id": snapshot_id,
+            "created_at": now.isoformat(),
+            "size": result["size"],
+            "sha256": file_hash.hexdigest(),
+            "chunk_size": self.chunk_size,
+            "chunks": chunks,
+        }
+        # Le manifeste est écrit en dernier: un instantané interrompu n'est jamais visible
+        self._write_atomic(self._manifest_path(snapshot_id), json.dumps(manifest).encode())
+        manifest.update(new_chunks=new_chunks, new_bytes=new_bytes, duration=time.perf_counter() - start)
+        return manifest
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """Manifestes triés du plus récent au plus ancien"""
+        manifests = []
+        for filename in os.listdir(self.manifests_dir):
+            if filename.endswith('.json'):
+                with open(os.path.join(self.manifests_dir, filename)) as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: m["created_at"], reverse=True)
+
+    def get_snapshot(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        path = self._manifest_path(os.path.basename(snapshot_id))
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def materialize(self, snapshot_id: str, dest_path: str) -> Dict[str, Any]:
+        """Reconstruit un instantané dans dest_path en vérifiant chaque bloc, l'empreinte et l'intégrité"""
+        start = time.perf_counter()
+        manifest = self.get_snapshot(snapshot_id)
+        if manifest is None:
+            raise FileNotFoundError(f"Instantané introuvable: {snapshot_id}")
+
+        file_hash = hashlib.sha256()
+        with open(dest_path, 'wb') as out:
+            for digest in manifest["chunks"]:
+                with open(self._chunk_path(digest), 'rb') as f:
+                    block = zlib.decompress(f.read())
+                if hashlib.sha256(block).hexdigest() != digest:
+                    raise sqlite3.DatabaseError(f"Bloc corrompu: {digest}")
+                file_hash.update(block)
+                out.write(block)
+        if file_hash.hexdigest() != manifest["sha256"]:
+            raise sqlite3.DatabaseError("L'empreinte de l'instantané ne correspond pas au manifeste")
+
+        integrity = check_integrity(dest_path)
+        if integrity != "ok":
+            raise sqlite3.DatabaseError(f"Instantané corrompu: {integrity}")
+        return {"id": manifest["id"], "path": dest_path, "duration": time.perf_counter() - start}
+
+    def apply_retention(self, hourly: int = 24, daily: int = 7, weekly: int = 4) -> List[str]:
+        """
+        Garde le plus récent instantané de chacune des `hourly` dernières heures,
+        des `daily` derniers jours et des `weekly` dernières semaines, supprime
+        les autres puis les blocs qui ne sont plus référencés. Retourne les ID supprimés.
+        """
+        snapshots = self.list_snapshots()
+        keep = set()
+        if snapshots:
+            keep.add(snapshots[0]["id"])
+        for count, bucket_format in ((hourly, "%Y-%m-%d %H"), (daily, "%Y-%m-%d"), (weekly, "%G-%V")):
+            buckets = set()
+            for manifest in snapshots:
+                bucket = datetime.datetime.fromisoformat(manifest["created_at"]).strftime(bucket_format)
+                if bucket in buckets:
+                    continue
+                if len(buckets) >= count:
+                    break
+                buckets.add(bucket)
+                keep.add(manifest["id"])
+
+        removed = []
+        for manifest in snapshots:
+            if manifest["id"] not in keep:
+                os.remove(self._manifest_path(manifest["id"]))
+                removed.append(manifest["id"])
+        if removed:
+            self.collect_garbage()
+        return removed
+
+    def collect_garbage(self) -> int:
+        """Supprime les blocs qui ne sont référencés par aucun manifeste"""
+        referenced = set()
+        for manifest in self.list_snapshots():
+            referenced.update(manifest["chunks"])
+        removed = 0
+        for prefix in os.listdir(self.chunks_dir):
+            prefix_dir = os.path.join(self.chunks_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+                    removed += 1
+        return removed
+
+    def disk_usage(self) -> int:
+        """Taille totale du dépôt en octets"""
+        total = 0
+        for directory, _, filenames in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in filenames)
+        return total
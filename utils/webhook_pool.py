@@ -0,0 +1,117 @@
+# utils/webhook_pool.py
+import asyncio
+import time
+from typing import Any, Dict, List
+
+class WebhookPool:
+    """
+    Envoi des logs dans un canal par un petit groupe de webhooks gérés par le bot.
+    Chaque webhook a sa propre limite de débit, distincte de celle du bot dans le
+    canal: un message part par le bot s'il n'a aucun envoi en cours, sinon par la
+    voie qui devrait finir le plus tôt (envois en cours x durée moyenne d'un envoi,
+    attentes de limite comprises; à égalité, à tour de rôle). Les webhooks
+    nommés `name` sont repris ou créés au premier envoi dans un canal (permission
+    Gérer les webhooks); un webhook en échec est remplacé par le bot pour ce
+    message, et le groupe est rechargé s'il a été supprimé. Un groupe incomplet est
+    complété au plus tôt `reload_interval` secondes après le dernier chargement.
+    Avec `size` à 0, tout passe par le bot.
+    """
+
+    def __init__(self, size: int = 0, name: str = "Logs de modération", reload_interval: float = 300.0):
+        self.size = size
+        self.name = name
+        self.reload_interval = reload_interval
+        self._webhooks: Dict[int, List[Any]] = {}
+        self._loaded_at: Dict[int, float] = {}
+        self._loading: Dict[int, asyncio.Task] = {}
+        # Envois en cours et durée moyenne d'un envoi par voie (ID du webhook, ou ID du canal pour le bot)
+        self._in_flight: Dict[int, int] = {}
+        self._duration: Dict[int, float] = {}
+        self._next: Dict[int, int] = {}
+        self.sent_webhook = 0
+        self.sent_bot = 0
+        self.fallbacks = 0
+        self.created = 0
+
+    async def webhooks(self, channel) -> List[Any]:
+        """Webhooks du groupe pour ce canal (chargés ou créés si besoin)"""
+        webhooks = self._webhooks.get(channel.id)
+        if webhooks is not None and (len(webhooks) >= self.size or
+                                     time.monotonic() - self._loaded_at[channel.id] < self.reload_interval):
+            return webhooks
+        task = self._loading.get(channel.id)
+        if task is None:
+            task = self._loading[channel.id] = asyncio.create_task(self._load(channel))
+        return await asyncio.shield(task)
+
+    async def _load(self, channel) -> List[Any]:
+        webhooks = []
+        try:
+            webhooks = [webhook for webhook in await channel.webhooks() if webhook.name == self.name and webhook.token]
+            while len(webhooks) < self.size:
+                webhooks.append(await channel.create_webhook(name=self.name, reason="Envoi des logs de modération"))
+                self.created += 1
+        except Exception as e:
+            print(f"Erreur lors de la préparation des webhooks du canal {channel.id}: {e}")
+        finally:
+            self._webhooks[channel.id] = webhooks[:self.size]
+            self._loaded_at[channel.id] = time.monotonic()
+            self._loading.pop(channel.id, None)
+        return self._webhooks[channel.id]
+
+    def _pick(self, channel, webhooks: List[Any]):
+        """Voie qui devrait finir le plus tôt (None pour le bot), à égalité la suivante dans la rotation"""
+        # Le bot n'est jamais laissé inactif: les webhooks prennent le surplus
+        if not self._in_flight.get(channel.id):
+            return None
+        lanes = [None] + webhooks
+        start = self._next.get(channel.id, 0)
+        best = None
+        for k in range(len(lanes)):
+            lane = lanes[(start + k) % len(lanes)]
+            key = lane.id if lane else channel.id
+            cost = (self._in_flight.get(key, 0) + 1) * self._duration.get(key, 0.0)
+            if best is None or cost < best[0]:
+                best = (cost, k, lane)
+        self._next[channel.id] = (start + best[1] + 1) % len(lanes)
+        return best[2]
+
+    async def _timed(self, key: int, send) -> None:
+        """Envoi compté dans les envois en cours de la voie, sa durée entre dans la moyenne"""
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        started = time.monotonic()
+        try:
+            await send
+        finally:
+            self._in_flight[key] -= 1
+            elapsed = time.monotonic() - started
+            self._duration[key] = 0.8 * self._duration.get(key, elapsed) + 0.2 * elapsed
+
+    async def send(self, channel, **kwargs) -> None:
+        """Envoie un message (embed=..., embeds=...) dans le canal"""
+        if self.size > 0:
+            webhooks = await self.webhooks(channel)
+            webhook = self._pick(channel, webhooks)
+            if webhook is not None:
+                try:
+                    await self._timed(webhook.id, webhook.send(**kwargs))
+                    self.sent_webhook += 1
+                    return
+                except Exception as e:
+                    print(f"Erreur lors de l'envoi par webhook, envoi par le bot: {e}")
+                    self.fallbacks += 1
+                    # Webhook supprimé ou jeton invalide: le groupe est rechargé au prochain envoi
+                    if getattr(e, "status", None) in (401, 404) and self._webhooks.get(channel.id) is webhooks:
+                        del self._webhooks[channel.id]
+
+        await self._timed(channel.id, channel.send(**kwargs))
+        self.sent_bot += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "webhooks": sum(len(webhooks) for webhooks in self._webhooks.values()),
+            "sent_webhook": self.sent_webhook,
+            "sent_bot": self.sent_bot,
+            "fallbacks": self.fallbacks,
+            "created": self.created,
+        }
@@ -0,0 +1,154 @@
+# utils/xp_engine.py
+import asyncio
+import bisect
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.ranking import RankIndex
+
+def xp_for_next_level(level: int) -> int:
+    """XP requis pour passer du niveau `level` au suivant"""
+    return 5 * (level ** 2) + 50 * level + 100
+
+def total_xp_for_level(level: int) -> int:
+    """XP cumulée pour atteindre `level` (somme fermée de xp_for_next_level sur 0..level-1)"""
+    return 5 * (level - 1) * level * (2 * level - 1) // 6 + 25 * level * (level - 1) + 100 * level
+
+# CUMULATIVE_XP[n] = XP totale pour atteindre le niveau n, étendue à la demande
+CUMULATIVE_XP: List[int] = [total_xp_for_level(level) for level in range(1001)]
+
+def level_from_total_xp(total_xp: int) -> Tuple[int, int]:
+    """Retourne (niveau, xp dans le niveau) pour une XP totale, par recherche dichotomique"""
+    while total_xp >= CUMULATIVE_XP[-1]:
+        start = len(CUMULATIVE_XP)
+        CUMULATIVE_XP.extend(total_xp_for_level(level) for level in range(start, 2 * start))
+    level = bisect.bisect_right(CUMULATIVE_XP, total_xp) - 1
+    return level, total_xp - CUMULATIVE_XP[level]
+
+class XPEngine:
+    """
+    Attribution d'XP en mémoire. Les cooldowns, l'XP et les niveaux sont tenus en
+    mémoire par serveur (chargés en une requête au premier message du serveur);
+    seuls les membres modifiés depuis le dernier flush sont écrits, en un lot
+    (une transaction) par flush. Chaque serveur chargé a aussi son classement
+    (RankIndex), mis à jour à chaque gain d'XP.
+    """
+
+    def __init__(self, db, cooldown: float = 60, xp_min: int = 15, xp_max: int = 25,
+                 idle_after: float = 3600, rng: Optional[random.Random] = None):
+        self.db = db
+        self.cooldown = cooldown
+        self.xp_min = xp_min
+        self.xp_max = xp_max
+        self.idle_after = idle_after
+        self.rng = rng or random.Random()
+        # server_id -> {user_id: [xp totale, niveau, dernier gain (time.monotonic)]}
+        self._guilds: Dict[int, Dict[int, List]] = {}
+        self._ranks: Dict[int, RankIndex] = {}
+        self._guild_activity: Dict[int, float] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        # server_id -> membres modifiés depuis le dernier flush
+        self._dirty: Dict[int, set] = {}
+        # Incrémenté par reset(): un chargement commencé avant est refait
+        self._generation = 0
+        self.messages = 0
+        self.awarded = 0
+        self.flushed_rows = 0
+
+    async def _load_guild(self, server_id: int) -> Dict[int, List]:
+        # Les messages reçus pendant le chargement attendent la même lecture
+        loading = self._loading.get(server_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+        loading = self._loading[server_id] = asyncio.get_running_loop().create_future()
+        try:
+            while True:
+                generation = self._generation
+                rows = await self.db.get_guild_levels(server_id)
+                if generation == self._generation:
+                    break
+            profiles = {row["user_id"]: [row["total_xp"], row["level"], float("-inf")] for row in rows}
+            self._ranks[server_id] = RankIndex((row["user_id"], row["total_xp"]) for row in rows)
+            self._guilds[server_id] = profiles
+            loading.set_result(profiles)
+            return profiles
+        except Exception as e:
+            loading.set_exception(e)
+            raise
+        finally:
+            del self._loading[server_id]
+
+    async def load_guild(self, server_id: int) -> None:
+        """Charge un serveur s'il ne l'est pas déjà"""
+        if server_id not in self._guilds:
+            await self._load_guild(server_id)
+        self._guild_activity[server_id] = time.monotonic()
+
+    async def ranking(self, server_id: int) -> RankIndex:
+        """Classement en mémoire d'un serveur (chargé si nécessaire)"""
+        await self.load_guild(server_id)
+        return self._ranks[server_id]
+
+    async def process(self, server_id: int, user_id: int, now: Optional[float] = None) -> Optional[int]:
+        """Traite un message; retourne le nouveau niveau en cas de passage de niveau, sinon None"""
+        self.messages += 1
+        now = time.monotonic() if now is None else now
+        profiles = self._guilds.get(server_id)
+        if profiles is None:
+            profiles = await self._load_guild(server_id)
+        self._guild_activity[server_id] = now
+
+        profile = profiles.get(user_id)
+        if profile is None:
+            profile = profiles[user_id] = [0, 0, float("-inf")]
+        elif now - profile[2] < self.cooldown:
+            return None
+        profile[2] = now
+
+        total_xp = profile[0] + self.rng.randint(self.xp_min, self.xp_max)
+        level = level_from_total_xp(total_xp)[0]
+        level_up = level > profile[1]
+        profile[0], profile[1] = total_xp, level
+        self._ranks[server_id].update(user_id, total_xp)
+        self._dirty.setdefault(server_id, set()).add(user_id)
+        self.awarded += 1
+        return level if level_up else None
+
+    def get(self, server_id: int, user_id: int) -> Optional[int]:
+        """XP totale en mémoire, None si le serveur n'est pas chargé"""
+        profiles = self._guilds.get(server_id)
+        if profiles is None:
+            return None
+        profile = profiles.get(user_id)
+        return profile[0] if profile else 0
+
+    def reset(self) -> None:
+        """Oublie tous les serveurs chargés sans écrire leurs modifications (base restaurée)"""
+        self._generation += 1
+        self._guilds.clear()
+        self._ranks.clear()
+        self._guild_activity.clear()
+        self._dirty = {}
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """
+        Met en file l'écriture des membres modifiés (un seul lot) et décharge les
+        serveurs inactifs. Les lectures de bot.db vident la file: un classement lu
+        juste après voit déjà ces valeurs.
+        """
+        now = time.monotonic() if now is None else now
+        rows = []
+        for server_id, user_ids in self._dirty.items():
+            profiles = self._guilds[server_id]
+            rows.extend((user_id, server_id, profiles[user_id][0]) for user_id in user_ids)
+        self._dirty = {}
+        for server_id, last_activity in list(self._guild_activity.items()):
+            if now - last_activity > self.idle_after:
+                del self._guild_activity[server_id]
+                self._guilds.pop(server_id, None)
+                self._ranks.pop(server_id, None)
+        if rows:
+            self.db.save_levels(rows)
+            self.flushed_rows += len(rows)
+        return len(rows)